@@ -0,0 +1,140 @@
+"""Micro-benchmark of the event feed parser: parse time and memory per 10k events.
+
+Compares the slotted EventWatcherEvent (epoch times, memoised time parser) with the former event class
+(instance __dict__, datetime.strptime for each time), which is kept here as reference. Memory is measured
+with tracemalloc for the list of parsed events. 'cold' parses with empty time caches, 'warm' like a
+feed refresh with mostly unchanged times.
+
+Usage: python benchmarks/bench_events.py [--events 10000] [--repeat 5] [--output result.json]
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+
+class LegacyEvent():
+    """Former EventWatcherEvent, parser only."""
+
+    def __init__(self, event_name, event_type, start_datetime, end_datetime, has_spawnpoints, has_quests, has_pokemon, bonus_lure_duration=None,
+                 spawn_pool=frozenset(), bonuses=frozenset()):
+        self.name = event_name
+        self.etype = event_type
+        self.start = start_datetime
+        self.end = end_datetime
+        self.has_spawnpoints = has_spawnpoints
+        self.has_quests = has_quests
+        self.has_pokemon = has_pokemon
+        self.bonus_lure_duration = bonus_lure_duration
+        self.spawn_pool = spawn_pool
+        self.bonuses = bonuses
+
+    @classmethod
+    def fromPogoinfo(cls, raw_event):
+        if raw_event["type"] is None or raw_event["end"] is None:
+            return None
+        start = datetime.strptime(raw_event["start"], "%Y-%m-%d %H:%M") if raw_event["start"] is not None else None
+        end = datetime.strptime(raw_event["end"], "%Y-%m-%d %H:%M")
+        bonus_lure_duration = None
+        for bonus in raw_event["bonuses"]:
+            if bonus.get("template", "") == "longer-lure":
+                bonus_lure_duration = bonus.get("value", 3) * 60
+                break
+        has_pokemon = raw_event["type"] in ("spotlight-hour", "community-day") or bool(raw_event["spawns"])
+        spawn_pool = set()
+        for raw_spawn in raw_event["spawns"] or []:
+            if isinstance(raw_spawn, dict):
+                raw_spawn = raw_spawn.get("id", raw_spawn.get("pokemon_id"))
+            if isinstance(raw_spawn, int) and not isinstance(raw_spawn, bool):
+                spawn_pool.add(raw_spawn)
+        bonuses = frozenset(bonus["template"] for bonus in raw_event["bonuses"] if isinstance(bonus, dict) and bonus.get("template"))
+        return cls(raw_event["name"], raw_event["type"], start, end, raw_event["has_spawnpoints"], raw_event["has_quests"], has_pokemon,
+                   bonus_lure_duration, frozenset(spawn_pool), bonuses)
+
+
+def _parse(event_cls, feed):
+    return [event for event in (event_cls.fromPogoinfo(raw_event) for raw_event in feed) if event is not None]
+
+
+def _clear_time_caches():
+    from ewcore import events
+    events._parsed_times.clear()
+    events._datetimes.clear()
+
+
+def _parse_time(event_cls, feed, repeat, cold):
+    best = None
+    for _ in range(repeat):
+        if cold:
+            _clear_time_caches()
+        start = time.perf_counter()
+        _parse(event_cls, feed)
+        duration = time.perf_counter() - start
+        best = duration if best is None else min(best, duration)
+    return best
+
+
+def _memory(event_cls, feed):
+    """Bytes kept by the parsed events (incl. times, spawn pools and bonuses), the feed and the time caches excluded."""
+    _clear_time_caches()
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    events = _parse(event_cls, feed)
+    _clear_time_caches()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del events
+    return size
+
+
+def run(event_cls, feed, args):
+    per_10k = 10000 / len(feed)
+    return {
+        "parse_cold_ms_per_10k": round(_parse_time(event_cls, feed, args.repeat, True) * 1000 * per_10k, 2),
+        "parse_warm_ms_per_10k": round(_parse_time(event_cls, feed, args.repeat, False) * 1000 * per_10k, 2),
+        "memory_kib_per_10k": round(_memory(event_cls, feed) / 1024 * per_10k, 1),
+        # without spawn pools and bonuses: the event records and their times only
+        "record_memory_kib_per_10k": round(_memory(event_cls, [dict(raw_event, spawns=[], bonuses=[]) for raw_event in feed]) / 1024 * per_10k, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default=None, help="write json result to file")
+    args = parser.parse_args()
+
+    # make ewcore importable without MAD
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from ewcore.events import EventWatcherEvent
+    from fakeservers import synthetic_feed
+
+    feed = synthetic_feed(args.events, seed=args.seed)
+    legacy = run(LegacyEvent, feed, args)
+    current = run(EventWatcherEvent, feed, args)
+    result = {
+        "benchmark": "event_parser",
+        "params": vars(args),
+        "legacy": legacy,
+        "current": current,
+        "speedup_cold": round(legacy["parse_cold_ms_per_10k"] / current["parse_cold_ms_per_10k"], 2),
+        "speedup_warm": round(legacy["parse_warm_ms_per_10k"] / current["parse_warm_ms_per_10k"], 2),
+        "memory_ratio": round(current["memory_kib_per_10k"] / legacy["memory_kib_per_10k"], 2),
+        "record_memory_ratio": round(current["record_memory_kib_per_10k"] / legacy["record_memory_kib_per_10k"], 2)
+    }
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Benchmark of the 'filtered' pokemon reset: single DELETE statement vs. chunked BatchDeleter.
+
+A writer thread inserts pokemon like MAD's proto processing while the reset runs. Reported are the
+worst-case time a DELETE statement holds the database lock and the insert latency seen by the writer.
+SQLite locks the whole database for a write, so the statement time equals the lock hold time.
+
+Usage: python benchmarks/bench_pokemon_reset.py [--rows 300000] [--chunk-size 5000] [--output result.json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _populate(db_wrapper, rows, boundary):
+    conn = db_wrapper._connection()
+    data = []
+    for encounter_id in range(1, rows + 1):
+        last_modified = boundary - timedelta(seconds=random.randint(0, 1800)) + timedelta(seconds=random.randint(0, 900))
+        disappear_time = last_modified + timedelta(seconds=random.randint(60, 1800))
+        data.append((encounter_id, random.randint(1, 100000), random.randint(1, 900),
+                     disappear_time.strftime(TIME_FORMAT), last_modified.strftime(TIME_FORMAT)))
+    conn.executemany("INSERT INTO pokemon VALUES (?, ?, ?, ?, ?)", data)
+    conn.commit()
+
+
+def _insert_worker(db_wrapper, stop, latencies, first_id):
+    encounter_id = first_id
+    while not stop.is_set():
+        now = datetime.now()
+        start = time.monotonic()
+        db_wrapper.execute("INSERT INTO pokemon VALUES (%s, %s, %s, %s, %s)",
+                           args=(encounter_id, 1, 1, (now + timedelta(minutes=30)).strftime(TIME_FORMAT), now.strftime(TIME_FORMAT)),
+                           commit=True)
+        latencies.append(time.monotonic() - start)
+        encounter_id += 1
+        time.sleep(0.002)
+
+
+def _percentile(values, percent):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def run_strategy(strategy, args):
+    from fakemad import SqliteDbWrapper, FakeLogger, create_pokemon_table
+    from ewcore.dbtools import BatchDeleter
+
+    random.seed(args.seed)
+    workdir = tempfile.mkdtemp(prefix="ew_bench_")
+    db_wrapper = SqliteDbWrapper(os.path.join(workdir, "mad.db"), logger=FakeLogger())
+    create_pokemon_table(db_wrapper)
+    boundary = datetime(2030, 1, 1, 20, 0, 0)
+    _populate(db_wrapper, args.rows, boundary)
+    where = "last_modified < %s AND disappear_time > %s"
+    where_args = (boundary.strftime(TIME_FORMAT), boundary.strftime(TIME_FORMAT))
+
+    stop = threading.Event()
+    latencies = []
+    writer = threading.Thread(target=_insert_worker, args=(db_wrapper, stop, latencies, args.rows + 1), daemon=True)
+    writer.start()
+    time.sleep(0.5)
+    db_wrapper.statement_times.clear()
+
+    start = time.monotonic()
+    if strategy == "single":
+        rows_deleted = db_wrapper.execute(f"DELETE FROM pokemon WHERE {where}", args=where_args, commit=True)
+    else:
+        deleter = BatchDeleter(db_wrapper, FakeLogger(), chunk_size=args.chunk_size, chunk_pause_in_s=args.chunk_pause)
+        rows_deleted = deleter.delete("pokemon", "encounter_id", where, where_args).rows_deleted
+    duration = time.monotonic() - start
+
+    time.sleep(0.5)
+    stop.set()
+    writer.join()
+    delete_times = [statement_time for sql, statement_time in db_wrapper.statement_times if sql.startswith("DELETE")]
+    return {
+        "rows_deleted": rows_deleted,
+        "duration_s": round(duration, 4),
+        "delete_statements": len(delete_times),
+        "max_lock_hold_s": round(max(delete_times), 4),
+        "insert_count": len(latencies),
+        "insert_latency_max_s": round(max(latencies), 4),
+        "insert_latency_p99_s": round(_percentile(latencies, 99), 4),
+        "insert_latency_mean_s": round(sum(latencies) / len(latencies), 5)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=300000)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--chunk-pause", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default=None, help="write json result to file")
+    args = parser.parse_args()
+
+    # make ewcore importable without MAD
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    result = {
+        "benchmark": "pokemon_reset_filtered",
+        "backend": "sqlite",
+        "params": vars(args),
+        "single": run_strategy("single", args),
+        "chunked": run_strategy("chunked", args)
+    }
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
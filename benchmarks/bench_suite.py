@@ -0,0 +1,365 @@
+"""Offline benchmark suite of the EventWatcher plugin against a fake MAD.
+
+The plugin runs with a SQLite database, fake MAD components, a local synthetic pogoinfo feed and
+fake Telegram/Discord endpoints. Results are written as json with flat metric names, so two runs
+can be compared with --compare.
+
+Benchmarks:
+- feed: download (200 and 304) and parse throughput of a synthetic feed
+- boundaries: cost of partitioning events, building and checking the reset schedule
+- reset: pokemon reset latency per strategy under concurrent pokemon inserts
+- notify: fan-out time of a quest reset notification to many Telegram chats and Discord webhooks
+- leader: failover time of the leader election of several instances sharing one database (crash and graceful stop)
+
+Usage: python benchmarks/bench_suite.py [--events 2000] [--rows 100000] [--only feed,reset] [--output result.json] [--compare baseline.json]
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+BASE_CONFIG = """[plugin]
+active = false
+sleep = 3600
+reset_pokemon_enable = true
+reset_quests_enable = true
+reset_quests_event_type = event community-day spotlight-hour
+"""
+
+
+def _timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def _percentile(values, percent):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+class Harness():
+    """EventWatcher plugin with fake MAD in a temporary work directory."""
+
+    def __init__(self, config_str=BASE_CONFIG, origins=(), verbose=False):
+        from fakemad import SqliteDbWrapper, FakeLogger, create_mad, create_watcher, create_pokemon_table, create_trs_event_table, \
+            load_watcher_module
+
+        self.work_dir = tempfile.mkdtemp(prefix="ew_bench_")
+        self.logger = FakeLogger(verbose)
+        self.db = SqliteDbWrapper(os.path.join(self.work_dir, "mad.db"), logger=self.logger)
+        create_pokemon_table(self.db)
+        create_trs_event_table(self.db)
+        self.mad = create_mad(self.db, self.logger, origins=origins)
+        self.module = load_watcher_module(PLUGIN_DIR)
+        self.plugin = create_watcher(self.module, self.mad, config_str, self.work_dir)
+
+
+def _parse_events(harness, payload):
+    """Parse a pogoinfo payload like the event sources and update the event index of the plugin."""
+    feedsources = importlib.import_module(harness.module.__package__ + ".feedsources")
+    return harness.plugin._update_event_index(feedsources.parse_pogoinfo(payload))
+
+
+def bench_feed(args):
+    from fakeservers import FeedServer, synthetic_feed
+    from ewcore.feedcache import FeedCache
+
+    harness = Harness()
+    payload = synthetic_feed(args.events, seed=args.seed)
+    server = FeedServer(payload)
+    try:
+        feed_cache = FeedCache(server.url, os.path.join(harness.work_dir, "cache"), timeout=30)
+        fetch_s, result = _timed(feed_cache.fetch)
+        conditional_fetch_s, conditional_result = _timed(feed_cache.fetch)
+        parse_times = []
+        for _ in range(args.repeat):
+            harness.plugin._event_index = harness.module.EventIndex()
+            parse_s, _ = _timed(_parse_events, harness, result.payload)
+            parse_times.append(parse_s)
+        # parse of unchanged feed: index update without changes
+        reparse_s, changeset = _timed(_parse_events, harness, result.payload)
+        parse_s = min(parse_times)
+        return {
+            "feed_events": args.events,
+            "feed_bytes": result.size_in_bytes,
+            "fetch_s": round(fetch_s, 5),
+            "fetch_status": result.status,
+            "conditional_fetch_s": round(conditional_fetch_s, 5),
+            "conditional_fetch_status": conditional_result.status,
+            "parse_s": round(parse_s, 5),
+            "parse_events_per_s": round(args.events / parse_s),
+            "reparse_unchanged_s": round(reparse_s, 5),
+            "reparse_changes": len(changeset.events())
+        }
+    finally:
+        server.close()
+
+
+def bench_boundaries(args):
+    from fakeservers import synthetic_feed
+
+    harness = Harness()
+    plugin = harness.plugin
+    plugin._apply_event_changeset(_parse_events(harness, synthetic_feed(args.events, seed=args.seed)))
+    partition_s, _ = _timed(plugin._partition_events)
+    # all boundaries are in the future for the reset check
+    plugin._last_pokemon_reset_check = plugin._last_quest_reset_check = datetime(2000, 1, 1)
+    boundaries_s, boundaries = _timed(plugin._get_reset_boundaries, plugin._all_events)
+    schedule_s, _ = _timed(plugin._reset_scheduler.replace, boundaries)
+    idle_checks = 1000
+    idle_s, _ = _timed(lambda: [plugin._reset_scheduler.pop_due(datetime(2000, 1, 1)) for _ in range(idle_checks)])
+    pop_s, due = _timed(plugin._reset_scheduler.pop_due, datetime(2100, 1, 1))
+    mad_target_s, _ = _timed(plugin._get_mad_events_target)
+    return {
+        "events": len(plugin._all_events),
+        "boundaries": len(boundaries),
+        "partition_s": round(partition_s, 6),
+        "build_boundaries_s": round(boundaries_s, 6),
+        "schedule_s": round(schedule_s, 6),
+        "idle_check_us": round(idle_s / idle_checks * 1e6, 3),
+        "pop_all_due_s": round(pop_s, 6),
+        "popped": len(due),
+        "mad_events_target_s": round(mad_target_s, 6)
+    }
+
+
+def _populate_pokemon(db, rows, boundary, seed):
+    rng = random.Random(seed)
+    data = []
+    for encounter_id in range(1, rows + 1):
+        last_modified = boundary - timedelta(seconds=rng.randint(0, 1800)) + timedelta(seconds=rng.randint(0, 900))
+        disappear_time = last_modified + timedelta(seconds=rng.randint(60, 1800))
+        data.append((encounter_id, rng.randint(1, 100000), rng.randint(1, 900),
+                     disappear_time.strftime(TIME_FORMAT), last_modified.strftime(TIME_FORMAT)))
+    conn = db._connection()
+    conn.executemany("INSERT INTO pokemon VALUES (?, ?, ?, ?, ?)", data)
+    conn.commit()
+
+
+def _insert_worker(db, stop, latencies, first_id):
+    encounter_id = first_id
+    while not stop.is_set():
+        now = datetime.now()
+        start = time.perf_counter()
+        db.execute("INSERT INTO pokemon VALUES (%s, %s, %s, %s, %s)",
+                   args=(encounter_id, 1, 1, (now + timedelta(minutes=30)).strftime(TIME_FORMAT), now.strftime(TIME_FORMAT)),
+                   commit=True)
+        latencies.append(time.perf_counter() - start)
+        encounter_id += 1
+        time.sleep(0.002)
+
+
+def _bench_reset_strategy(strategy, args):
+    from ewcore.events import EventWatcherEvent
+    from ewcore.scheduler import ResetAction, ResetBoundary
+
+    config_str = BASE_CONFIG + f"reset_pokemon_strategy = {strategy}\nreset_pokemon_chunk_size = {args.chunk_size}\nreset_pokemon_chunk_pause = 0.01\n"
+    harness = Harness(config_str)
+    plugin = harness.plugin
+    boundary_time = datetime(2030, 1, 1, 20, 0, 0)
+    _populate_pokemon(harness.db, args.rows, boundary_time, args.seed)
+    # spotlight hour with 5 species starts at boundary
+    event = EventWatcherEvent("Bench spotlight", "spotlight-hour", boundary_time, boundary_time + timedelta(hours=1),
+                              False, False, True, spawn_pool=frozenset(range(1, 6)))
+    plugin._pokemon_events = [event]
+
+    stop = threading.Event()
+    latencies = []
+    writer = threading.Thread(target=_insert_worker, args=(harness.db, stop, latencies, args.rows + 1), daemon=True)
+    writer.start()
+    time.sleep(0.3)
+    harness.db.statement_times.clear()
+    reset_s, _ = _timed(plugin._check_pokemon_resets, ResetAction("pokemon", [ResetBoundary(boundary_time, "pokemon", "start", event)]))
+    time.sleep(0.3)
+    stop.set()
+    writer.join()
+    delete_times = [statement_time for sql, statement_time in harness.db.statement_times if sql.lstrip().startswith("DELETE")]
+    # only count pokemon inserted before the reset, the writer inserts ids above args.rows
+    rows_left = harness.db.autofetch_value("SELECT COUNT(*) FROM pokemon WHERE encounter_id <= %s", (args.rows,))
+    return {
+        "reset_s": round(reset_s, 4),
+        "rows_deleted": args.rows - rows_left,
+        "delete_statements": len(delete_times),
+        "max_lock_hold_s": round(max(delete_times), 4) if delete_times else 0.0,
+        "insert_latency_max_s": round(max(latencies), 4) if latencies else 0.0,
+        "insert_latency_p99_s": round(_percentile(latencies, 99), 4)
+    }
+
+
+def bench_reset(args):
+    return {strategy: _bench_reset_strategy(strategy, args) for strategy in ("all", "filtered", "species")}
+
+
+def bench_notify(args):
+    from ewcore.events import EventWatcherEvent
+    from ewcore.scheduler import ResetBoundary
+    from fakeservers import NotificationServer
+
+    server = NotificationServer(latency_in_s=args.notify_latency)
+    try:
+        chat_ids = ",".join(str(100000 + nr) for nr in range(args.chats))
+        webhooks = ",".join(server.webhook_url(nr) for nr in range(args.webhooks))
+        config_str = BASE_CONFIG + (f"tg_info_enable = true\ntg_bot_token = 123:bench\ntg_chat_id = {chat_ids}\nquest_rescan_timewindow = 2-6\n"
+                                    f"tg_api_url = {server.telegram_api_url}\ndc_info_enable = true\ndc_webhook_url = {webhooks}\n"
+                                    f"notify_workers = {args.notify_workers}\n")
+        harness = Harness(config_str)
+        plugin = harness.plugin
+        plugin._notifier.start()
+        start = time.perf_counter()
+        boundaries = [ResetBoundary(datetime.now(), "quest", "start", EventWatcherEvent("Bench event", "event", None, datetime.now(), False, True, False))]
+        plugin._send_tg_info_questreset(boundaries)
+        plugin._send_dc_info_questreset(boundaries)
+        enqueue_s = time.perf_counter() - start
+        delivered = server.wait_for(telegram=args.chats, discord=args.webhooks, timeout=120)
+        fanout_s = time.perf_counter() - start
+        return {
+            "messages": args.chats + args.webhooks,
+            "workers": args.notify_workers,
+            "server_latency_s": args.notify_latency,
+            "enqueue_s": round(enqueue_s, 4),
+            "fanout_s": round(fanout_s, 4),
+            "all_delivered": delivered,
+            "messages_per_s": round((server.received["telegram"] + server.received["discord"]) / fanout_s, 1)
+        }
+    finally:
+        server.close()
+
+
+def _sample_leaders(elections, duration_in_s, interval_in_s=0.01):
+    """Sample leaders of all elections. Returns (seconds without leader, samples with more than one leader, leaders at end)."""
+    without_leader_s = 0.0
+    overlaps = 0
+    end = time.monotonic() + duration_in_s
+    leaders = []
+    while time.monotonic() < end:
+        leaders = [election for election in elections if election.is_leader()]
+        if not leaders:
+            without_leader_s += interval_in_s
+        elif len(leaders) > 1:
+            overlaps += 1
+        time.sleep(interval_in_s)
+    return without_leader_s, overlaps, leaders
+
+
+def bench_leader(args):
+    from fakemad import SqliteDbWrapper, FakeLogger
+    from ewcore.leader import LeaderElection
+
+    work_dir = tempfile.mkdtemp(prefix="ew_bench_")
+    db = SqliteDbWrapper(os.path.join(work_dir, "mad.db"), logger=FakeLogger(args.verbose))
+    elections = [LeaderElection(db, f"instance{nr}", FakeLogger(args.verbose), lease_duration_in_s=args.lease_duration)
+                 for nr in range(args.instances)]
+    for election in elections:
+        election.start()
+    # bound of failover: lease expires after lease duration, followers check every renew interval
+    failover_bound_s = args.lease_duration + elections[0].renew_interval_in_s
+    try:
+        _, start_overlaps, leaders = _sample_leaders(elections, args.lease_duration)
+        crashed = leaders[0]
+        # crash: heartbeat stops, lease isn't released
+        crashed.stop(release=False)
+        crash_failover_s, crash_overlaps, leaders = _sample_leaders(elections, failover_bound_s + args.lease_duration)
+        stopped = leaders[0]
+        # graceful stop: lease is released, next follower takes over with its next renew
+        stopped.stop(release=True)
+        stop_failover_s, stop_overlaps, leaders = _sample_leaders(elections, failover_bound_s)
+        return {
+            "instances": args.instances,
+            "lease_duration_s": args.lease_duration,
+            "failover_bound_s": round(failover_bound_s, 3),
+            "crash_failover_s": round(crash_failover_s, 3),
+            "stop_failover_s": round(stop_failover_s, 3),
+            "leader_overlaps": start_overlaps + crash_overlaps + stop_overlaps,
+            "leader_after_failovers": len(leaders) == 1
+        }
+    finally:
+        for election in elections:
+            election.stop(release=False)
+        db.close()
+
+
+BENCHMARKS = {
+    "feed": bench_feed,
+    "boundaries": bench_boundaries,
+    "reset": bench_reset,
+    "notify": bench_notify,
+    "leader": bench_leader
+}
+
+
+def _flatten(result, prefix=""):
+    flat = {}
+    for key, value in result.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def compare(result, baseline):
+    """Print ratio current/baseline of all numeric metrics found in both results."""
+    current = _flatten(result["results"])
+    previous = _flatten(baseline["results"])
+    for name in sorted(current.keys() & previous.keys()):
+        ratio = current[name] / previous[name] if previous[name] else float("inf") if current[name] else 1.0
+        print(f"{name:50} {previous[name]:>14} {current[name]:>14} {ratio:8.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", default=",".join(BENCHMARKS), help="comma separated benchmarks: " + ", ".join(BENCHMARKS))
+    parser.add_argument("--events", type=int, default=2000, help="number of events of the synthetic feed")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--rows", type=int, default=100000, help="number of pokemon in database for reset benchmark")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--chats", type=int, default=20, help="number of Telegram chats")
+    parser.add_argument("--webhooks", type=int, default=20, help="number of Discord webhooks")
+    parser.add_argument("--notify-workers", type=int, default=4)
+    parser.add_argument("--notify-latency", type=float, default=0.05, help="response time of fake Telegram/Discord in seconds")
+    parser.add_argument("--instances", type=int, default=3, help="number of instances of the leader election")
+    parser.add_argument("--lease-duration", type=float, default=1.5, help="lease duration of the leader election in seconds")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--verbose", action="store_true", help="print plugin log")
+    parser.add_argument("--output", default=None, help="write json result to file")
+    parser.add_argument("--compare", default=None, help="json result of a previous run")
+    args = parser.parse_args()
+
+    # make plugin and ewcore importable without MAD
+    sys.path.insert(0, PLUGIN_DIR)
+    result = {
+        "suite": "eventwatcher",
+        "started_at": datetime.now().strftime(TIME_FORMAT),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": vars(args),
+        "results": {}
+    }
+    for name in [name.strip() for name in args.only.split(",") if name.strip()]:
+        print(f"running benchmark {name} ...", file=sys.stderr)
+        result["results"][name] = BENCHMARKS[name](args)
+
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(result, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""Stand-ins for MAD components, used by the offline benchmarks.
+
+Note: MAD imports every module inside the plugin folder, so modules in this folder must not
+have side effects on import.
+"""
+import configparser
+import importlib
+import importlib.util
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+
+_TRUNCATE_RE = re.compile(r"^\s*TRUNCATE\s+(?:TABLE\s+)?(\w+)\s*$", re.IGNORECASE)
+_SET_STATEMENT_RE = re.compile(r"^\s*SET\s+STATEMENT\s+.+?\s+FOR\s+", re.IGNORECASE)
+
+
+class SqliteDbWrapper():
+    """Subset of MAD's db wrapper interface backed by SQLite.
+
+    Like MAD's db wrapper, failed queries are logged and return None. The MySQL dialect used by
+    EventWatcher is translated where SQLite differs (placeholders, TRUNCATE, SET STATEMENT, START TRANSACTION).
+    """
+
+    def __init__(self, path, busy_timeout_in_s=30, logger=None):
+        self._path = path
+        self._busy_timeout_in_s = busy_timeout_in_s
+        self._logger = logger
+        self._local = threading.local()
+        self.statement_times = []
+        self._statement_times_lock = threading.Lock()
+        self.execute("PRAGMA journal_mode=WAL")
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # PARSE_DECLTYPES: return TIMESTAMP columns as datetime like MySQL DATETIME columns
+            conn = sqlite3.connect(self._path, timeout=self._busy_timeout_in_s, check_same_thread=False,
+                                   detect_types=sqlite3.PARSE_DECLTYPES)
+            self._local.conn = conn
+        return conn
+
+    def translate(self, sql):
+        sql = _SET_STATEMENT_RE.sub("", sql)
+        sql = re.sub(r"^\s*START TRANSACTION\s*;", "BEGIN;", sql, flags=re.IGNORECASE)
+        match = _TRUNCATE_RE.match(sql)
+        if match:
+            sql = f"DELETE FROM {match.group(1)}"
+        # MySQL escaped quotes inside of literals (see ewcore.dbtools.sql_literal)
+        sql = sql.replace("\\'", "''")
+        return sql.replace("%s", "?")
+
+    def execute(self, sql, args=None, commit=False, **kwargs):
+        conn = self._connection()
+        sql = self.translate(sql)
+        start = time.monotonic()
+        try:
+            if sql.count(";") > 1:
+                # multi statement query: like MAD's db wrapper no result is returned
+                conn.executescript(sql)
+                return None
+            cursor = conn.execute(sql, args or ())
+            if commit:
+                conn.commit()
+                result = cursor.rowcount
+            else:
+                result = cursor.fetchall()
+        except sqlite3.Error as e:
+            conn.rollback()
+            if self._logger is not None:
+                self._logger.error(f"Failed executing query: {sql}, error: {e}")
+            return None
+        finally:
+            with self._statement_times_lock:
+                self.statement_times.append((sql, time.monotonic() - start))
+        return result
+
+    def executescript(self, sql):
+        conn = self._connection()
+        conn.executescript(sql)
+
+    def autofetch_all(self, sql, args=()):
+        conn = self._connection()
+        cursor = conn.execute(self.translate(sql), args or ())
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def autofetch_value(self, sql, args=()):
+        rows = self.execute(sql, args=args)
+        if not rows:
+            return None
+        return rows[0][0]
+
+    def autoexec_insert(self, table, keyvals, **kwargs):
+        columns = ", ".join(keyvals.keys())
+        placeholders = ", ".join(["%s"] * len(keyvals))
+        return self.execute(f"INSERT INTO {table} ({columns}) VALUES ({placeholders})", args=tuple(keyvals.values()), commit=True)
+
+    def autoexec_update(self, table, set_keyvals, where_keyvals=None, **kwargs):
+        set_str = ", ".join(f"{key} = %s" for key in set_keyvals)
+        args = list(set_keyvals.values())
+        sql = f"UPDATE {table} SET {set_str}"
+        if where_keyvals:
+            sql += " WHERE " + " AND ".join(f"{key} = %s" for key in where_keyvals)
+            args.extend(where_keyvals.values())
+        return self.execute(sql, args=tuple(args), commit=True)
+
+    def autoexec_delete(self, table, keyvals, **kwargs):
+        where_str = " AND ".join(f"{key} = %s" for key in keyvals)
+        return self.execute(f"DELETE FROM {table} WHERE {where_str}", args=tuple(keyvals.values()), commit=True)
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class FakeLogger():
+    """Logger with the loguru methods used by EventWatcher. Only errors are printed by default."""
+
+    def __init__(self, verbose=False):
+        self.verbose = verbose
+        self.lines = []
+
+    def _log(self, level, msg):
+        self.lines.append((level, msg))
+        if self.verbose or level in ("error", "exception"):
+            print(f"{level.upper()}: {msg}")
+
+    def debug(self, msg):
+        self._log("debug", msg)
+
+    def info(self, msg):
+        self._log("info", msg)
+
+    def success(self, msg):
+        self._log("success", msg)
+
+    def warning(self, msg):
+        self._log("warning", msg)
+
+    def error(self, msg):
+        self._log("error", msg)
+
+    def exception(self, e):
+        self._log("exception", str(e))
+
+
+def create_pokemon_table(db_wrapper):
+    db_wrapper.execute("CREATE TABLE IF NOT EXISTS pokemon ("
+                       "encounter_id INTEGER PRIMARY KEY, spawnpoint_id INTEGER, pokemon_id INTEGER, "
+                       "disappear_time TEXT, last_modified TEXT)", commit=True)
+    db_wrapper.execute("CREATE INDEX IF NOT EXISTS pokemon_disappear_time ON pokemon (disappear_time)", commit=True)
+    db_wrapper.execute("CREATE INDEX IF NOT EXISTS pokemon_last_modified ON pokemon (last_modified)", commit=True)
+    db_wrapper.execute("CREATE INDEX IF NOT EXISTS pokemon_disappear_time_pokemon_id ON pokemon (disappear_time, pokemon_id)", commit=True)
+
+
+def create_trs_event_table(db_wrapper):
+    db_wrapper.execute("CREATE TABLE IF NOT EXISTS trs_event ("
+                       "id INTEGER PRIMARY KEY AUTOINCREMENT, event_name TEXT NOT NULL, event_start TIMESTAMP NOT NULL, "
+                       "event_end TIMESTAMP NOT NULL, event_lure_duration INTEGER NOT NULL DEFAULT 30)", commit=True)
+
+
+class FakeCommunicator():
+    def __init__(self, restart_latency_in_s=0.0):
+        self._restart_latency_in_s = restart_latency_in_s
+
+    def restart_app(self, package_name):
+        time.sleep(self._restart_latency_in_s)
+        return True
+
+
+class FakeWsServer():
+    def __init__(self, origins=(), restart_latency_in_s=0.0):
+        self._origins = list(origins)
+        self._restart_latency_in_s = restart_latency_in_s
+
+    def get_reg_origins(self):
+        return list(self._origins)
+
+    def get_origin_communicator(self, origin):
+        return FakeCommunicator(self._restart_latency_in_s)
+
+
+class FakeMappingManager():
+    """Mapping manager without areas, counts calls of update()."""
+
+    def __init__(self):
+        self.update_count = 0
+
+    def update(self):
+        self.update_count += 1
+
+    def get_all_routemanager_names(self):
+        return []
+
+
+class FakeMadmin():
+    def add_plugin_hotlink(self, *args, **kwargs):
+        pass
+
+    def register_plugin(self, *args, **kwargs):
+        pass
+
+
+class FakeArgs():
+    config_mode = False
+
+
+def create_mad(db_wrapper, logger=None, origins=(), restart_latency_in_s=0.0):
+    """The mad dict MAD passes to plugins."""
+    return {
+        "logger": logger if logger is not None else FakeLogger(),
+        "db_wrapper": db_wrapper,
+        "mapping_manager": FakeMappingManager(),
+        "ws_server": FakeWsServer(origins, restart_latency_in_s),
+        "madmin": FakeMadmin(),
+        "args": FakeArgs()
+    }
+
+
+def load_watcher_module(plugin_dir, package_name="ew_plugin"):
+    """Import ewcore/watcher.py of plugin_dir as module of a package, like MAD does for plugin folders."""
+    if package_name not in sys.modules:
+        spec = importlib.util.spec_from_loader(package_name, loader=None, is_package=True)
+        package = importlib.util.module_from_spec(spec)
+        package.__path__ = [plugin_dir]
+        sys.modules[package_name] = package
+    return importlib.import_module(f"{package_name}.ewcore.watcher")
+
+
+def create_watcher(watcher_module, mad, config_str, work_dir):
+    """Create EventWatcherCore with config_str as plugin.ini, runtime files (cache, data) are stored in work_dir."""
+    pluginconfig = configparser.ConfigParser()
+    pluginconfig.read_string(config_str)
+    watcher = watcher_module.EventWatcherCore(mad, work_dir, pluginconfig)
+    # locales are read from the plugin folder
+    shutil.copy(os.path.join(os.path.dirname(os.path.dirname(watcher_module.__file__)), "local_default.json"), work_dir)
+    watcher.tz_offset = 0
+    watcher._load_config_parameter()
+    watcher._create_components()
+    return watcher
@@ -0,0 +1,161 @@
+"""Local HTTP servers used by the offline benchmarks: synthetic pogoinfo feed, Telegram and Discord.
+
+Note: MAD imports every module inside the plugin folder, so modules in this folder must not
+have side effects on import.
+"""
+import hashlib
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TIME_FORMAT = "%Y-%m-%d %H:%M"
+EVENT_TYPES = ("event", "event", "event", "community-day", "spotlight-hour", "raid-hour", "go-battle-league")
+
+
+def synthetic_feed(event_count, seed=1, now=None):
+    """List of pogoinfo events with starts/ends spread around now."""
+    rng = random.Random(seed)
+    now = (now or datetime.now()).replace(second=0, microsecond=0)
+    events = []
+    for event_nr in range(event_count):
+        event_type = rng.choice(EVENT_TYPES)
+        start = now + timedelta(minutes=rng.randint(-30 * 24 * 60, 30 * 24 * 60))
+        if event_type == "spotlight-hour":
+            end = start + timedelta(hours=1)
+        elif event_type == "community-day":
+            end = start + timedelta(hours=3)
+        else:
+            end = start + timedelta(hours=rng.randint(2, 10 * 24))
+        bonuses = [{"template": "longer-lure", "value": 3}] if rng.random() < 0.1 else []
+        spawns = [{"id": rng.randint(1, 900), "template": "POKEMON"} for _ in range(rng.choice((0, 0, 1, 5, 20)))]
+        events.append({
+            "name": f"Synthetic {event_type} {event_nr}",
+            "type": event_type,
+            "start": start.strftime(TIME_FORMAT) if rng.random() > 0.02 else None,
+            "end": end.strftime(TIME_FORMAT),
+            "bonuses": bonuses,
+            "spawns": spawns,
+            "has_spawnpoints": rng.random() < 0.3,
+            "has_quests": rng.random() < 0.5
+        })
+    return events
+
+
+class _Server():
+    def __init__(self, handler_cls):
+        handler_cls = type(handler_cls.__name__, (handler_cls,), {"owner": self})
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler_cls)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._httpd.server_port}"
+
+    def close(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+class _QuietHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body=b"", content_type="application/json", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class _FeedHandler(_QuietHandler):
+    def do_GET(self):
+        server = self.owner
+        with server.lock:
+            body, etag = server.body, server.etag
+            server.requests += 1
+        if self.headers.get("If-None-Match") == etag:
+            self._send(304, headers={"ETag": etag})
+            return
+        self._send(200, body, headers={"ETag": etag})
+
+
+class FeedServer(_Server):
+    """Serve a json payload on /events.json with ETag support."""
+
+    def __init__(self, payload):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.set_payload(payload)
+        super().__init__(_FeedHandler)
+
+    def set_payload(self, payload):
+        body = json.dumps(payload).encode("utf8")
+        with self.lock:
+            self.body = body
+            self.etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+
+    @property
+    def url(self):
+        return self.base_url + "/events.json"
+
+
+class _NotificationHandler(_QuietHandler):
+    def _record(self, channel):
+        server = self.owner
+        if server.latency_in_s > 0:
+            time.sleep(server.latency_in_s)
+        with server.cond:
+            server.received[channel] += 1
+            server.cond.notify_all()
+            return server.received[channel]
+
+    def do_GET(self):
+        # Telegram: /bot<token>/sendMessage?...
+        if "/sendMessage" not in self.path:
+            self._send(404, b'{"ok": false, "error_code": 404}')
+            return
+        message_id = self._record("telegram")
+        self._send(200, json.dumps({"ok": True, "result": {"message_id": message_id}}).encode("utf8"))
+
+    def do_POST(self):
+        # Discord: /webhook/<id>
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self._record("discord")
+        self._send(204)
+
+
+class NotificationServer(_Server):
+    """Fake Telegram Bot API (telegram_api_url) and Discord webhooks (webhook_url(nr)), counts received messages."""
+
+    def __init__(self, latency_in_s=0.0):
+        self.latency_in_s = latency_in_s
+        self.cond = threading.Condition()
+        self.received = {"telegram": 0, "discord": 0}
+        super().__init__(_NotificationHandler)
+
+    @property
+    def telegram_api_url(self):
+        return self.base_url
+
+    def webhook_url(self, nr):
+        return f"{self.base_url}/webhook/{nr}"
+
+    def wait_for(self, telegram=0, discord=0, timeout=60):
+        deadline = time.monotonic() + timeout
+        with self.cond:
+            while self.received["telegram"] < telegram or self.received["discord"] < discord:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self.cond.wait(remaining)
+        return True
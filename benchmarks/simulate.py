@@ -0,0 +1,149 @@
+"""Timeline simulation of resets, deleted rows and notifications caused by an event feed history.
+
+The reset decisions of the plugin (event parser, filters, reset schedule, debounce) are replayed on a
+virtual clock, so months of feed history are simulated in seconds. Database work and notifications are
+only estimated (see --pokemon-rows, --pokestops and --species).
+
+Feed sources:
+- --history feeds.jsonl: recorded feeds, one per line: {"time": "YYYY-MM-DD HH:MM", "events": [...]}
+- --feed events.json: one pogoinfo feed used for the whole time, e.g. cache/events.json of the plugin
+- default: synthetic feed history
+
+Usage: python benchmarks/simulate.py [--config plugin.ini] [--days 28] [--history feeds.jsonl] [--timeline] [--output result.json]
+"""
+import argparse
+import configparser
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+PLUGIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FEED_TIME_FORMAT = "%Y-%m-%d %H:%M"
+DEFAULT_CONFIG = """[plugin]
+reset_pokemon_enable = true
+reset_quests_enable = true
+reset_quests_event_type = event community-day
+"""
+EVENT_TYPES = ("event", "event", "event", "community-day", "spotlight-hour", "raid-hour")
+
+
+def synthetic_history(start, end, events_per_week, seed=1):
+    """Daily feed snapshots like the pogoinfo 'active' feed: running events and events starting within 14 days."""
+    rng = random.Random(seed)
+    events = []
+    event_time = start - timedelta(days=14)
+    event_nr = 0
+    while event_time < end + timedelta(days=14):
+        event_time += timedelta(minutes=rng.expovariate(events_per_week / (7 * 24 * 60)))
+        event_type = rng.choice(EVENT_TYPES)
+        event_start = event_time.replace(hour=rng.choice((0, 10, 18)), minute=0, second=0, microsecond=0)
+        if event_type == "spotlight-hour":
+            event_end = event_start.replace(hour=19) + timedelta(hours=1)
+            event_start = event_start.replace(hour=18)
+        elif event_type == "raid-hour":
+            event_end = event_start.replace(hour=19)
+            event_start = event_start.replace(hour=18)
+        elif event_type == "community-day":
+            event_start = event_start.replace(hour=14)
+            event_end = event_start + timedelta(hours=3)
+        else:
+            event_end = event_start + timedelta(days=rng.randint(1, 10), hours=rng.choice((0, 10)))
+        spawns = [{"id": rng.randint(1, 900), "template": "POKEMON"} for _ in range(rng.choice((0, 1, 5, 20)))]
+        events.append({
+            "name": f"Synthetic {event_type} {event_nr}",
+            "type": event_type,
+            "start": event_start.strftime(FEED_TIME_FORMAT),
+            "end": event_end.strftime(FEED_TIME_FORMAT),
+            "bonuses": [],
+            "spawns": spawns,
+            "has_spawnpoints": rng.random() < 0.3,
+            "has_quests": event_type == "community-day" or (event_type == "event" and rng.random() < 0.6)
+        })
+        event_nr += 1
+    snapshots = []
+    snapshot_time = start - timedelta(days=1)
+    while snapshot_time <= end:
+        snapshot_events = []
+        for event in events:
+            event_start = datetime.strptime(event["start"], FEED_TIME_FORMAT)
+            event_end = datetime.strptime(event["end"], FEED_TIME_FORMAT)
+            if event_end >= snapshot_time and event_start <= snapshot_time + timedelta(days=14):
+                snapshot_events.append(event)
+        snapshots.append((snapshot_time, snapshot_events))
+        snapshot_time += timedelta(days=1)
+    return snapshots
+
+
+def print_timeline(result):
+    for entry in result.timeline:
+        if entry["action"] == "event_changes":
+            print(f"{entry['time']} feed: {len(entry['changes'])} event changes")
+            continue
+        details = f"{entry['reset_type']} reset ({entry['strategy']}) rows:{entry['rows_deleted']} statements:{entry['sql_statements']}"
+        if entry["notifications"]:
+            details += f" notifications:{entry['notifications']}"
+        if entry.get("rescan"):
+            details += f" rescan:{entry['rescan']}"
+        print(f"{entry['time']} {details} <- {', '.join(entry['events'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--config", default=None, help="plugin.ini with reset settings, default: all resets enabled")
+    parser.add_argument("--history", default=None, help="recorded feeds as json lines")
+    parser.add_argument("--feed", default=None, help="single pogoinfo feed file")
+    parser.add_argument("--start", default=None, help="YYYY-MM-DD, default: first recorded feed or today")
+    parser.add_argument("--days", type=float, default=28)
+    parser.add_argument("--events-per-week", type=float, default=6, help="synthetic feed only")
+    parser.add_argument("--pokemon-rows", type=int, default=50000)
+    parser.add_argument("--pokestops", type=int, default=5000)
+    parser.add_argument("--species", type=int, default=150, help="species of the regular spawn pool")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--timeline", action="store_true", help="print all actions")
+    parser.add_argument("--output", default=None, help="write json result incl. timeline to file")
+    args = parser.parse_args()
+
+    # make ewcore importable without MAD
+    sys.path.insert(0, PLUGIN_DIR)
+    from ewcore.simulator import FeedHistory, LoadModel, TimelineSimulator
+
+    config = configparser.ConfigParser()
+    if args.config:
+        config.read(args.config)
+    else:
+        config.read_string(DEFAULT_CONFIG)
+
+    start = datetime.strptime(args.start, "%Y-%m-%d") if args.start else None
+    if args.history:
+        history = FeedHistory.from_jsonl(args.history)
+        if start is None:
+            start = history.first_time
+    elif args.feed:
+        with open(args.feed) as f:
+            history = FeedHistory.static(json.load(f))
+    if start is None:
+        start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    end = start + timedelta(days=args.days)
+    if not args.history and not args.feed:
+        history = FeedHistory(synthetic_history(start, end, args.events_per_week, args.seed))
+
+    simulator = TimelineSimulator.from_config(config, history, LoadModel(args.pokemon_rows, args.pokestops, args.species))
+    started = time.perf_counter()
+    result = simulator.run(start, end)
+    duration = time.perf_counter() - started
+
+    if args.timeline:
+        print_timeline(result)
+    summary = dict(result.summary, simulated_days=args.days, duration_s=round(duration, 3),
+                   days_per_s=round(args.days / duration, 1) if duration > 0 else None)
+    print(json.dumps(summary, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(dict(result.to_dict(), summary=summary), f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""EventWatcher as standalone daemon outside of the MAD process.
+
+The daemon uses the MAD database directly and calls the plugin in MADmin for functions only available inside
+of MAD (mapping update, PoGo app restarts, pokestops of areas). Set 'standalone = true' in section [plugin] of
+plugin.ini, so the plugin provides these functions instead of running the event watcher itself.
+
+    python3 eventwatcherd.py [--config plugin.ini]
+
+Note: MAD imports every module inside the plugin folder, so this module must not have side effects on import.
+"""
+import argparse
+import configparser
+import json
+import logging
+import os
+import signal
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PLUGIN_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class DaemonLogger():
+    """Logger with the loguru methods used by EventWatcher, based on logging."""
+
+    def __init__(self, logger):
+        self._logger = logger
+
+    def debug(self, msg):
+        self._logger.debug(msg)
+
+    def info(self, msg):
+        self._logger.info(msg)
+
+    def success(self, msg):
+        self._logger.info(msg)
+
+    def warning(self, msg):
+        self._logger.warning(msg)
+
+    def error(self, msg):
+        self._logger.error(msg)
+
+    def exception(self, e):
+        self._logger.error("exception", exc_info=e)
+
+
+def create_status_handler(watcher):
+    """Request handler of the status server: event list, event changes and metrics like the plugin pages."""
+
+    class StatusHandler(BaseHTTPRequestHandler):
+        def _send(self, status, body=b"", content_type="application/json", headers=None):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            path = self.path.split("?", 1)[0]
+            if path == "/ew_events.json":
+                snapshot = watcher.get_event_snapshot()
+                headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache"}
+                if snapshot.etag in [etag.strip() for etag in self.headers.get("If-None-Match", "").split(",")]:
+                    self._send(304, headers=headers)
+                else:
+                    self._send(200, snapshot.body, headers=headers)
+            elif path == "/ew_event_changes":
+                self._send(200, json.dumps(watcher.get_event_changes()).encode("utf8"))
+            elif path == "/ew_metrics":
+                self._send(200, watcher.metrics.render_prometheus().encode("utf8"), content_type="text/plain; version=0.0.4")
+            elif path == "/ew_metrics.json":
+                self._send(200, json.dumps(watcher.metrics.to_dict()).encode("utf8"))
+            else:
+                self._send(404, b'{"error": "not found"}')
+
+        def log_message(self, format, *args):
+            pass
+
+    return StatusHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EventWatcher standalone daemon")
+    parser.add_argument("--config", default=os.path.join(PLUGIN_DIR, "plugin.ini"), help="plugin.ini with section [standalone]")
+    parser.add_argument("--verbose", action="store_true", help="log debug messages")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, format="%(asctime)s %(levelname)-8s %(message)s")
+    logger = DaemonLogger(logging.getLogger("eventwatcher"))
+    pluginconfig = configparser.ConfigParser()
+    if not pluginconfig.read(args.config):
+        logger.error(f"EventWatcher: unable to read {args.config}")
+        return 1
+
+    # ewcore doesn't depend on MAD
+    sys.path.insert(0, PLUGIN_DIR)
+    from ewcore.madadapter import HttpMappingManager, HttpQuestAreaScope, HttpWsServer, MadHttpClient
+    from ewcore.mysqldb import MySqlDbWrapper
+    from ewcore.watcher import EventWatcherCore
+
+    config = pluginconfig["standalone"] if pluginconfig.has_section("standalone") else {}
+    db_wrapper = MySqlDbWrapper(config.get("db_host", "localhost"), int(config.get("db_port", 3306)), config.get("db_user", "mad"),
+                                config.get("db_password", ""), config.get("db_name", "mad"), logger=logger)
+    client = MadHttpClient(config.get("mad_url", "http://localhost:5000"), user=config.get("madmin_user") or None,
+                           password=config.get("madmin_password") or None, timeout=float(config.get("mad_timeout", 60)))
+    mad = {
+        "logger": logger,
+        "db_wrapper": db_wrapper,
+        "mapping_manager": HttpMappingManager(client),
+        "ws_server": HttpWsServer(client),
+        "quest_area_scope": HttpQuestAreaScope(client),
+        "args": args
+    }
+    watcher = EventWatcherCore(mad, PLUGIN_DIR, pluginconfig, config_path=args.config)
+    if watcher.load_config() is False:
+        logger.error("EventWatcher: invalid configuration")
+        return 1
+
+    status_port = int(config.get("status_port", 0))
+    if status_port > 0:
+        status_server = ThreadingHTTPServer((config.get("status_host", "127.0.0.1"), status_port), create_status_handler(watcher))
+        status_thread = threading.Thread(name="EventWatcher status", target=status_server.serve_forever)
+        status_thread.daemon = True
+        status_thread.start()
+        logger.info(f"EventWatcher: status pages on port {status_port}")
+
+    def _terminate(signum, frame):
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, _terminate)
+    logger.info("Starting Event Watcher (standalone)")
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Building blocks of the EventWatcher plugin which don't depend on MAD itself."""
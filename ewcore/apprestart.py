@@ -0,0 +1,106 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+
+
+class AppRestartReport():
+    def __init__(self, origins):
+        self.started_at = datetime.now()
+        self.duration_in_s = None
+        # origin -> {"status": 'pending', 'success', 'failed', 'error' or 'timeout', "latency_in_s": float or None, "result": str}
+        self.results = {origin: {"status": "pending", "latency_in_s": None, "result": None} for origin in origins}
+        # closed at the deadline: results of restarts still running afterwards are dropped
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def set_result(self, origin, **values):
+        """Record the result of a restart, unless the report is closed. Returns False, if it's closed."""
+        with self._lock:
+            if self._closed:
+                return False
+            self.results[origin].update(values)
+            return True
+
+    def close(self):
+        """Report pending restarts as 'timeout', later results are dropped."""
+        with self._lock:
+            self._closed = True
+            for result in self.results.values():
+                if result["status"] == "pending":
+                    result["status"] = "timeout"
+
+    def __repr__(self):
+        counts = {}
+        for result in self.results.values():
+            counts[result["status"]] = counts.get(result["status"], 0) + 1
+        counts_str = " ".join(f"{status}:{count}" for status, count in sorted(counts.items()))
+        return f"origins:{len(self.results)} {counts_str} duration:{self.duration_in_s}s"
+
+    def to_dict(self):
+        return {
+            "started_at": self.started_at.strftime("%Y-%m-%d %H:%M:%S"),
+            "duration_in_s": self.duration_in_s,
+            "results": self.results
+        }
+
+
+class AppRestarter():
+    """Restart an app on many devices in parallel.
+
+    At most concurrency restarts run at the same time, two restarts are started at least stagger_in_s apart.
+    Restarts not finished within deadline_in_s are reported as 'timeout'.
+    restart_func(origin) returns True on success.
+    """
+
+    def __init__(self, restart_func, logger=None, concurrency=10, stagger_in_s=0.5, deadline_in_s=300):
+        self._restart_func = restart_func
+        self._logger = logger
+        self.concurrency = concurrency
+        self.stagger_in_s = stagger_in_s
+        self.deadline_in_s = deadline_in_s
+        self._stagger_lock = threading.Lock()
+        self._next_start = 0.0
+        self.last_report = None
+
+    def _log(self, level, msg):
+        if self._logger is not None:
+            getattr(self._logger, level)(f"EventWatcher: {msg}")
+
+    def _restart(self, origin, report, deadline):
+        # stagger restarts: reserve next start slot
+        with self._stagger_lock:
+            start = max(time.monotonic(), self._next_start)
+            self._next_start = start + self.stagger_in_s
+        if start >= deadline:
+            report.set_result(origin, status="timeout")
+            return
+        time.sleep(max(0.0, start - time.monotonic()))
+        start = time.monotonic()
+        try:
+            result = self._restart_func(origin)
+            status = "success" if result is True else "failed"
+        except Exception as e:
+            result = e
+            status = "error"
+        report.set_result(origin, status=status, result=str(result), latency_in_s=round(time.monotonic() - start, 2))
+
+    def restart_all(self, origins):
+        report = AppRestartReport(origins)
+        self.last_report = report
+        if not origins:
+            report.duration_in_s = 0
+            return report
+        start = time.monotonic()
+        deadline = start + self.deadline_in_s
+        executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="EventWatcher restart")
+        futures = [executor.submit(self._restart, origin, report, deadline) for origin in origins]
+        wait(futures, timeout=self.deadline_in_s)
+        report.close()
+        # don't wait for hanging restarts, not started restarts are cancelled (shutdown(cancel_futures=True) needs python 3.9)
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
+        report.duration_in_s = round(time.monotonic() - start, 1)
+        self._log("info", f"restart PoGo app on all devices finished: {report}")
+        return report
@@ -0,0 +1,252 @@
+import threading
+import time
+from datetime import datetime
+
+_SQL_ESCAPES = {
+    "\\": "\\\\",
+    "'": "\\'",
+    "\"": "\\\"",
+    "\0": "\\0",
+    "\n": "\\n",
+    "\r": "\\r",
+    "\x1a": "\\Z"
+}
+
+
+def sql_literal(value):
+    """Convert a python value into an escaped MySQL literal, for statements which can't use query arguments."""
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, (int, float)):
+        return str(value)
+    if isinstance(value, datetime):
+        value = value.strftime("%Y-%m-%d %H:%M:%S")
+    return "'" + "".join(_SQL_ESCAPES.get(char, char) for char in str(value)) + "'"
+
+
+def execute_transaction(db_wrapper, statements):
+    """Execute statements (without arguments) as one transaction.
+
+    MAD's db wrapper sends queries with more than one ';' as multi statement query. It doesn't return
+    a result for them, so the caller has to verify the result if needed.
+    """
+    sql_query = "START TRANSACTION;\n" + ";\n".join(statements) + ";\nCOMMIT;"
+    db_wrapper.execute(sql_query, commit=True)
+
+
+class BatchDeleteResult():
+    def __init__(self):
+        self.rows_deleted = 0
+        self.chunks = 0
+        self.retries = 0
+        self.max_statement_time_in_s = 0.0
+        self.duration_in_s = 0.0
+        self.complete = False
+
+    def __repr__(self):
+        return (f"rows_deleted:{self.rows_deleted} chunks:{self.chunks} retries:{self.retries} complete:{self.complete} "
+                f"max_statement_time:{self.max_statement_time_in_s:.3f}s duration:{self.duration_in_s:.1f}s")
+
+
+class BatchDeleter():
+    """Delete rows matching a condition in chunks along the primary key.
+
+    Every DELETE statement is limited to a primary key range of chunk_size rows, so it only holds row locks
+    for a short time. Between chunks the deleter pauses to give concurrent inserts (MAD proto processing)
+    a chance to get their locks. Failing chunks are retried with exponential backoff.
+    db_wrapper is MAD's db wrapper, which returns None for failed queries.
+    """
+
+    def __init__(self, db_wrapper, logger=None, chunk_size=5000, chunk_pause_in_s=0.2, lock_wait_in_s=0,
+                 max_retries=5, retry_backoff_in_s=0.5):
+        self._db = db_wrapper
+        self._logger = logger
+        self.chunk_size = chunk_size
+        self.chunk_pause_in_s = chunk_pause_in_s
+        # MariaDB only: limit innodb lock wait of each DELETE statement. 0: use server setting
+        self.lock_wait_in_s = lock_wait_in_s
+        self.max_retries = max_retries
+        self.retry_backoff_in_s = retry_backoff_in_s
+
+    def _log(self, level, msg):
+        if self._logger is not None:
+            getattr(self._logger, level)(f"EventWatcher: {msg}")
+
+    def _get_chunk_upper_key(self, table, key_column, lower_key):
+        # walk primary key only (no condition), so each chunk covers at most chunk_size rows
+        if lower_key is None:
+            sql_query = f"SELECT {key_column} FROM {table} ORDER BY {key_column} LIMIT 1 OFFSET %s"
+            sql_args = (self.chunk_size - 1,)
+        else:
+            sql_query = f"SELECT {key_column} FROM {table} WHERE {key_column} > %s ORDER BY {key_column} LIMIT 1 OFFSET %s"
+            sql_args = (lower_key, self.chunk_size - 1)
+        for attempt in range(self.max_retries + 1):
+            rows = self._db.execute(sql_query, args=sql_args)
+            if rows is not None:
+                return True, (rows[0][0] if len(rows) > 0 else None)
+            time.sleep(self.retry_backoff_in_s * (2 ** attempt))
+        return False, None
+
+    def _delete_chunk(self, table, key_column, where, where_args, lower_key, upper_key, result):
+        conditions = []
+        sql_args = []
+        if lower_key is not None:
+            conditions.append(f"{key_column} > %s")
+            sql_args.append(lower_key)
+        if upper_key is not None:
+            conditions.append(f"{key_column} <= %s")
+            sql_args.append(upper_key)
+        if where:
+            conditions.append(f"({where})")
+            sql_args.extend(where_args or ())
+        sql_query = f"DELETE FROM {table}"
+        if conditions:
+            sql_query += " WHERE " + " AND ".join(conditions)
+        if self.lock_wait_in_s > 0:
+            sql_query = f"SET STATEMENT innodb_lock_wait_timeout={int(self.lock_wait_in_s)} FOR " + sql_query
+
+        for attempt in range(self.max_retries + 1):
+            statement_start = time.monotonic()
+            rows_deleted = self._db.execute(sql_query, args=tuple(sql_args), commit=True)
+            statement_time = time.monotonic() - statement_start
+            result.max_statement_time_in_s = max(result.max_statement_time_in_s, statement_time)
+            if rows_deleted is not None:
+                return rows_deleted
+            result.retries += 1
+            backoff = self.retry_backoff_in_s * (2 ** attempt)
+            self._log("warning", f"delete chunk of {table} failed (e.g. lock wait timeout), retry in {backoff:.1f}s")
+            time.sleep(backoff)
+        return None
+
+    def delete(self, table, key_column, where=None, where_args=None, progress_callback=None):
+        """Delete all rows of table matching where (SQL condition with %s placeholder). Returns BatchDeleteResult."""
+        result = BatchDeleteResult()
+        start = time.monotonic()
+        lower_key = None
+        while True:
+            ok, upper_key = self._get_chunk_upper_key(table, key_column, lower_key)
+            if not ok:
+                self._log("error", f"unable to get next delete chunk of table {table}, abort after {result.rows_deleted} deleted rows")
+                break
+            rows_deleted = self._delete_chunk(table, key_column, where, where_args, lower_key, upper_key, result)
+            if rows_deleted is None:
+                self._log("error", f"unable to delete chunk of table {table}, abort after {result.rows_deleted} deleted rows")
+                break
+            result.rows_deleted += rows_deleted
+            result.chunks += 1
+            if progress_callback is not None:
+                progress_callback(result)
+            if upper_key is None:
+                # last chunk: no rows left above lower_key
+                result.complete = True
+                break
+            lower_key = upper_key
+            if self.chunk_pause_in_s > 0:
+                time.sleep(self.chunk_pause_in_s)
+        result.duration_in_s = time.monotonic() - start
+        return result
+
+    def delete_selected(self, table, key_column, where, where_args=None):
+        """Select primary keys of matching rows (should use an index) and delete them in chunks. Returns BatchDeleteResult."""
+        rows = self._db.execute(f"SELECT {key_column} FROM {table} WHERE {where}", args=tuple(where_args or ()))
+        if rows is None:
+            self._log("error", f"unable to select rows of table {table} to delete")
+            return BatchDeleteResult()
+        return self.delete_keys(table, key_column, [row[0] for row in rows])
+
+    def delete_keys(self, table, key_column, keys):
+        """Delete rows by a list of primary keys in chunks. Returns BatchDeleteResult."""
+        result = BatchDeleteResult()
+        start = time.monotonic()
+        keys = list(keys)
+        for chunk_start in range(0, len(keys), self.chunk_size):
+            chunk = keys[chunk_start:chunk_start + self.chunk_size]
+            placeholders = ", ".join(["%s"] * len(chunk))
+            rows_deleted = self._delete_chunk(table, key_column, f"{key_column} IN ({placeholders})", chunk, None, None, result)
+            if rows_deleted is None:
+                self._log("error", f"unable to delete chunk of table {table}, abort after {result.rows_deleted} deleted rows")
+                break
+            result.rows_deleted += rows_deleted
+            result.chunks += 1
+            if chunk_start + self.chunk_size < len(keys) and self.chunk_pause_in_s > 0:
+                time.sleep(self.chunk_pause_in_s)
+        else:
+            result.complete = True
+        result.duration_in_s = time.monotonic() - start
+        return result
+
+
+class TableSwapResult():
+    def __init__(self, table):
+        self.table = table
+        self.success = False
+        # duration of each phase in seconds: 'create', 'swap' and 'drop' (drop is done in background)
+        self.phase_times_in_s = {}
+
+    def __repr__(self):
+        phases = " ".join(f"{phase}:{duration:.3f}s" for phase, duration in self.phase_times_in_s.items())
+        return f"table:{self.table} success:{self.success} {phases}"
+
+
+class TableSwapper():
+    """Empty a table by swapping in an empty copy instead of TRUNCATE.
+
+    TRUNCATE holds a metadata lock until the table file is recreated, which blocks all writers on big
+    InnoDB tables. Instead an empty shadow table is created and atomically swapped in by a single
+    RENAME TABLE. The old table is dropped afterwards in a background thread.
+    Note: CREATE TABLE ... LIKE doesn't copy foreign keys.
+    """
+
+    def __init__(self, db_wrapper, logger=None):
+        self._db = db_wrapper
+        self._logger = logger
+        self._drop_threads = {}
+
+    def _log(self, level, msg):
+        if self._logger is not None:
+            getattr(self._logger, level)(f"EventWatcher: {msg}")
+
+    def _timed_execute(self, result, phase, sql_query):
+        start = time.monotonic()
+        dbreturn = self._db.execute(sql_query, commit=True)
+        result.phase_times_in_s[phase] = result.phase_times_in_s.get(phase, 0.0) + time.monotonic() - start
+        return dbreturn is not None
+
+    def _drop_old_table(self, result, old_table):
+        if self._timed_execute(result, "drop", f"DROP TABLE IF EXISTS {old_table}"):
+            self._log("info", f"dropped swapped table {old_table} in background: {result}")
+        else:
+            self._log("error", f"unable to drop swapped table {old_table}. Will be dropped on next swap")
+
+    def swap(self, table, drop_in_background=True):
+        result = TableSwapResult(table)
+        shadow_table = f"{table}_ew_new"
+        old_table = f"{table}_ew_old"
+        # previous background drop has to finish before old table name can be used again
+        drop_thread = self._drop_threads.pop(table, None)
+        if drop_thread is not None:
+            drop_thread.join()
+
+        # remove leftovers of interrupted swaps, afterwards create empty copy of table
+        if not (self._timed_execute(result, "create", f"DROP TABLE IF EXISTS {shadow_table}")
+                and self._timed_execute(result, "create", f"DROP TABLE IF EXISTS {old_table}")
+                and self._timed_execute(result, "create", f"CREATE TABLE {shadow_table} LIKE {table}")):
+            self._log("error", f"unable to create shadow table {shadow_table}")
+            return result
+        # swap both tables in one atomic statement
+        if not self._timed_execute(result, "swap", f"RENAME TABLE {table} TO {old_table}, {shadow_table} TO {table}"):
+            self._log("error", f"unable to swap table {table} with {shadow_table}")
+            self._timed_execute(result, "swap", f"DROP TABLE IF EXISTS {shadow_table}")
+            return result
+        result.success = True
+
+        if drop_in_background:
+            drop_thread = threading.Thread(name=f"EventWatcher drop {old_table}", target=self._drop_old_table, args=(result, old_table))
+            drop_thread.daemon = True
+            self._drop_threads[table] = drop_thread
+            drop_thread.start()
+        else:
+            self._drop_old_table(result, old_table)
+        return result
@@ -0,0 +1,357 @@
+from collections import deque
+from datetime import date, datetime, timedelta
+
+FEED_TIME_FORMAT = "%Y-%m-%d %H:%M"
+# event times are naive local times (pogoinfo provides local times), stored as seconds since EPOCH
+EPOCH = datetime(1970, 1, 1)
+_EPOCH_ORDINAL = EPOCH.toordinal()
+# memoised time conversions, feeds repeat the same times a lot. Cleared when full
+TIME_CACHE_SIZE = 50000
+_parsed_times = {}
+_datetimes = {}
+_setattr = object.__setattr__
+# frozenset() isn't a singleton: share empty sets and the few combinations of bonus templates
+EMPTY_SET = frozenset()
+_bonus_sets = {}
+
+
+def datetime_to_epoch(value):
+    return (value - EPOCH).total_seconds() if value is not None else None
+
+
+def epoch_to_datetime(epoch):
+    if epoch is None:
+        return None
+    value = _datetimes.get(epoch)
+    if value is None:
+        if len(_datetimes) >= TIME_CACHE_SIZE:
+            _datetimes.clear()
+        value = _datetimes[epoch] = EPOCH + timedelta(seconds=epoch)
+    return value
+
+
+def parse_feed_time(time_string):
+    """Epoch of a feed time 'YYYY-MM-DD HH:MM'. Other formats accepted by strptime are parsed by strptime."""
+    epoch = _parsed_times.get(time_string)
+    if epoch is not None:
+        return epoch
+    if (len(time_string) == 16 and time_string[4] == "-" and time_string[7] == "-" and time_string[10] == " " and time_string[13] == ":"
+            and time_string[11:13].isdigit() and time_string[14:16].isdigit()):
+        hour = int(time_string[11:13])
+        minute = int(time_string[14:16])
+        try:
+            day = date(int(time_string[0:4]), int(time_string[5:7]), int(time_string[8:10]))
+        except ValueError:
+            day = None
+        if day is not None and hour < 24 and minute < 60:
+            epoch = float((day.toordinal() - _EPOCH_ORDINAL) * 86400 + hour * 3600 + minute * 60)
+    if epoch is None:
+        # raises ValueError for invalid times
+        epoch = datetime_to_epoch(datetime.strptime(time_string, FEED_TIME_FORMAT))
+    if len(_parsed_times) >= TIME_CACHE_SIZE:
+        _parsed_times.clear()
+    _parsed_times[time_string] = epoch
+    return epoch
+
+
+class EventWatcherEvent():
+    """Immutable event of the event feed.
+
+    Start and end are stored as epoch (start_epoch, end_epoch), start and end return them as datetime. Unknown start is None.
+    """
+
+    __slots__ = ("name", "etype", "start_epoch", "end_epoch", "has_spawnpoints", "has_quests", "has_pokemon", "bonus_lure_duration", "spawn_pool",
+                 "bonuses")
+
+    def __init__(self, event_name, event_type, start_datetime, end_datetime, has_spawnpoints, has_quests, has_pokemon, bonus_lure_duration = None, spawn_pool = frozenset(),
+                 bonuses = frozenset()):
+        self._set_fields(event_name, event_type, datetime_to_epoch(start_datetime), datetime_to_epoch(end_datetime), has_spawnpoints, has_quests,
+                         has_pokemon, bonus_lure_duration, spawn_pool, bonuses)
+
+    def _set_fields(self, event_name, event_type, start_epoch, end_epoch, has_spawnpoints, has_quests, has_pokemon, bonus_lure_duration, spawn_pool,
+                    bonuses):
+        _setattr(self, "name", event_name)
+        _setattr(self, "etype", event_type)
+        _setattr(self, "start_epoch", start_epoch)
+        _setattr(self, "end_epoch", end_epoch)
+        _setattr(self, "has_spawnpoints", has_spawnpoints)
+        _setattr(self, "has_quests", has_quests)
+        _setattr(self, "has_pokemon", has_pokemon)
+        _setattr(self, "bonus_lure_duration", bonus_lure_duration)
+        # pokemon ids of the event spawn pool. Empty, if unknown
+        _setattr(self, "spawn_pool", spawn_pool)
+        # pogoinfo bonus templates, e.g. longer-lure
+        _setattr(self, "bonuses", bonuses)
+
+    @classmethod
+    def fromEpoch(cls, event_name, event_type, start_epoch, end_epoch, has_spawnpoints, has_quests, has_pokemon, bonus_lure_duration = None,
+                  spawn_pool = frozenset(), bonuses = frozenset()):
+        event = cls.__new__(cls)
+        event._set_fields(event_name, event_type, start_epoch, end_epoch, has_spawnpoints, has_quests, has_pokemon, bonus_lure_duration, spawn_pool,
+                          bonuses)
+        return event
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    @property
+    def start(self):
+        return epoch_to_datetime(self.start_epoch)
+
+    @property
+    def end(self):
+        return epoch_to_datetime(self.end_epoch)
+
+    #TBD: remove testcode
+    def __repr__(self):
+        return f"name:{self.name} type:{self.etype} start:{self.start} end:{self.end} has_spawnpoints:{self.has_spawnpoints} has_quests:{self.has_quests} has_pokemon:{self.has_pokemon} bonus_lure_duration:{self.bonus_lure_duration}"
+
+    @property
+    def key(self):
+        """Stable identity of an event across event feed refreshes."""
+        return (self.name, self.etype, self.start_epoch)
+
+    def same_content(self, other):
+        return (self.end_epoch == other.end_epoch and self.has_spawnpoints == other.has_spawnpoints and self.has_quests == other.has_quests
+                and self.has_pokemon == other.has_pokemon and self.bonus_lure_duration == other.bonus_lure_duration
+                and self.spawn_pool == other.spawn_pool and self.bonuses == other.bonuses)
+
+    @staticmethod
+    def _parse_spawn_pool(raw_spawns):
+        # pogoinfo spawns are objects with pokemon id, plain ids are accepted as well
+        if not raw_spawns:
+            return EMPTY_SET
+        spawn_pool = set()
+        for raw_spawn in raw_spawns:
+            if type(raw_spawn) is dict:
+                pokemon_id = raw_spawn.get("id")
+                raw_spawn = pokemon_id if pokemon_id is not None else raw_spawn.get("pokemon_id")
+            # bool is no pokemon id
+            if type(raw_spawn) is int:
+                spawn_pool.add(raw_spawn)
+        return frozenset(spawn_pool) if spawn_pool else EMPTY_SET
+
+    @classmethod
+    def fromPogoinfo(cls, raw_event):
+        #check for valid input, unknown eventstart (=None) is accepted
+        event_type = raw_event["type"]
+        if event_type is None or raw_event["end"] is None:
+            return None
+
+        # pogoinfo provide local times. If event is added after eventstart to pogoinfo, start is Null
+        start = raw_event["start"]
+        start_epoch = parse_feed_time(start) if start is not None else None
+        end_epoch = parse_feed_time(raw_event["end"])
+
+        # get bonus lure duration time and bonus templates
+        bonus_lure_duration = None
+        bonuses = EMPTY_SET
+        raw_bonuses = raw_event["bonuses"]
+        if raw_bonuses:
+            for bonus in raw_bonuses:
+                if bonus.get("template", "") == "longer-lure":
+                    # if lure duration is not avaiable: use default 3 hours
+                    lure_duration_in_hour =  bonus.get("value", 3)
+                    bonus_lure_duration = lure_duration_in_hour*60
+                    break
+            bonuses = frozenset(bonus["template"] for bonus in raw_bonuses if isinstance(bonus, dict) and bonus.get("template"))
+            bonuses = _bonus_sets.setdefault(bonuses, bonuses) if bonuses else EMPTY_SET
+
+        # check for changed pokemon spawn pool
+        raw_spawns = raw_event["spawns"]
+        has_pokemon = bool(event_type == 'spotlight-hour' or event_type == 'community-day' or raw_spawns)
+
+        return cls.fromEpoch(raw_event["name"], event_type, start_epoch, end_epoch, raw_event["has_spawnpoints"], raw_event["has_quests"], has_pokemon,
+                             bonus_lure_duration, cls._parse_spawn_pool(raw_spawns), bonuses)
+
+    def is_active_before(self, boundary_time):
+        boundary_epoch = datetime_to_epoch(boundary_time)
+        return (self.start_epoch is None or self.start_epoch < boundary_epoch) and self.end_epoch >= boundary_epoch
+
+    def is_active_after(self, boundary_time):
+        boundary_epoch = datetime_to_epoch(boundary_time)
+        return (self.start_epoch is None or self.start_epoch <= boundary_epoch) and self.end_epoch > boundary_epoch
+
+    def get_duration_in_days(self, now=None):
+        start_epoch = self.start_epoch
+        #handle unknown start
+        if start_epoch is None:
+            start_epoch = datetime_to_epoch(now if now is not None else datetime.now())
+        return (self.end_epoch - start_epoch) / (3600 * 24)
+
+    def check_event_start(self, timewindow_start, timewindow_end):
+        #handle unknown start
+        if self.start_epoch is None:
+            return False
+        if datetime_to_epoch(timewindow_start) < self.start_epoch <= datetime_to_epoch(timewindow_end):
+            return True
+        else:
+            return False
+
+    def check_event_end(self, timewindow_start, timewindow_end):
+        if datetime_to_epoch(timewindow_start) < self.end_epoch <= datetime_to_epoch(timewindow_end):
+            return True
+        else:
+            return False
+
+
+class EventChangeset():
+    def __init__(self, added, changed, removed, timestamp=None):
+        # list of new events
+        self.added = added
+        # list of (old_event, new_event) tuples, e.g. event with moved start or end time
+        self.changed = changed
+        # list of events not part of event feed anymore (including ended events)
+        self.removed = removed
+        self.timestamp = timestamp if timestamp is not None else datetime.now()
+
+    def __repr__(self):
+        return f"added:{len(self.added)} changed:{len(self.changed)} removed:{len(self.removed)}"
+
+    def is_empty(self):
+        return not (self.added or self.changed or self.removed)
+
+    def events(self):
+        """All events touched by this changeset, for changed events the old and the new one."""
+        events = list(self.added) + list(self.removed)
+        for old_event, new_event in self.changed:
+            events.append(old_event)
+            events.append(new_event)
+        return events
+
+    def affects(self, predicate):
+        return any(predicate(event) for event in self.events())
+
+    def describe(self):
+        lines = []
+        for event in self.added:
+            lines.append(f"added event {event.name} ({event.etype}) start:{event.start} end:{event.end}")
+        for old_event, new_event in self.changed:
+            changes = []
+            for attr in ("start", "end", "has_spawnpoints", "has_quests", "has_pokemon", "bonus_lure_duration"):
+                if getattr(old_event, attr) != getattr(new_event, attr):
+                    changes.append(f"{attr}:{getattr(old_event, attr)}->{getattr(new_event, attr)}")
+            if old_event.spawn_pool != new_event.spawn_pool:
+                changes.append(f"spawn_pool added:{sorted(new_event.spawn_pool - old_event.spawn_pool)} removed:{sorted(old_event.spawn_pool - new_event.spawn_pool)}")
+            lines.append(f"changed event {new_event.name} ({new_event.etype}) {' '.join(changes)}")
+        for event in self.removed:
+            lines.append(f"removed event {event.name} ({event.etype}) start:{event.start} end:{event.end}")
+        return lines
+
+
+def _start_order(event):
+    # unknown start first
+    return (event.start_epoch is not None, event.start_epoch or 0.0, event.end_epoch)
+
+
+def _pair_by_start(old_events, new_events):
+    """Pairs (old_event, new_event) of events with same name and type, nearest starts first. Independent of input order."""
+    if not old_events or not new_events:
+        return []
+    distances = []
+    for old_index, old_event in enumerate(old_events):
+        for new_index, new_event in enumerate(new_events):
+            old_time = old_event.start_epoch if old_event.start_epoch is not None else old_event.end_epoch
+            new_time = new_event.start_epoch if new_event.start_epoch is not None else new_event.end_epoch
+            distances.append((abs(new_time - old_time), old_index, new_index))
+    distances.sort()
+    pairs = []
+    paired_old = set()
+    paired_new = set()
+    for _, old_index, new_index in distances:
+        if old_index in paired_old or new_index in paired_new:
+            continue
+        paired_old.add(old_index)
+        paired_new.add(new_index)
+        pairs.append((old_events[old_index], new_events[new_index]))
+    return sorted(pairs, key=lambda pair: _start_order(pair[1]))
+
+
+class EventIndex():
+    """Persistent index of known events, keyed by EventWatcherEvent.key.
+
+    Each update produces an EventChangeset, so consumers only need to handle events which actually changed.
+    Unchanged events keep their object identity across updates.
+    """
+
+    def __init__(self, changeset_history=20):
+        self._events = {}
+        self._sorted_events = []
+        # incremented with each non-empty changeset
+        self.version = 0
+        self.changesets = deque(maxlen=changeset_history)
+
+    def __len__(self):
+        return len(self._events)
+
+    def events(self):
+        """All indexed events, sorted by start time (unknown start last)."""
+        return self._sorted_events
+
+    def update(self, events, now=None):
+        new_events = {}
+        for event in events:
+            new_events[event.key] = event
+        added_keys = new_events.keys() - self._events.keys()
+        removed_keys = self._events.keys() - new_events.keys()
+
+        changed = []
+        merged = {}
+        for key, event in new_events.items():
+            old_event = self._events.get(key)
+            if old_event is None:
+                continue
+            if old_event.same_content(event):
+                merged[key] = old_event
+            else:
+                changed.append((old_event, event))
+                merged[key] = event
+
+        # an event with new start time has a new key: pair it with a removed event of same name and type.
+        # Recurring events (e.g. weekly spotlight hours) share name and type: pair by nearest start, ended events aren't paired
+        now_epoch = datetime_to_epoch(now if now is not None else datetime.now())
+        removed_by_name = {}
+        removed = []
+        for key in sorted(removed_keys, key=lambda key: _start_order(self._events[key])):
+            old_event = self._events[key]
+            if old_event.end_epoch < now_epoch:
+                removed.append(old_event)
+            else:
+                removed_by_name.setdefault((old_event.name, old_event.etype), []).append(old_event)
+        added_by_name = {}
+        for key in sorted(added_keys, key=lambda key: _start_order(new_events[key])):
+            event = new_events[key]
+            added_by_name.setdefault((event.name, event.etype), []).append(event)
+            merged[key] = event
+        added = []
+        for name_key, new_candidates in added_by_name.items():
+            old_candidates = removed_by_name.pop(name_key, [])
+            paired = _pair_by_start(old_candidates, new_candidates)
+            changed += paired
+            paired_ids = {id(event) for pair in paired for event in pair}
+            added += [event for event in new_candidates if id(event) not in paired_ids]
+            removed += [old_event for old_event in old_candidates if id(old_event) not in paired_ids]
+        removed += [old_event for candidates in removed_by_name.values() for old_event in candidates]
+
+        return self._apply(merged, EventChangeset(added, changed, removed, now))
+
+    def remove_ended(self, now):
+        now_epoch = datetime_to_epoch(now)
+        ended_keys = {key for key, event in self._events.items() if event.end_epoch < now_epoch}
+        if not ended_keys:
+            return EventChangeset([], [], [], now)
+        removed = [self._events[key] for key in ended_keys]
+        merged = {key: event for key, event in self._events.items() if key not in ended_keys}
+        return self._apply(merged, EventChangeset([], [], removed, now))
+
+    def _apply(self, merged, changeset):
+        if changeset.is_empty():
+            return changeset
+        self._events = merged
+        self._sorted_events = sorted(merged.values(), key=lambda e: (e.start_epoch is None, e.start_epoch or 0.0))
+        self.version += 1
+        self.changesets.append(changeset)
+        return changeset
@@ -0,0 +1,101 @@
+import hashlib
+import json
+import math
+import threading
+from datetime import datetime
+
+TIME_FORMAT = "%Y-%m-%d %H:%M"
+SORT_COLUMNS = ("name", "type", "start", "end", "has_spawnpoints", "has_quests", "has_pokemon", "bonus_lure_duration")
+
+
+def event_to_row(event, quest_reset):
+    return {
+        "name": event.name,
+        "type": event.etype,
+        "start": event.start.strftime(TIME_FORMAT) if event.start is not None else None,
+        "end": event.end.strftime(TIME_FORMAT),
+        "has_spawnpoints": event.has_spawnpoints,
+        "has_quests": event.has_quests,
+        "has_pokemon": event.has_pokemon,
+        "bonus_lure_duration": event.bonus_lure_duration,
+        "spawn_pool": sorted(event.spawn_pool),
+        "quest_reset": quest_reset
+    }
+
+
+class EventListPage():
+    def __init__(self, rows, total, page, pages):
+        self.rows = rows
+        self.total = total
+        self.page = page
+        self.pages = pages
+
+
+class EventSnapshot():
+    """Serialised event list of one event list generation, incl. cached sort orders."""
+
+    def __init__(self, generation, rows):
+        self.generation = generation
+        self.rows = rows
+        self.generated_at = datetime.now()
+        self.body = json.dumps({
+            "generation": generation,
+            "generated_at": self.generated_at.strftime("%Y-%m-%d %H:%M:%S"),
+            "events": rows
+        }).encode("utf8")
+        self.etag = '"' + hashlib.sha1(self.body).hexdigest() + '"'
+        self._sorted_rows = {}
+        self._lock = threading.Lock()
+
+    def _get_sorted_rows(self, sort, descending):
+        with self._lock:
+            rows = self._sorted_rows.get((sort, descending))
+            if rows is None:
+                # unknown values (e.g. start) are always sorted to the end
+                known_rows = sorted((row for row in self.rows if row[sort] is not None), key=lambda row: row[sort], reverse=descending)
+                rows = known_rows + [row for row in self.rows if row[sort] is None]
+                self._sorted_rows[(sort, descending)] = rows
+            return rows
+
+    def query(self, sort="start", descending=False, search=None, event_type=None, quest_reset_only=False, page=1, per_page=None):
+        """Sorted, filtered and paginated rows. search: case insensitive substring of the event name."""
+        if sort not in SORT_COLUMNS:
+            sort = "start"
+        rows = self._get_sorted_rows(sort, descending)
+        if quest_reset_only:
+            rows = [row for row in rows if row["quest_reset"]]
+        if search:
+            search = search.lower()
+            rows = [row for row in rows if search in row["name"].lower()]
+        if event_type:
+            rows = [row for row in rows if row["type"] == event_type]
+        total = len(rows)
+        if not per_page:
+            return EventListPage(rows, total, 1, 1)
+        pages = max(1, math.ceil(total / per_page))
+        page = min(max(1, page), pages)
+        return EventListPage(rows[(page - 1) * per_page:page * per_page], total, page, pages)
+
+    def types(self):
+        return sorted({row["type"] for row in self.rows})
+
+
+class EventSnapshotCache():
+    """Keep a serialised snapshot of the event list, rebuilt lazily after invalidate()."""
+
+    def __init__(self, build_rows):
+        # build_rows() returns the list of event rows (see event_to_row)
+        self._build_rows = build_rows
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._snapshot = None
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+
+    def get(self):
+        with self._lock:
+            if self._snapshot is None or self._snapshot.generation != self._generation:
+                self._snapshot = EventSnapshot(self._generation, self._build_rows())
+            return self._snapshot
@@ -0,0 +1,117 @@
+import os
+import json
+import time
+import requests
+
+
+class FeedResult():
+    def __init__(self, payload, status, changed, age_in_s=None, size_in_bytes=None):
+        # decoded json payload or None, if neither network nor snapshot is available
+        self.payload = payload
+        # 'modified', 'not_modified', 'stale' or 'unavailable'
+        self.status = status
+        # True, if payload differs from the last payload returned to the caller
+        self.changed = changed
+        # age of the payload in seconds (time since last successful download)
+        self.age_in_s = age_in_s
+        # size of the downloaded feed, None if nothing was downloaded
+        self.size_in_bytes = size_in_bytes
+
+    def __repr__(self):
+        return f"status:{self.status} changed:{self.changed} age_in_s:{self.age_in_s} size_in_bytes:{self.size_in_bytes}"
+
+
+class FeedCache():
+    """Conditional download of a json feed with a persistent snapshot of the last good payload.
+
+    The snapshot is stored together with its HTTP validators (ETag / Last-Modified), so a restart
+    can serve the last known payload immediately and later requests can be answered with 304.
+    If the feed can't be downloaded, the snapshot is returned as stale payload.
+    """
+
+    def __init__(self, url, cache_dir, name="events", timeout=10, logger=None):
+        self.url = url
+        self.timeout = timeout
+        self._logger = logger
+        self._session = requests.Session()
+        self._payload_path = os.path.join(cache_dir, f"{name}.json")
+        self._meta_path = os.path.join(cache_dir, f"{name}.meta.json")
+        os.makedirs(cache_dir, exist_ok=True)
+        self._payload = None
+        self._meta = {}
+
+    def _log(self, level, msg):
+        if self._logger is not None:
+            getattr(self._logger, level)(f"EventWatcher: {msg}")
+
+    def _age_in_s(self):
+        fetched_at = self._meta.get("fetched_at")
+        if fetched_at is None:
+            return None
+        return int(time.time() - fetched_at)
+
+    def _write_atomic(self, path, data):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _store_snapshot(self, content):
+        self._write_atomic(self._payload_path, content)
+        self._write_atomic(self._meta_path, json.dumps(self._meta).encode("utf8"))
+
+    def load_snapshot(self):
+        """Load last good payload from disk. Returns FeedResult with status 'stale' or 'unavailable'."""
+        try:
+            with open(self._meta_path) as f:
+                meta = json.load(f)
+            with open(self._payload_path, "rb") as f:
+                payload = json.loads(f.read().decode("utf8"))
+        except FileNotFoundError:
+            return FeedResult(None, "unavailable", False)
+        except Exception as e:
+            self._log("warning", f"unable to load feed snapshot {self._payload_path}: {e}")
+            return FeedResult(None, "unavailable", False)
+        # snapshot from another url is not valid for this feed
+        if meta.get("url") != self.url:
+            return FeedResult(None, "unavailable", False)
+        self._meta = meta
+        self._payload = payload
+        return FeedResult(payload, "stale", True, self._age_in_s())
+
+    def fetch(self):
+        """Revalidate the feed. Never raises, falls back to the last good payload."""
+        headers = {}
+        if self._payload is not None:
+            if self._meta.get("etag"):
+                headers["If-None-Match"] = self._meta["etag"]
+            if self._meta.get("last_modified"):
+                headers["If-Modified-Since"] = self._meta["last_modified"]
+        try:
+            response = self._session.get(self.url, headers=headers, timeout=self.timeout)
+            if response.status_code == 304 and self._payload is not None:
+                self._meta["fetched_at"] = time.time()
+                self._write_atomic(self._meta_path, json.dumps(self._meta).encode("utf8"))
+                return FeedResult(self._payload, "not_modified", False, 0)
+            response.raise_for_status()
+            payload = json.loads(response.content.decode("utf8"))
+        except Exception as e:
+            if self._payload is None:
+                self._log("error", f"unable to get feed {self.url} and no snapshot available: {e}")
+                return FeedResult(None, "unavailable", False)
+            self._log("warning", f"unable to get feed {self.url}, use snapshot from {self._age_in_s()}s ago: {e}")
+            return FeedResult(self._payload, "stale", False, self._age_in_s())
+
+        changed = payload != self._payload
+        self._payload = payload
+        self._meta = {
+            "url": self.url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched_at": time.time()
+        }
+        try:
+            self._store_snapshot(response.content)
+        except Exception as e:
+            self._log("warning", f"unable to store feed snapshot {self._payload_path}: {e}")
+        return FeedResult(payload, "modified", changed, 0, len(response.content))
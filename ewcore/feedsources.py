@@ -0,0 +1,257 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from .events import EventWatcherEvent
+from .feedcache import FeedCache, FeedResult
+
+SOURCE_SECTION_PREFIX = "source:"
+DEFAULT_SOURCE_NAME = "pogoinfo"
+
+
+def parse_pogoinfo(payload):
+    events = []
+    for raw_event in payload:
+        event = EventWatcherEvent.fromPogoinfo(raw_event)
+        if event is not None:
+            events.append(event)
+    return events
+
+
+def parse_simple(payload):
+    """Events in pogoinfo format, but all fields except name, type and end are optional. Used for manual events."""
+    raw_events = []
+    for raw_event in payload:
+        raw_events.append({
+            "name": raw_event["name"],
+            "type": raw_event["type"],
+            "start": raw_event.get("start"),
+            "end": raw_event["end"],
+            "bonuses": raw_event.get("bonuses", []),
+            "spawns": raw_event.get("spawns", []),
+            "has_spawnpoints": raw_event.get("has_spawnpoints", False),
+            "has_quests": raw_event.get("has_quests", False)
+        })
+    return parse_pogoinfo(raw_events)
+
+
+# feed format -> parser(decoded json payload) returning a list of EventWatcherEvent
+FEED_PARSERS = {
+    "pogoinfo": parse_pogoinfo,
+    "simple": parse_simple
+}
+
+
+def register_parser(feed_format, parser):
+    FEED_PARSERS[feed_format] = parser
+
+
+class FeedSourceConfig():
+    def __init__(self, name, url=None, path=None, feed_format="pogoinfo", priority=0, timeout=10, enabled=True):
+        self.name = name
+        # either url (HTTP feed) or path (local json file) is set
+        self.url = url
+        self.path = path
+        self.feed_format = feed_format
+        # events of sources with higher priority win on duplicates
+        self.priority = priority
+        self.timeout = timeout
+        self.enabled = enabled
+
+    def __repr__(self):
+        return f"{self.name}:{self.url or self.path} format:{self.feed_format} priority:{self.priority}"
+
+
+def parse_source_config(config, default_url, default_timeout):
+    """Read [source:<name>] sections of plugin.ini. The pogoinfo feed is always a source, unless disabled
+    by its own section [source:pogoinfo] with enabled = false."""
+    sources = {DEFAULT_SOURCE_NAME: FeedSourceConfig(DEFAULT_SOURCE_NAME, url=default_url, timeout=default_timeout)}
+    for section in config.sections():
+        if not section.startswith(SOURCE_SECTION_PREFIX):
+            continue
+        name = section[len(SOURCE_SECTION_PREFIX):].strip()
+        default = sources.get(name, FeedSourceConfig(name, timeout=default_timeout))
+        source = FeedSourceConfig(
+            name,
+            url=config.get(section, "url", fallback=None if "file" in config[section] else default.url),
+            path=config.get(section, "file", fallback=None),
+            feed_format=config.get(section, "format", fallback=default.feed_format).strip(),
+            priority=config.getint(section, "priority", fallback=default.priority),
+            timeout=config.getint(section, "timeout", fallback=default.timeout),
+            enabled=config.getboolean(section, "enabled", fallback=True))
+        if source.feed_format not in FEED_PARSERS:
+            raise ValueError(f"unknown format '{source.feed_format}' of event source '{name}'")
+        if (source.url is None) == (source.path is None):
+            raise ValueError(f"event source '{name}' needs either 'url' or 'file'")
+        sources[name] = source
+    return [source for source in sources.values() if source.enabled]
+
+
+class FileFeed():
+    """Local json file as feed, reread only if modified."""
+
+    def __init__(self, path, logger=None):
+        self.path = path
+        self._logger = logger
+        self._payload = None
+        self._mtime = None
+
+    def _log(self, level, msg):
+        if self._logger is not None:
+            getattr(self._logger, level)(f"EventWatcher: {msg}")
+
+    def load_snapshot(self):
+        return self.fetch()
+
+    def fetch(self):
+        try:
+            mtime = os.stat(self.path).st_mtime
+            if self._payload is not None and mtime == self._mtime:
+                return FeedResult(self._payload, "not_modified", False, 0)
+            with open(self.path, "rb") as f:
+                content = f.read()
+            payload = json.loads(content.decode("utf8"))
+        except FileNotFoundError:
+            self._payload = None
+            self._mtime = None
+            return FeedResult(None, "unavailable", False)
+        except Exception as e:
+            self._log("warning", f"unable to read event file {self.path}: {e}")
+            return FeedResult(self._payload, "stale" if self._payload is not None else "unavailable", False)
+        changed = payload != self._payload
+        self._payload = payload
+        self._mtime = mtime
+        return FeedResult(payload, "modified", changed, 0, len(content))
+
+
+class MergedFeedResult():
+    def __init__(self, events, changed, source_results):
+        # merged events of all sources or None, if no source has a payload
+        self.events = events
+        # True, if events of at least one source changed since last result
+        self.changed = changed
+        # source name -> latest FeedResult
+        self.source_results = source_results
+
+    @property
+    def status(self):
+        statuses = {result.status for result in self.source_results.values()}
+        if self.changed:
+            return "modified"
+        if statuses & {"modified", "not_modified"}:
+            return "not_modified"
+        if self.events is not None:
+            return "stale"
+        return "unavailable"
+
+    def __repr__(self):
+        sources = " ".join(f"{name}:[{result}]" for name, result in self.source_results.items())
+        return f"status:{self.status} changed:{self.changed} events:{len(self.events) if self.events is not None else None} {sources}"
+
+
+class MultiSourceFeed():
+    """Fetch several event feeds in parallel and merge their events.
+
+    fetch() returns as soon as the first source delivered a fresh result plus grace_in_s for the other
+    sources. Slower sources keep running in background, their result is used by the next fetch().
+    Events of all sources are merged by source priority and deduplicated by name, type and start.
+    """
+
+    def __init__(self, source_configs, cache_dir, base_dir, logger=None, grace_in_s=2):
+        self._logger = logger
+        self.grace_in_s = grace_in_s
+        self._sources = sorted(source_configs, key=lambda source: -source.priority)
+        self._feeds = {}
+        for source in self._sources:
+            if source.url is not None:
+                # default source keeps the snapshot name of the single feed
+                cache_name = "events" if source.name == DEFAULT_SOURCE_NAME else f"events_{source.name}"
+                self._feeds[source.name] = FeedCache(source.url, cache_dir, name=cache_name, timeout=source.timeout, logger=logger)
+            else:
+                self._feeds[source.name] = FileFeed(os.path.join(base_dir, source.path), logger)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, len(self._sources)), thread_name_prefix="EventWatcher feed")
+        self._lock = threading.Lock()
+        self._running = {}
+        self._results = {}
+        self._events = {}
+        self._changed = False
+
+    def _log(self, level, msg):
+        if self._logger is not None:
+            getattr(self._logger, level)(f"EventWatcher: {msg}")
+
+    @property
+    def sources(self):
+        return list(self._sources)
+
+    def close(self):
+        # running fetches are finished in background
+        self._executor.shutdown(wait=False)
+
+    def _store(self, source, result):
+        events = None
+        if result.payload is not None and (result.changed or source.name not in self._events):
+            try:
+                events = FEED_PARSERS[source.feed_format](result.payload)
+            except Exception as e:
+                self._log("error", f"unable to parse events of source {source.name}: {e}")
+        with self._lock:
+            self._results[source.name] = result
+            if events is not None:
+                self._events[source.name] = events
+                self._changed = True
+            elif result.payload is None and self._events.pop(source.name, None) is not None:
+                # e.g. manual event file removed
+                self._changed = True
+
+    def _fetch_source(self, source):
+        try:
+            result = self._feeds[source.name].fetch()
+        except Exception as e:
+            self._log("error", f"unable to fetch event source {source.name}: {e}")
+            result = FeedResult(None, "unavailable", False)
+        self._store(source, result)
+        return result
+
+    def _merge(self):
+        with self._lock:
+            changed = self._changed
+            self._changed = False
+            if not self._events:
+                return MergedFeedResult(None, changed, dict(self._results))
+            merged = {}
+            for source in self._sources:
+                for event in self._events.get(source.name, []):
+                    merged.setdefault((event.name.casefold(), event.etype, event.start_epoch), event)
+            return MergedFeedResult(list(merged.values()), changed, dict(self._results))
+
+    def load_snapshot(self):
+        for source in self._sources:
+            try:
+                self._store(source, self._feeds[source.name].load_snapshot())
+            except Exception as e:
+                self._log("warning", f"unable to load snapshot of event source {source.name}: {e}")
+        return self._merge()
+
+    def fetch(self):
+        pending = set()
+        for source in self._sources:
+            future = self._running.get(source.name)
+            # source still busy with the previous fetch: wait for that one
+            if future is None or future.done():
+                future = self._executor.submit(self._fetch_source, source)
+                self._running[source.name] = future
+            pending.add(future)
+        deadline = None
+        while pending:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            if deadline is None and any(future.result().status in ("modified", "not_modified") for future in done):
+                deadline = time.monotonic() + self.grace_in_s
+        if pending:
+            self._log("info", f"{len(pending)} event sources still loading, their result is used with next event check")
+        return self._merge()
@@ -0,0 +1,27 @@
+import os
+
+
+class FileWatcher():
+    """Detect changes of files by modification time and size."""
+
+    def __init__(self, paths):
+        self.paths = list(paths)
+        self._stats = {path: self._stat(path) for path in self.paths}
+
+    @staticmethod
+    def _stat(path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def changed(self):
+        """Files changed (incl. created or removed) since last call."""
+        changed_paths = []
+        for path in self.paths:
+            stat = self._stat(path)
+            if stat != self._stats[path]:
+                self._stats[path] = stat
+                changed_paths.append(path)
+        return changed_paths
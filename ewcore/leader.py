@@ -0,0 +1,135 @@
+import json
+import threading
+import time
+
+LEASE_TABLE = "eventwatcher_lease"
+
+
+class LeaderElection():
+    """Leader election of several plugin instances sharing one MAD database, by a lease row with heartbeat.
+
+    - the leader extends its lease every lease_duration_in_s / 3 in a background thread, so long resets
+      don't delay the heartbeat
+    - another instance takes over, if the lease wasn't extended until it expired: failover within
+      lease_duration_in_s + renew interval
+    - the leader stops acting as leader on its own, if it couldn't extend its lease within 2/3 of the lease
+      duration, so two instances never act as leader at the same time (with clock differences below 1/3)
+    - lease times are epoch seconds of the instances, so their clocks must be synchronized (NTP)
+    - the leader can publish a small json document (e.g. reset watermarks) for the next leader
+    db_wrapper is MAD's db wrapper, which returns None for failed queries.
+    """
+
+    def __init__(self, db_wrapper, instance_id, logger=None, lease_name="eventwatcher", lease_duration_in_s=60, on_change=None):
+        self._db = db_wrapper
+        self.instance_id = instance_id
+        self._logger = logger
+        self.lease_name = lease_name
+        self.lease_duration_in_s = lease_duration_in_s
+        # called with True/False in the heartbeat thread, if this instance becomes leader or loses leadership
+        self._on_change = on_change
+        self._valid_until = 0.0
+        self._leader = False
+        self.holder = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _log(self, level, msg):
+        if self._logger is not None:
+            getattr(self._logger, level)(f"EventWatcher: {msg}")
+
+    @property
+    def renew_interval_in_s(self):
+        return self.lease_duration_in_s / 3
+
+    def ensure_table(self):
+        self._db.execute(f"CREATE TABLE IF NOT EXISTS {LEASE_TABLE} (lease_name VARCHAR(64) NOT NULL, holder VARCHAR(128) NOT NULL, "
+                         "expires_at DOUBLE NOT NULL, data TEXT NULL, PRIMARY KEY (lease_name))", commit=True)
+
+    def _get_lease(self):
+        rows = self._db.execute(f"SELECT holder, expires_at, data FROM {LEASE_TABLE} WHERE lease_name = %s", args=(self.lease_name,))
+        return rows[0] if rows else None
+
+    def _try_acquire(self, now):
+        # extend own lease or take over an expired lease of another instance
+        rows = self._db.execute(f"UPDATE {LEASE_TABLE} SET holder = %s, expires_at = %s WHERE lease_name = %s AND (holder = %s OR expires_at < %s)",
+                                args=(self.instance_id, now + self.lease_duration_in_s, self.lease_name, self.instance_id, now), commit=True)
+        if rows:
+            return True, self.instance_id
+        rows = self._db.execute(f"SELECT holder FROM {LEASE_TABLE} WHERE lease_name = %s", args=(self.lease_name,))
+        if rows is None:
+            # database not available: leader unknown
+            return False, None
+        if rows:
+            return False, rows[0][0]
+        # first start: no lease yet. If several instances insert at the same time, only one insert succeeds
+        rows = self._db.execute(f"INSERT INTO {LEASE_TABLE} (lease_name, holder, expires_at) VALUES (%s, %s, %s)",
+                                args=(self.lease_name, self.instance_id, now + self.lease_duration_in_s), commit=True)
+        return bool(rows), self.instance_id if rows else None
+
+    def renew(self):
+        """Acquire or extend the lease. Returns True, if this instance is leader."""
+        now = time.time()
+        try:
+            acquired, holder = self._try_acquire(now)
+        except Exception as e:
+            self._log("error", f"Error while renewing leader lease: {e}")
+            acquired, holder = False, self.holder
+        if acquired:
+            self._valid_until = now + self.lease_duration_in_s - self.renew_interval_in_s
+        self.holder = holder
+        self._set_leader(self.is_leader())
+        return self._leader
+
+    def _set_leader(self, leader):
+        if leader == self._leader:
+            return
+        self._leader = leader
+        if leader:
+            self._log("success", f"instance {self.instance_id} is leader now")
+        else:
+            self._log("warning", f"instance {self.instance_id} isn't leader anymore, leader: {self.holder}")
+        if self._on_change is not None:
+            self._on_change(leader)
+
+    def is_leader(self):
+        return time.time() < self._valid_until
+
+    def publish(self, data):
+        """Store data with the lease, only while this instance holds the lease."""
+        self._db.execute(f"UPDATE {LEASE_TABLE} SET data = %s WHERE lease_name = %s AND holder = %s",
+                         args=(json.dumps(data), self.lease_name, self.instance_id), commit=True)
+
+    def get_data(self):
+        """Data published by the current or a previous leader or None."""
+        lease = self._get_lease()
+        if lease is None or lease[2] is None:
+            return None
+        try:
+            return json.loads(lease[2])
+        except ValueError:
+            return None
+
+    def start(self):
+        self.ensure_table()
+        self.renew()
+        self._stop.clear()
+        self._thread = threading.Thread(name="EventWatcher lease", target=self._heartbeat)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _heartbeat(self):
+        while not self._stop.wait(self.renew_interval_in_s):
+            self.renew()
+
+    def stop(self, release=True):
+        """Stop heartbeat. release: let other instances take over immediately instead of waiting for lease expiry."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if release and self._leader:
+            self._db.execute(f"UPDATE {LEASE_TABLE} SET expires_at = 0 WHERE lease_name = %s AND holder = %s",
+                             args=(self.lease_name, self.instance_id), commit=True)
+        self._valid_until = 0.0
+        self.holder = None
+        self._set_leader(False)
@@ -0,0 +1,81 @@
+import json
+from string import Template
+
+# message templates and their placeholders
+TEMPLATE_PLACEHOLDERS = {
+    "tg_questreset_tmpl": {"event_trigger", "event_name", "rescan_str"},
+    "tg_questreset_multi_tmpl": {"event_list", "rescan_str"},
+    "dc_questreset_tmpl": {"event_trigger", "event_name"},
+    "dc_questreset_multi_tmpl": {"event_list"},
+    "tg_status_tmpl": {"current_events", "upcoming_events", "last_resets", "rescan_progress"},
+    "tg_status_event_tmpl": {"event_name", "event_type", "event_start", "event_end"},
+    "tg_status_reset_tmpl": {"reset_time", "reset_type", "event_list"},
+    "tg_status_rescan_tmpl": {"reset_type", "percent", "throughput", "eta"}
+}
+REQUIRED_KEYS = ("start", "end", "tg_questreset_tmpl", "tg_questrescan_before", "tg_questrescan_during", "tg_questrescan_after",
+                 "dc_questreset_tmpl", "dc_webhook_embedTitle")
+# other strings missing in a language are taken from this language
+FALLBACK_LANGUAGE = "en"
+
+
+class LocaleError(ValueError):
+    pass
+
+
+def _get_placeholders(key, template):
+    placeholders = set()
+    for match in template.pattern.finditer(template.template):
+        if match.group("invalid") is not None:
+            raise LocaleError(f"invalid placeholder in '{key}' at position {match.start('invalid')}")
+        placeholder = match.group("named") or match.group("braced")
+        if placeholder is not None:
+            placeholders.add(placeholder)
+    return placeholders
+
+
+class Locales():
+    """Strings of one language. Message templates are compiled and checked once, when the locales are loaded."""
+
+    def __init__(self, strings, language):
+        # strings: key -> {language: text}
+        self.language = language
+        self._texts = {}
+        self._templates = {}
+        for key, translations in strings.items():
+            if not isinstance(translations, dict):
+                continue
+            text = translations.get(language)
+            if text is None and key not in REQUIRED_KEYS:
+                text = translations.get(FALLBACK_LANGUAGE)
+            if not isinstance(text, str):
+                continue
+            if key in TEMPLATE_PLACEHOLDERS:
+                template = Template(text)
+                unknown_placeholders = _get_placeholders(key, template) - TEMPLATE_PLACEHOLDERS[key]
+                if unknown_placeholders:
+                    raise LocaleError(f"unknown placeholders in '{key}': {', '.join(sorted(unknown_placeholders))}")
+                self._templates[key] = template
+            self._texts[key] = text
+        missing_keys = [key for key in REQUIRED_KEYS if key not in self._texts]
+        if missing_keys:
+            raise LocaleError(f"missing strings for language '{language}': {', '.join(missing_keys)}")
+
+    @classmethod
+    def load(cls, default_path, custom_path, language):
+        """Strings of default_path, overridden by custom_path, if it exists."""
+        with open(default_path) as f:
+            strings = json.load(f)
+        if custom_path is not None:
+            try:
+                with open(custom_path) as f:
+                    strings.update(json.load(f))
+            except FileNotFoundError:
+                pass
+        return cls(strings, language)
+
+    def text(self, key):
+        return self._texts[key]
+
+    def render(self, key, **values):
+        # placeholders are checked on load, so every placeholder is replaced
+        return self._templates[key].substitute(**values)
@@ -0,0 +1,110 @@
+import requests
+
+from .questareas import QuestAreaScope
+
+POGO_PACKAGE = "com.nianticlabs.pokemongo"
+
+
+class MadAdapterService():
+    """MAD functions needed by a standalone EventWatcher daemon, which can't be done with database access only.
+
+    Used by the adapter routes of the plugin in standalone mode, the daemon calls them with MadHttpClient.
+    """
+
+    def __init__(self, mapping_manager, ws_server, db_wrapper, logger=None):
+        self._mapping_manager = mapping_manager
+        self._ws_server = ws_server
+        self._quest_area_scope = QuestAreaScope(db_wrapper, mapping_manager, logger)
+
+    def update_mapping(self):
+        self._mapping_manager.update()
+
+    def get_origins(self):
+        return list(self._ws_server.get_reg_origins())
+
+    def restart_app(self, origin, package_name=POGO_PACKAGE):
+        communicator = self._ws_server.get_origin_communicator(origin)
+        if communicator is None:
+            return f"device '{origin}' not connected"
+        return communicator.restart_app(package_name)
+
+    def get_area_stop_ids(self, area_names, refresh=False):
+        if refresh:
+            self._quest_area_scope.invalidate()
+        return self._quest_area_scope.get_stop_ids(area_names)
+
+
+class MadHttpClient():
+    """Client of the adapter routes of the plugin in MADmin. Errors are raised as requests exceptions."""
+
+    def __init__(self, base_url, user=None, password=None, timeout=60):
+        self.base_url = base_url.rstrip("/")
+        self._auth = (user, password) if user else None
+        self.timeout = timeout
+
+    def call(self, route, payload=None):
+        response = requests.post(self.base_url + route, json=payload or {}, auth=self._auth, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+
+class HttpMappingManager():
+    """Stand-in of MAD's mapping manager for EventWatcherCore in the standalone daemon."""
+
+    def __init__(self, client):
+        self._client = client
+
+    def update(self):
+        self._client.call("/ew_adapter/mapping_update")
+
+
+class HttpCommunicator():
+    def __init__(self, client, origin):
+        self._client = client
+        self._origin = origin
+
+    def restart_app(self, package_name):
+        result = self._client.call("/ew_adapter/restart_app", {"origin": self._origin, "package": package_name})
+        return True if result.get("ok") else result.get("result")
+
+
+class HttpWsServer():
+    """Stand-in of MAD's websocket server for EventWatcherCore in the standalone daemon."""
+
+    def __init__(self, client):
+        self._client = client
+
+    def get_reg_origins(self):
+        return self._client.call("/ew_adapter/origins")["origins"]
+
+    def get_origin_communicator(self, origin):
+        return HttpCommunicator(self._client, origin)
+
+
+class HttpQuestAreaScope():
+    """QuestAreaScope of the standalone daemon: geofences are only available inside of MAD, so the plugin computes
+    the pokestops of areas. Results are cached like QuestAreaScope does until invalidate() is called.
+    """
+
+    def __init__(self, client):
+        self._client = client
+        self._stop_ids = {}
+        self._refresh = False
+
+    def invalidate(self):
+        self._stop_ids = {}
+        self._refresh = True
+
+    def get_stop_ids(self, area_names):
+        area_key = frozenset(area_names)
+        if area_key in self._stop_ids:
+            return self._stop_ids[area_key]
+        result = self._client.call("/ew_adapter/area_stops", {"areas": sorted(area_names), "refresh": self._refresh})
+        # the first request after invalidate() drops the cache of the plugin
+        self._refresh = False
+        self._stop_ids[area_key] = result["stop_ids"]
+        return self._stop_ids[area_key]
+
+    def precompute(self, area_name_sets):
+        for area_names in area_name_sets:
+            self.get_stop_ids(area_names)
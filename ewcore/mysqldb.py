@@ -0,0 +1,71 @@
+import threading
+
+import mysql.connector
+
+
+class MySqlDbWrapper():
+    """Subset of MAD's db wrapper interface used by EventWatcherCore, for the standalone daemon.
+
+    Like MAD's db wrapper, failed queries are logged and return None and queries with more than one ';'
+    are sent as multi statement query without result. Every thread uses its own connection.
+    """
+
+    def __init__(self, host, port, user, password, database, logger=None):
+        self._connect_args = dict(host=host, port=port, user=user, password=password, database=database, autocommit=False)
+        self._logger = logger
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or not conn.is_connected():
+            conn = mysql.connector.connect(**self._connect_args)
+            self._local.conn = conn
+        return conn
+
+    def _log_error(self, sql, e):
+        if self._logger is not None:
+            self._logger.error(f"EventWatcher: Failed executing query: {sql}, error: {e}")
+
+    def execute(self, sql, args=None, commit=False, **kwargs):
+        try:
+            conn = self._connection()
+            cursor = conn.cursor()
+            try:
+                if sql.count(";") > 1:
+                    for _ in cursor.execute(sql, multi=True):
+                        pass
+                    conn.commit()
+                    return None
+                cursor.execute(sql, args)
+                if commit:
+                    conn.commit()
+                    return cursor.rowcount
+                return cursor.fetchall() if cursor.with_rows else []
+            finally:
+                cursor.close()
+        except mysql.connector.Error as e:
+            self._rollback()
+            self._log_error(sql, e)
+            return None
+
+    def autofetch_all(self, sql, args=()):
+        try:
+            conn = self._connection()
+            cursor = conn.cursor(dictionary=True)
+            try:
+                cursor.execute(sql, args or ())
+                return cursor.fetchall()
+            finally:
+                cursor.close()
+        except mysql.connector.Error as e:
+            self._rollback()
+            self._log_error(sql, e)
+            return None
+
+    def _rollback(self):
+        conn = getattr(self._local, "conn", None)
+        try:
+            if conn is not None and conn.is_connected():
+                conn.rollback()
+        except mysql.connector.Error:
+            self._local.conn = None
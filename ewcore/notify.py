@@ -0,0 +1,300 @@
+import os
+import json
+import time
+import threading
+import urllib
+import requests
+from urllib.parse import urlparse
+
+TELEGRAM_API_URL = "https://api.telegram.org"
+
+
+class SimpleTelegramApi:
+    def __init__(self, api_token, session=None, timeout=10, api_url=TELEGRAM_API_URL):
+        self._api_url = api_url.rstrip("/")
+        self._base_url = self._get_base_url(api_token)
+        self._session = session if session is not None else requests.Session()
+        self._timeout = timeout
+
+    def _get_base_url(self, api_token):
+        return "{}/bot{}/".format(self._api_url, api_token)
+
+    def _send_request(self, command):
+        request_url = self._base_url + command
+        #print(f"Send_Request:{command}")
+        response = self._session.get(request_url, timeout=self._timeout)
+        decoded_response = response.content.decode("utf8")
+        return decoded_response
+
+    def send_message(self, chat_id, text, parse_mode="HTML"):
+        text = urllib.parse.quote_plus(text)
+        response = self._send_request("sendMessage?text={}&chat_id={}&parse_mode={}".format(text, chat_id, parse_mode))
+        response = json.loads(response)
+        return response
+
+    def edit_message(self, chat_id, message_id, text, parse_mode="HTML"):
+        text = urllib.parse.quote_plus(text)
+        response = self._send_request("editMessageText?chat_id={}&message_id={}&parse_mode={}&text={}".format(chat_id, message_id, parse_mode, text))
+        response = json.loads(response)
+        # if edit a message with same text, you will get 'error_code': 400, 'description': 'Bad Request: message is not modified: specified new message content and reply markup are exactly the same as a current content and reply markup of the message'
+        return response
+
+    def delete_message(self, chat_id, message_id):
+        response = self._send_request("deleteMessage?chat_id={}&message_id={}".format(chat_id, message_id))
+        response = json.loads(response)
+        return response
+
+    def pin_message(self, chat_id, message_id, disable_notification="True"):
+        response = self._send_request("pinChatMessage?chat_id={}&message_id={}&disable_notification={}".format(chat_id, message_id, disable_notification))
+        response = json.loads(response)
+        return response
+
+    def get_message(self):
+        response = self._send_request("getUpdates")
+        response = json.loads(response)
+        return response
+
+
+class NotificationOutbox():
+    """Pending notifications, stored as json file so they survive a MAD restart."""
+
+    def __init__(self, path):
+        self._path = path
+        self._lock = threading.Lock()
+        self._messages = {}
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def load(self):
+        try:
+            with open(self._path) as f:
+                messages = json.load(f)
+        except (FileNotFoundError, ValueError):
+            messages = []
+        with self._lock:
+            self._messages = {message["id"]: message for message in messages}
+            return list(self._messages.values())
+
+    def _write(self):
+        tmp_path = self._path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(list(self._messages.values()), f)
+        os.replace(tmp_path, self._path)
+
+    def put(self, message):
+        with self._lock:
+            self._messages[message["id"]] = message
+            self._write()
+
+    def remove(self, message):
+        with self._lock:
+            if self._messages.pop(message["id"], None) is not None:
+                self._write()
+
+
+class NotificationDispatcher():
+    """Send Telegram and Discord notifications in background worker threads.
+
+    - one keep-alive requests.Session per host, shared by all workers
+    - messages for the same destination (chat id / webhook url) are sent one after another with a minimum
+      interval, a 429 response delays the destination by its retry_after
+    - failed messages are retried with exponential backoff, messages rejected by the API (4xx) are dropped
+    - queued messages are stored in an outbox file until they are delivered
+    """
+
+    # minimum time in seconds between two messages to the same destination
+    MIN_INTERVAL_IN_S = {
+        "telegram": 1.0,
+        "discord": 0.5
+    }
+
+    def __init__(self, outbox_path, logger, telegram_token=None, workers=4, max_attempts=5, timeout=10, retry_backoff_in_s=2, metrics=None,
+                 telegram_api_url=TELEGRAM_API_URL):
+        self._outbox = NotificationOutbox(outbox_path)
+        self._logger = logger
+        self._telegram_token = telegram_token
+        self._telegram_api_url = telegram_api_url
+        self._workers = workers
+        self._max_attempts = max_attempts
+        self._timeout = timeout
+        self._retry_backoff_in_s = retry_backoff_in_s
+        self._sessions = {}
+        self._telegram_api = None
+        self._cond = threading.Condition()
+        self._pending = []
+        self._busy_destinations = set()
+        self._destination_ready_at = {}
+        self._counter = 0
+        self._threads = []
+        self._metrics = metrics
+        if metrics is not None:
+            metrics.counter("notifications_total", "Notification send attempts by result (sent, retry, dropped)", ("channel", "result"))
+            metrics.histogram("notification_send_seconds", "Duration of a notification send attempt", ("channel",))
+            metrics.gauge("notification_success_ratio", "Delivered notifications of all finished notifications", ("channel",))
+
+    def configure(self, telegram_token=None, max_attempts=5, timeout=10, telegram_api_url=TELEGRAM_API_URL):
+        """Change settings of a running dispatcher, queued messages are kept. Number of workers can't be changed."""
+        with self._cond:
+            self._telegram_token = telegram_token
+            self._telegram_api_url = telegram_api_url
+            self._max_attempts = max_attempts
+            self._timeout = timeout
+            self._telegram_api = None
+
+    def _record(self, message, result, send_time_in_s):
+        if self._metrics is None:
+            return
+        channel = message["channel"]
+        counter = self._metrics["notifications_total"]
+        counter.inc(channel=channel, result=result)
+        self._metrics["notification_send_seconds"].observe(send_time_in_s, channel=channel)
+        sent = counter.get(channel=channel, result="sent")
+        dropped = counter.get(channel=channel, result="dropped")
+        if sent + dropped > 0:
+            self._metrics["notification_success_ratio"].set(round(sent / (sent + dropped), 4), channel=channel)
+
+    def _get_session(self, url):
+        host = urlparse(url).netloc
+        with self._cond:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                self._sessions[host] = session
+            return session
+
+    def get_telegram_api(self):
+        if self._telegram_api is None:
+            self._telegram_api = SimpleTelegramApi(self._telegram_token, session=self._get_session(self._telegram_api_url), timeout=self._timeout,
+                                                   api_url=self._telegram_api_url)
+        return self._telegram_api
+
+    def start(self):
+        messages = self._outbox.load()
+        if messages:
+            self._logger.info(f"EventWatcher: {len(messages)} notifications from outbox queued again")
+        with self._cond:
+            pending_ids = {message["id"] for message in self._pending}
+            for message in messages:
+                self._counter = max(self._counter, message["seq"] + 1)
+                if message["id"] not in pending_ids:
+                    self._pending.append(message)
+        for worker_nr in range(self._workers):
+            thread = threading.Thread(name=f"EventWatcher notify {worker_nr}", target=self._worker)
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def enqueue(self, channel, destination, payload):
+        """Queue a message. channel: 'telegram' (payload: {'text': ...}) or 'discord' (payload: webhook json)."""
+        with self._cond:
+            message = {
+                "id": f"{int(time.time() * 1000)}-{self._counter}",
+                "seq": self._counter,
+                "channel": channel,
+                "destination": destination,
+                "payload": payload,
+                "attempts": 0,
+                "not_before": 0
+            }
+            self._counter += 1
+            self._outbox.put(message)
+            self._pending.append(message)
+            self._cond.notify()
+        return message["id"]
+
+    def pending_count(self):
+        with self._cond:
+            return len(self._pending) + len(self._busy_destinations)
+
+    def _destination_key(self, message):
+        return (message["channel"], str(message["destination"]))
+
+    def _take(self):
+        with self._cond:
+            while True:
+                now = time.time()
+                wait_in_s = None
+                for message in sorted(self._pending, key=lambda m: m["seq"]):
+                    key = self._destination_key(message)
+                    if key in self._busy_destinations:
+                        continue
+                    ready_at = max(message["not_before"], self._destination_ready_at.get(key, 0))
+                    if ready_at <= now:
+                        self._pending.remove(message)
+                        self._busy_destinations.add(key)
+                        return message
+                    if wait_in_s is None or ready_at - now < wait_in_s:
+                        wait_in_s = ready_at - now
+                self._cond.wait(wait_in_s)
+
+    def _finish(self, message, ready_at, requeue):
+        with self._cond:
+            key = self._destination_key(message)
+            self._busy_destinations.discard(key)
+            self._destination_ready_at[key] = ready_at
+            if requeue:
+                self._pending.append(message)
+            self._cond.notify_all()
+
+    def _send_telegram(self, message):
+        result = self.get_telegram_api().send_message(message["destination"], message["payload"]["text"])
+        if result.get("ok"):
+            return "ok", None, result
+        if result.get("error_code") == 429:
+            return "retry", result.get("parameters", {}).get("retry_after"), result
+        if 400 <= result.get("error_code", 500) < 500:
+            return "failed", None, result
+        return "retry", None, result
+
+    def _send_discord(self, message):
+        response = self._get_session(message["destination"]).post(message["destination"], json=message["payload"], timeout=self._timeout)
+        if response.status_code < 300:
+            return "ok", None, response.status_code
+        if response.status_code == 429:
+            retry_after = response.headers.get("Retry-After")
+            try:
+                retry_after = json.loads(response.content.decode("utf8")).get("retry_after", retry_after)
+            except ValueError:
+                pass
+            return "retry", float(retry_after) if retry_after is not None else None, response.status_code
+        if response.status_code < 500:
+            return "failed", None, response.status_code
+        return "retry", None, response.status_code
+
+    def _deliver(self, message):
+        try:
+            if message["channel"] == "telegram":
+                return self._send_telegram(message)
+            return self._send_discord(message)
+        except Exception as e:
+            return "retry", None, e
+
+    def _worker(self):
+        while True:
+            message = self._take()
+            send_start = time.monotonic()
+            status, retry_after, result = self._deliver(message)
+            send_time_in_s = time.monotonic() - send_start
+            now = time.time()
+            ready_at = now + self.MIN_INTERVAL_IN_S.get(message["channel"], 1.0)
+            log_str = f"{message['channel']} notification to {message['destination']}"
+            if status == "ok":
+                self._logger.success(f"EventWatcher: sent {log_str} result:{result}")
+                self._record(message, "sent", send_time_in_s)
+                self._outbox.remove(message)
+                self._finish(message, ready_at, False)
+                continue
+            message["attempts"] += 1
+            if status == "failed" or message["attempts"] >= self._max_attempts:
+                self._logger.error(f"EventWatcher: unable to send {log_str}, dropped after {message['attempts']} attempts. result:{result}")
+                self._record(message, "dropped", send_time_in_s)
+                self._outbox.remove(message)
+                self._finish(message, ready_at, False)
+                continue
+            if retry_after is not None:
+                # rate limit of destination: delay all messages to this destination
+                ready_at = max(ready_at, now + float(retry_after))
+            message["not_before"] = now + self._retry_backoff_in_s * (2 ** (message["attempts"] - 1))
+            self._logger.warning(f"EventWatcher: unable to send {log_str}, retry later. result:{result}")
+            self._record(message, "retry", send_time_in_s)
+            self._outbox.put(message)
+            self._finish(message, ready_at, True)
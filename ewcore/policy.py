@@ -0,0 +1,144 @@
+from .events import datetime_to_epoch
+from .rules import RuleEngine, get_legacy_rules, parse_rule_sections
+from .scheduler import ResetBoundary
+
+
+def parse_quest_reset_types(reset_for):
+    """Convert "<eventtype>:start/end <eventtype2>" into {eventtype: ["start", "end"], ...}. Without start/end both are used."""
+    quests_reset_types = {}
+    for etype in reset_for.split(" "):
+        etype = etype.strip()
+        if ":" in etype:
+            split = etype.split(":")
+            etype = split[0]
+            if "start" in split[1]:
+                times = ["start"]
+            elif "end" in split[1]:
+                times = ["end"]
+            else:
+                times = ["start", "end"]
+        else:
+            times = ["start", "end"]
+        quests_reset_types[etype] = times
+    return quests_reset_types
+
+
+def parse_exclude_list(excludes_str):
+    if excludes_str is None:
+        return None
+    return [exclude.strip() for exclude in excludes_str.split(',')]
+
+
+def get_spawn_pool_change(pokemon_events, boundary_times, boundary_events=()):
+    """Species joining or leaving the spawn pool at any of boundary_times. None: unknown spawn pool of a changing event.
+
+    boundary_events: events of the boundaries, held since the boundary was due. A feed refresh may have removed them
+    from pokemon_events already (e.g. ended events of a debounced reset).
+    """
+    known_keys = {event.key for event in pokemon_events}
+    pokemon_events = list(pokemon_events) + [event for event in boundary_events if event.key not in known_keys]
+    spawn_pool_change = set()
+    for boundary_time in boundary_times:
+        pool_before = set()
+        pool_after = set()
+        for event in pokemon_events:
+            if (event.start == boundary_time or event.end == boundary_time) and not event.spawn_pool:
+                return None
+            if event.is_active_before(boundary_time):
+                pool_before |= event.spawn_pool
+            if event.is_active_after(boundary_time):
+                pool_after |= event.spawn_pool
+        spawn_pool_change |= pool_before ^ pool_after
+    return spawn_pool_change
+
+
+class ResetPolicy():
+    """Decide which events are used and which event starts/ends cause pokemon or quest resets.
+
+    The actions of an event are decided by the RuleEngine: rules of sections [rule:<name>] first, followed by rules
+    equivalent to reset_quests_event_type and reset_quests_exclude_events. reset_pokemon_enable and reset_quests_enable
+    still enable resets at all.
+    Contains no MAD access, so the plugin and the timeline simulator share the same decisions.
+    """
+
+    def __init__(self, reset_pokemon_enable=False, reset_quests_enable=False, quests_reset_types=None, quests_reset_excludes=None,
+                 max_event_duration_in_days=999, rules=()):
+        self.reset_pokemon_enable = reset_pokemon_enable
+        self.reset_quests_enable = reset_quests_enable
+        # event type -> list of "start" and/or "end"
+        self.quests_reset_types = quests_reset_types if quests_reset_types is not None else {"event": ["start", "end"]}
+        # event name phrases excluded from quest resets or None
+        self.quests_reset_excludes = quests_reset_excludes
+        self.max_event_duration_in_days = max_event_duration_in_days
+        self.rules = RuleEngine(list(rules) + get_legacy_rules(self.quests_reset_types, self.quests_reset_excludes))
+
+    @classmethod
+    def from_config(cls, config, section="plugin", with_rules=True):
+        """with_rules: use sections [rule:<name>]. Raises RuleError for invalid rules."""
+        return cls(
+            reset_pokemon_enable=config.getboolean(section, "reset_pokemon_enable", fallback=False),
+            reset_quests_enable=config.getboolean(section, "reset_quests_enable", fallback=False),
+            quests_reset_types=parse_quest_reset_types(config.get(section, "reset_quests_event_type", fallback="event")),
+            quests_reset_excludes=parse_exclude_list(config.get(section, "reset_quests_exclude_events", fallback=None)),
+            max_event_duration_in_days=config.getint(section, "max_event_duration", fallback=999),
+            rules=parse_rule_sections(config) if with_rules else ())
+
+    def decide(self, event):
+        return self.rules.decide(event)
+
+    def filter_events(self, events, now):
+        """Split feed events into (active, ended, too_long). too_long: season workaround, duration exceeds max_event_duration."""
+        active = []
+        ended = []
+        too_long = []
+        now_epoch = datetime_to_epoch(now)
+        max_duration_in_s = self.max_event_duration_in_days * 24 * 3600
+        for event in events:
+            # unknown start: duration from now
+            start_epoch = event.start_epoch if event.start_epoch is not None else now_epoch
+            if event.end_epoch - start_epoch > max_duration_in_s:
+                too_long.append(event)
+            elif event.end_epoch < now_epoch:
+                ended.append(event)
+            else:
+                active.append(event)
+        return active, ended, too_long
+
+    def is_quest_event(self, event):
+        return bool(self.decide(event).quest_reset)
+
+    def is_pokemon_event(self, event):
+        return self.decide(event).pokemon_reset is not None
+
+    def get_pokemon_strategy(self, events, default_strategy):
+        """Pokemon reset strategy of a reset for events. Different strategies of the events use default_strategy."""
+        strategies = {self.decide(event).pokemon_reset for event in events} - {None}
+        strategy = strategies.pop() if len(strategies) == 1 else "default"
+        return default_strategy if strategy == "default" else strategy
+
+    def get_notify_targets(self, events):
+        targets = set()
+        for event in events:
+            targets |= self.decide(event).notify
+        return targets
+
+    def get_reset_boundaries(self, events, last_reset_checks):
+        """Reset boundaries of events after last_reset_checks ({"pokemon": datetime, "quest": datetime})."""
+        boundaries = []
+        if self.reset_pokemon_enable:
+            for event in events:
+                if not self.is_pokemon_event(event):
+                    continue
+                #handle unknown start
+                if event.start is not None:
+                    boundaries.append(ResetBoundary(event.start, "pokemon", "start", event))
+                boundaries.append(ResetBoundary(event.end, "pokemon", "end", event))
+        if self.reset_quests_enable:
+            for event in events:
+                reset_times = self.decide(event).quest_reset
+                if "start" in reset_times and event.start is not None:
+                    boundaries.append(ResetBoundary(event.start, "quest", "start", event))
+                if "end" in reset_times:
+                    boundaries.append(ResetBoundary(event.end, "quest", "end", event))
+        # boundaries until last check are already handled
+        return [boundary for boundary in boundaries if boundary.time > last_reset_checks[boundary.reset_type]]
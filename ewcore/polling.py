@@ -0,0 +1,46 @@
+import bisect
+
+# lower bound of feed_poll_min and sleep in seconds, like the fixed loop interval of former versions
+MIN_POLL_INTERVAL_IN_S = 60
+
+
+def get_boundary_times(events):
+    """Sorted starts and ends of events."""
+    return sorted({boundary_time for event in events for boundary_time in (event.start, event.end) if boundary_time is not None})
+
+
+class AdaptivePollPolicy():
+    """Interval between two event feed checks, depending on the known event timeline.
+
+    - within window before and after an event start/end the feed is checked every min_interval, so last-minute
+      time corrections reach MAD early
+    - otherwise the interval is doubled after every check without event changes, up to max_interval
+    - changed events start again with min_interval
+    - a long interval ends at the latest, when the window of the next start/end begins
+    """
+
+    def __init__(self, min_interval, max_interval, window):
+        # timedeltas
+        if min_interval.total_seconds() <= 0:
+            raise ValueError(f"minimum feed check interval has to be positive: {min_interval}")
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.window = window
+        self.interval = min_interval
+
+    def is_near_boundary(self, boundary_times, now):
+        pos = bisect.bisect_left(boundary_times, now - self.window)
+        return pos < len(boundary_times) and boundary_times[pos] <= now + self.window
+
+    def next_interval(self, boundary_times, now, changed=False):
+        """Interval until the next feed check. boundary_times: sorted datetimes, e.g. of get_boundary_times()."""
+        if changed or self.is_near_boundary(boundary_times, now):
+            interval = self.min_interval
+        else:
+            interval = min(self.interval * 2, self.max_interval)
+        # don't sleep into the window of the next start/end
+        pos = bisect.bisect_right(boundary_times, now + self.window)
+        if pos < len(boundary_times):
+            interval = min(interval, max(boundary_times[pos] - self.window - now, self.min_interval))
+        self.interval = max(self.min_interval, min(interval, self.max_interval))
+        return self.interval
@@ -0,0 +1,95 @@
+import re
+
+
+class QuestAreaRule():
+    def __init__(self, event_type, name_pattern, area_names):
+        self.event_type = event_type
+        self.name_pattern = name_pattern
+        # None: reset quests of all pokestops
+        self.area_names = area_names
+
+    def matches(self, event):
+        if self.name_pattern is not None:
+            return self.name_pattern.search(event.name) is not None
+        return event.etype == self.event_type
+
+
+def parse_area_names(area_names_str):
+    """Convert comma separated area names into a tuple. 'all' or empty string means all pokestops (None)."""
+    area_names = tuple(name.strip() for name in area_names_str.split(",") if name.strip())
+    if not area_names or "all" in area_names:
+        return None
+    return area_names
+
+
+def parse_area_rules(area_map_str):
+    """Parse reset_quests_area_map: one '<event type> = <areas>' or 'name:<regex> = <areas>' per line."""
+    rules = []
+    for line in area_map_str.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if "=" not in line:
+            raise ValueError(f"missing '=' in line '{line}'")
+        matcher, area_names_str = [part.strip() for part in line.split("=", 1)]
+        if matcher.startswith("name:"):
+            rules.append(QuestAreaRule(None, re.compile(matcher[5:].strip(), re.IGNORECASE), parse_area_names(area_names_str)))
+        else:
+            rules.append(QuestAreaRule(matcher, None, parse_area_names(area_names_str)))
+    return rules
+
+
+class QuestAreaScope():
+    """Pokestops inside of MAD areas (geofences), used to reset quests only in affected areas.
+
+    The pokestop to area membership is expensive (all pokestops against all geofences), so it's cached
+    until invalidate() is called, e.g. after changed area configuration or when the cache is outdated.
+    """
+
+    def __init__(self, db_wrapper, mapping_manager, logger=None):
+        self._db = db_wrapper
+        self._mapping_manager = mapping_manager
+        self._logger = logger
+        self._stop_ids = {}
+
+    def _log(self, level, msg):
+        if self._logger is not None:
+            getattr(self._logger, level)(f"EventWatcher: {msg}")
+
+    def invalidate(self):
+        self._stop_ids = {}
+
+    def _get_geofence_helpers(self, area_names):
+        geofence_helpers = []
+        found_area_names = set()
+        for area_id in self._mapping_manager.get_all_routemanager_names():
+            area_name = self._mapping_manager.routemanager_get_name(area_id)
+            if area_name in area_names:
+                geofence_helper = self._mapping_manager.routemanager_get_geofence_helper(area_id)
+                if geofence_helper is not None:
+                    geofence_helpers.append(geofence_helper)
+                    found_area_names.add(area_name)
+        for area_name in set(area_names) - found_area_names:
+            self._log("warning", f"quest reset area '{area_name}' is not a MAD area -> ignored")
+        return geofence_helpers
+
+    def get_stop_ids(self, area_names):
+        area_key = frozenset(area_names)
+        if area_key in self._stop_ids:
+            return self._stop_ids[area_key]
+        geofence_helpers = self._get_geofence_helpers(area_names)
+        stops = self._db.autofetch_all("SELECT pokestop_id, latitude, longitude FROM pokestop")
+        stop_ids = []
+        for stop in stops:
+            coordinate = [stop["latitude"], stop["longitude"]]
+            for geofence_helper in geofence_helpers:
+                if geofence_helper.is_coord_inside_include_geofence(coordinate):
+                    stop_ids.append(stop["pokestop_id"])
+                    break
+        self._log("info", f"{len(stop_ids)} of {len(stops)} pokestops are inside of quest reset areas {', '.join(sorted(area_names))}")
+        self._stop_ids[area_key] = stop_ids
+        return stop_ids
+
+    def precompute(self, area_name_sets):
+        for area_names in area_name_sets:
+            self.get_stop_ids(area_names)
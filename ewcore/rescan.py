@@ -0,0 +1,175 @@
+import time
+from datetime import datetime, timedelta
+
+# number of latest samples used for the refill throughput
+THROUGHPUT_SAMPLES = 10
+# pokestop ids per COUNT query of quests of quest reset areas
+STOP_IDS_CHUNK_SIZE = 1000
+
+
+class RescanProgress():
+    """Refill of one table after a reset: progress = (count - baseline) / target."""
+
+    def __init__(self, reset_type, started, reset_utc, baseline, target, stop_ids=None):
+        self.reset_type = reset_type
+        self.started = started
+        # reset time in UTC: pokemon scanned after it count as refilled
+        self.reset_utc = reset_utc
+        # pokestops of the quest reset areas, None: all pokestops
+        self.stop_ids = stop_ids
+        self.baseline = baseline
+        self.target = target
+        # (epoch, count)
+        self.samples = []
+        self.finished = None
+
+    @property
+    def refilled(self):
+        return max(0, self.samples[-1][1] - self.baseline) if self.samples else 0
+
+    @property
+    def percent(self):
+        return min(100.0, 100.0 * self.refilled / self.target) if self.target > 0 else 100.0
+
+    def throughput_per_min(self):
+        """Rows per minute, least squares slope of the latest samples. None with less than two samples."""
+        samples = self.samples[-THROUGHPUT_SAMPLES:]
+        if len(samples) < 2:
+            return None
+        mean_t = sum(t for t, _ in samples) / len(samples)
+        mean_c = sum(c for _, c in samples) / len(samples)
+        variance = sum((t - mean_t) ** 2 for t, _ in samples)
+        if variance == 0:
+            return None
+        slope = sum((t - mean_t) * (c - mean_c) for t, c in samples) / variance
+        return max(0.0, slope * 60)
+
+    def eta(self):
+        """Estimated end of the refill or None, if MAD doesn't refill (e.g. outside of the quest scan time window)."""
+        if self.finished is not None:
+            return self.finished
+        throughput = self.throughput_per_min()
+        if not throughput:
+            return None
+        remaining = max(0, self.target - self.refilled)
+        return datetime.fromtimestamp(self.samples[-1][0]) + timedelta(minutes=remaining / throughput)
+
+    def to_dict(self):
+        throughput = self.throughput_per_min()
+        eta = self.eta()
+        return {
+            "reset_type": self.reset_type,
+            "started": self.started.strftime("%Y-%m-%d %H:%M:%S"),
+            "target": self.target,
+            "refilled": self.refilled,
+            "percent": round(self.percent, 1),
+            "throughput_per_min": round(throughput, 1) if throughput is not None else None,
+            "eta": eta.strftime("%Y-%m-%d %H:%M:%S") if eta is not None else None,
+            "finished": self.finished.strftime("%Y-%m-%d %H:%M:%S") if self.finished is not None else None
+        }
+
+
+class RescanTracker():
+    """How fast MAD refills trs_quest and pokemon after a reset, sampled every sample_interval_in_s.
+
+    Each sample counts the refilled rows only:
+    - quest: quests of the pokestops in scope of the reset. Reset of all pokestops: all rows of trs_quest, which only
+      contains refilled quests after the reset. Reset of areas: quests of the area's pokestops by primary key, one COUNT
+      query per STOP_IDS_CHUNK_SIZE pokestops. Target: quests of these pokestops before the reset, so pokestops without
+      quests don't count
+    - pokemon: pokemon scanned since the reset, one COUNT query on an index range (last_modified). Target: pokemon not
+      despawned before the reset (index range on disappear_time)
+    Tracking ends, when complete_percent is reached or after max_duration_in_s.
+    db_wrapper is MAD's db wrapper, which returns None for failed queries. MAD stores pokemon times as UTC.
+    """
+
+    def __init__(self, db_wrapper, logger=None, sample_interval_in_s=60, max_duration_in_s=21600, complete_percent=99):
+        self._db = db_wrapper
+        self._logger = logger
+        self.sample_interval_in_s = sample_interval_in_s
+        self.max_duration_in_s = max_duration_in_s
+        self.complete_percent = complete_percent
+        # reset type -> RescanProgress, latest rescan incl. finished ones
+        self._progress = {}
+        self._next_sample = None
+
+    def _log(self, level, msg):
+        if self._logger is not None:
+            getattr(self._logger, level)(f"EventWatcher: {msg}")
+
+    def _count(self, sql, args=None):
+        rows = self._db.execute(sql, args=args)
+        return rows[0][0] if rows else None
+
+    def _count_quests(self, stop_ids):
+        if stop_ids is None:
+            return self._count("SELECT COUNT(*) FROM trs_quest")
+        count = 0
+        for chunk_start in range(0, len(stop_ids), STOP_IDS_CHUNK_SIZE):
+            chunk = stop_ids[chunk_start:chunk_start + STOP_IDS_CHUNK_SIZE]
+            chunk_count = self._count(f"SELECT COUNT(*) FROM trs_quest WHERE GUID IN ({', '.join(['%s'] * len(chunk))})", tuple(chunk))
+            if chunk_count is None:
+                return None
+            count += chunk_count
+        return count
+
+    def _count_rows(self, progress):
+        if progress.reset_type == "quest":
+            return self._count_quests(progress.stop_ids)
+        return self._count("SELECT COUNT(*) FROM pokemon WHERE last_modified >= %s", (progress.reset_utc.strftime("%Y-%m-%d %H:%M:%S"),))
+
+    def count_target(self, reset_type, now_utc, stop_ids=None):
+        """Rows before the reset, called right before the reset. stop_ids: pokestops of the quest reset, None: all pokestops."""
+        if not self.enabled:
+            return None
+        if reset_type == "quest":
+            return self._count_quests(list(stop_ids) if stop_ids is not None else None)
+        return self._count("SELECT COUNT(*) FROM pokemon WHERE disappear_time > %s", (now_utc.strftime("%Y-%m-%d %H:%M:%S"),))
+
+    @property
+    def enabled(self):
+        return self.sample_interval_in_s > 0
+
+    def start(self, reset_type, count_before, reset_utc, now=None, stop_ids=None):
+        """Start tracking after a reset. count_before: result of count_target() before the reset with the same stop_ids."""
+        if not self.enabled or count_before is None or count_before <= 0:
+            return
+        now = time.time() if now is None else now
+        # all rows in scope are deleted by the reset
+        progress = RescanProgress(reset_type, datetime.fromtimestamp(now), reset_utc, 0, count_before,
+                                  list(stop_ids) if stop_ids is not None else None)
+        progress.samples.append((now, 0))
+        self._progress[reset_type] = progress
+        self._log("info", f"track {reset_type} rescan: {count_before} rows to refill")
+        self._next_sample = now + self.sample_interval_in_s
+
+    def active(self):
+        return [progress for progress in self._progress.values() if progress.finished is None]
+
+    def get_all(self):
+        return list(self._progress.values())
+
+    def sample(self, now=None):
+        """Sample all active rescans, if due. Returns True, if a sample was taken."""
+        now = time.time() if now is None else now
+        if self._next_sample is None or now < self._next_sample:
+            return False
+        for progress in self.active():
+            count = self._count_rows(progress)
+            if count is None:
+                continue
+            progress.samples.append((now, count))
+            if progress.percent >= self.complete_percent:
+                progress.finished = datetime.fromtimestamp(now)
+                self._log("success", f"{progress.reset_type} rescan {progress.percent:.0f}% done after {(now - progress.samples[0][0]) / 60:.0f} minutes")
+            elif now - progress.samples[0][0] > self.max_duration_in_s:
+                progress.finished = datetime.fromtimestamp(now)
+                self._log("warning", f"{progress.reset_type} rescan only {progress.percent:.0f}% done after {self.max_duration_in_s / 3600:.1f} hours -> stop tracking")
+            else:
+                self._log("info", f"{progress.reset_type} rescan {progress.percent:.0f}% done, {progress.refilled}/{progress.target} rows, eta: {progress.eta()}")
+        self._next_sample = now + self.sample_interval_in_s if self.active() else None
+        return True
+
+    def next_time(self):
+        """Time of the next sample or None."""
+        return datetime.fromtimestamp(self._next_sample) if self._next_sample is not None else None
@@ -0,0 +1,273 @@
+import re
+
+RULE_SECTION_PREFIX = "rule:"
+# actions decided by rules. Each action of an event is taken from the first matching rule, which sets it
+ACTIONS = ("spawn_sync", "mad_event", "quest_reset", "pokemon_reset", "notify")
+POKEMON_RESET_STRATEGIES = ("default", "all", "filtered", "species", "swap")
+NOTIFY_TARGETS = ("telegram", "discord")
+# MAD event (trs_event) used for spawn changing events of an event type
+TYPE_TO_MAD_EVENT = {
+    "community-day": "Community Days",
+    "spotlight-hour": "Spotlight Hours",
+    "event": "Regular Events",
+    "default": "DEFAULT",
+    "?": "Others"
+}
+MAD_EVENT_OTHERS = "Others"
+DECISION_CACHE_SIZE = 10000
+
+
+class RuleError(ValueError):
+    pass
+
+
+def _split(value):
+    return [item.strip() for item in re.split(r"[,\s]+", value) if item.strip()]
+
+
+def _parse_bool(rule_name, key, value):
+    lowered = value.strip().lower()
+    if lowered in ("true", "yes", "on", "1"):
+        return True
+    if lowered in ("false", "no", "off", "0"):
+        return False
+    raise RuleError(f"rule '{rule_name}': '{key}' must be true or false")
+
+
+def _parse_quest_reset(rule_name, value):
+    times = _split(value.lower())
+    if times == ["none"]:
+        return ()
+    if times == ["both"]:
+        return ("start", "end")
+    if not times or any(time not in ("start", "end") for time in times):
+        raise RuleError(f"rule '{rule_name}': 'quest_reset' must be none, start, end or both")
+    return tuple(time for time in ("start", "end") if time in times)
+
+
+def _parse_pokemon_reset(rule_name, value):
+    strategy = value.strip().lower()
+    if strategy == "none":
+        return None
+    if strategy not in POKEMON_RESET_STRATEGIES:
+        raise RuleError(f"rule '{rule_name}': 'pokemon_reset' must be none or one of {', '.join(POKEMON_RESET_STRATEGIES)}")
+    return strategy
+
+
+def _parse_notify(rule_name, value):
+    targets = _split(value.lower())
+    if targets == ["none"]:
+        return frozenset()
+    if not targets or any(target not in NOTIFY_TARGETS for target in targets):
+        raise RuleError(f"rule '{rule_name}': 'notify' must be none or {', '.join(NOTIFY_TARGETS)}")
+    return frozenset(targets)
+
+
+class EventRule():
+    """Conditions on an event and the actions it sets. Conditions, which are None, match every event."""
+
+    def __init__(self, name, name_pattern=None, event_types=None, bonuses=None, min_duration_in_h=None, max_duration_in_h=None,
+                 has_spawnpoints=None, has_quests=None, has_pokemon=None, actions=None):
+        self.name = name
+        # regular expression string, case insensitive search in the event name
+        self.name_pattern = name_pattern
+        self.event_types = frozenset(event_types) if event_types is not None else None
+        # pogoinfo bonus templates, e.g. longer-lure. Any of them has to match
+        self.bonuses = frozenset(bonuses) if bonuses is not None else None
+        self.min_duration_in_h = min_duration_in_h
+        self.max_duration_in_h = max_duration_in_h
+        self.has_spawnpoints = has_spawnpoints
+        self.has_quests = has_quests
+        self.has_pokemon = has_pokemon
+        # action -> value, see ACTIONS
+        self.actions = actions or {}
+
+    def __repr__(self):
+        return f"{self.name}: {self.actions}"
+
+    @classmethod
+    def from_section(cls, name, section):
+        conditions = {}
+        actions = {}
+        for key, value in section.items():
+            if key == "name":
+                try:
+                    re.compile(value)
+                except re.error as e:
+                    raise RuleError(f"rule '{name}': invalid regular expression '{value}': {e}")
+                conditions["name_pattern"] = value
+            elif key == "type":
+                conditions["event_types"] = _split(value)
+            elif key == "bonus":
+                conditions["bonuses"] = _split(value)
+            elif key in ("min_duration", "max_duration"):
+                try:
+                    conditions[key + "_in_h"] = float(value)
+                except ValueError:
+                    raise RuleError(f"rule '{name}': '{key}' must be a number of hours")
+            elif key in ("has_spawnpoints", "has_quests", "has_pokemon"):
+                conditions[key] = _parse_bool(name, key, value)
+            elif key == "spawn_sync":
+                actions[key] = _parse_bool(name, key, value)
+            elif key == "mad_event":
+                actions[key] = value.strip()
+            elif key == "quest_reset":
+                actions[key] = _parse_quest_reset(name, value)
+            elif key == "pokemon_reset":
+                actions[key] = _parse_pokemon_reset(name, value)
+            elif key == "notify":
+                actions[key] = _parse_notify(name, value)
+            else:
+                raise RuleError(f"rule '{name}': unknown option '{key}'")
+        if not actions:
+            raise RuleError(f"rule '{name}': no action set")
+        return cls(name, actions=actions, **conditions)
+
+    def matches(self, event):
+        """All conditions except name_pattern, which is checked by the combined matcher of the RuleEngine."""
+        if self.event_types is not None and event.etype not in self.event_types:
+            return False
+        if self.bonuses is not None and not self.bonuses & event.bonuses:
+            return False
+        if self.min_duration_in_h is not None or self.max_duration_in_h is not None:
+            if event.start_epoch is None:
+                return False
+            duration_in_h = (event.end_epoch - event.start_epoch) / 3600
+            if self.min_duration_in_h is not None and duration_in_h < self.min_duration_in_h:
+                return False
+            if self.max_duration_in_h is not None and duration_in_h > self.max_duration_in_h:
+                return False
+        for flag in ("has_spawnpoints", "has_quests", "has_pokemon"):
+            expected = getattr(self, flag)
+            if expected is not None and getattr(event, flag) != expected:
+                return False
+        return True
+
+
+class RuleDecision():
+    def __init__(self, actions, rule_names):
+        self.spawn_sync = actions["spawn_sync"]
+        self.mad_event = actions["mad_event"]
+        # () or "start" and/or "end"
+        self.quest_reset = actions["quest_reset"]
+        # None: no pokemon reset, otherwise strategy or "default" (reset_pokemon_strategy)
+        self.pokemon_reset = actions["pokemon_reset"]
+        self.notify = actions["notify"]
+        # action -> name of the deciding rule
+        self.rule_names = rule_names
+
+
+def parse_rule_sections(config):
+    """Rules of sections [rule:<name>] in order of plugin.ini."""
+    return [EventRule.from_section(section_name[len(RULE_SECTION_PREFIX):].strip(), config[section_name])
+            for section_name in config.sections() if section_name.startswith(RULE_SECTION_PREFIX)]
+
+
+def get_legacy_rules(quests_reset_types, quests_reset_excludes):
+    """Rules equivalent to reset_quests_event_type, reset_quests_exclude_events and the fixed event type mapping."""
+    rules = []
+    if quests_reset_excludes is not None:
+        rules.append(EventRule("reset_quests_exclude_events", name_pattern="|".join(re.escape(exclude) for exclude in quests_reset_excludes),
+                               actions={"quest_reset": ()}))
+    for event_type, times in quests_reset_types.items():
+        rules.append(EventRule(f"reset_quests_event_type:{event_type}", event_types=[event_type], has_quests=True,
+                               actions={"quest_reset": tuple(time for time in ("start", "end") if time in times)}))
+    rules.append(EventRule("spawnpoints", has_spawnpoints=True, actions={"spawn_sync": True}))
+    rules.append(EventRule("pokemon", has_pokemon=True, actions={"pokemon_reset": "default"}))
+    for event_type, mad_event in TYPE_TO_MAD_EVENT.items():
+        rules.append(EventRule(f"mad_event:{event_type}", event_types=[event_type], actions={"mad_event": mad_event}))
+    rules.append(EventRule("default", actions={"spawn_sync": False, "mad_event": MAD_EVENT_OTHERS, "quest_reset": (), "pokemon_reset": None,
+                                               "notify": frozenset(NOTIFY_TARGETS)}))
+    return rules
+
+
+class RuleEngine():
+    """Decide the actions of events by an ordered list of rules, compiled once.
+
+    - the name patterns of all rules are combined into one regular expression: one optional lookahead per rule,
+      so a single match call tells which rules match the event name. Patterns with groups or global flags (e.g. '(?i)')
+      can't be combined, because group numbers and flags would change, they are searched on their own
+    - rules are indexed by event type, only rules of the event type and rules without type are checked
+    - decisions are cached per event content, hits counts events decided by a rule (at least one action)
+    The last rule has to set all actions (see get_legacy_rules).
+    """
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        if not self.rules or set(self.rules[-1].actions) != set(ACTIONS):
+            raise RuleError("last rule has to set all actions")
+        self.hits = {rule.name: 0 for rule in self.rules}
+        self._new_hits = {}
+        # rule index -> group of the rule's lookahead in the combined matcher
+        self._name_groups = {}
+        # rule index -> compiled pattern of rules, which can't be combined
+        self._name_patterns = {}
+        patterns = []
+        for index, rule in enumerate(self.rules):
+            if rule.name_pattern is None:
+                continue
+            pattern = f"(?:(?=.*?({rule.name_pattern})))?"
+            try:
+                combinable = re.compile(rule.name_pattern).groups == 0 and re.compile(pattern).groups == 1
+            except re.error:
+                combinable = False
+            if combinable:
+                patterns.append(pattern)
+                self._name_groups[index] = len(patterns)
+            else:
+                try:
+                    self._name_patterns[index] = re.compile(rule.name_pattern, re.IGNORECASE | re.DOTALL)
+                except re.error as e:
+                    raise RuleError(f"rule '{rule.name}': invalid regular expression '{rule.name_pattern}': {e}")
+        try:
+            self._name_matcher = re.compile("".join(patterns), re.IGNORECASE | re.DOTALL) if patterns else None
+        except re.error as e:
+            raise RuleError(f"unable to combine name patterns of rules: {e}")
+        event_types = {event_type for rule in self.rules if rule.event_types is not None for event_type in rule.event_types}
+        self._untyped_rules = [index for index, rule in enumerate(self.rules) if rule.event_types is None]
+        self._rules_by_type = {event_type: [index for index, rule in enumerate(self.rules) if rule.event_types is None or event_type in rule.event_types]
+                               for event_type in event_types}
+        self._decisions = {}
+        self.mad_event_names = []
+        for rule in self.rules:
+            mad_event = rule.actions.get("mad_event")
+            if mad_event is not None and mad_event not in self.mad_event_names:
+                self.mad_event_names.append(mad_event)
+
+    def decide(self, event):
+        signature = (event.key, event.end_epoch, event.has_spawnpoints, event.has_quests, event.has_pokemon, event.bonuses)
+        decision = self._decisions.get(signature)
+        if decision is not None:
+            return decision
+        name_match = self._name_matcher.match(event.name) if self._name_matcher is not None else None
+        actions = {}
+        rule_names = {}
+        for index in self._rules_by_type.get(event.etype, self._untyped_rules):
+            rule = self.rules[index]
+            if index in self._name_groups and name_match.group(self._name_groups[index]) is None:
+                continue
+            if index in self._name_patterns and self._name_patterns[index].search(event.name) is None:
+                continue
+            if not rule.matches(event):
+                continue
+            fired = False
+            for action, value in rule.actions.items():
+                if action not in actions:
+                    actions[action] = value
+                    rule_names[action] = rule.name
+                    fired = True
+            if fired:
+                self.hits[rule.name] += 1
+                self._new_hits[rule.name] = self._new_hits.get(rule.name, 0) + 1
+            if len(actions) == len(ACTIONS):
+                break
+        decision = RuleDecision(actions, rule_names)
+        if len(self._decisions) >= DECISION_CACHE_SIZE:
+            self._decisions = {}
+        self._decisions[signature] = decision
+        return decision
+
+    def pop_new_hits(self):
+        """Hits since the last call: rule name -> count."""
+        new_hits, self._new_hits = self._new_hits, {}
+        return new_hits
@@ -0,0 +1,166 @@
+import heapq
+import itertools
+import threading
+from datetime import datetime
+
+
+class ResetBoundary():
+    def __init__(self, boundary_time, reset_type, event_change_str, event):
+        # local time of event start or end
+        self.time = boundary_time
+        # 'pokemon' or 'quest'
+        self.reset_type = reset_type
+        # 'start' or 'end'
+        self.event_change_str = event_change_str
+        self.event = event
+
+    def is_same(self, other):
+        return (self.time == other.time and self.reset_type == other.reset_type and self.event_change_str == other.event_change_str
+                and self.event.key == other.event.key)
+
+    def __repr__(self):
+        return f"{self.reset_type} reset for {self.event_change_str} of event {self.event.name} at {self.time}"
+
+
+class BoundaryScheduler():
+    """Priority queue of upcoming event boundaries (event start / end).
+
+    The EventWatcher thread sleeps until the next boundary is due or until the schedule is replaced,
+    e.g. after an event feed refresh.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def replace(self, boundaries):
+        # counter as tie-breaker: boundaries with same time keep insertion order and are never compared
+        heap = [(boundary.time, next(self._counter), boundary) for boundary in boundaries]
+        heapq.heapify(heap)
+        with self._lock:
+            self._heap = heap
+        self._wakeup.set()
+
+    def update(self, obsolete_events, boundaries):
+        """Remove all boundaries of obsolete_events and add new boundaries."""
+        obsolete_ids = {id(event) for event in obsolete_events}
+        with self._lock:
+            heap = [entry for entry in self._heap if id(entry[2].event) not in obsolete_ids]
+            if len(heap) != len(self._heap):
+                heapq.heapify(heap)
+            for boundary in boundaries:
+                heapq.heappush(heap, (boundary.time, next(self._counter), boundary))
+            self._heap = heap
+        self._wakeup.set()
+
+    def next_time(self, reset_type=None):
+        with self._lock:
+            if not self._heap:
+                return None
+            if reset_type is None:
+                return self._heap[0][0]
+            times = [entry[0] for entry in self._heap if entry[2].reset_type == reset_type]
+            return min(times) if times else None
+
+    def pop_due(self, now):
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                due.append(heapq.heappop(self._heap)[2])
+        return due
+
+    def wakeup(self):
+        self._wakeup.set()
+
+    def clear_wakeup(self):
+        """Start of a watcher cycle: wakeups from now on interrupt the next wait_until."""
+        self._wakeup.clear()
+
+    def wait_until(self, deadline):
+        """Sleep until deadline (local datetime) or until schedule changed since the last clear_wakeup.
+
+        The wakeup is not cleared here: a change between the wakeup and the clear would be lost and the
+        thread would sleep until a deadline computed from the old schedule.
+        """
+        timeout = (deadline - datetime.now()).total_seconds()
+        if timeout > 0:
+            self._wakeup.wait(timeout)
+
+
+class ResetAction():
+    """One reset for a group of boundaries of the same reset type, executed at the last boundary."""
+
+    def __init__(self, reset_type, boundaries):
+        self.reset_type = reset_type
+        # sorted by time
+        self.boundaries = boundaries
+
+    @property
+    def time(self):
+        return self.boundaries[-1].time
+
+    @property
+    def events(self):
+        events = []
+        for boundary in self.boundaries:
+            if not any(event is boundary.event for event in events):
+                events.append(boundary.event)
+        return events
+
+    def __repr__(self):
+        return f"{self.reset_type} reset at {self.time} for {len(self.boundaries)} boundaries: {self.boundaries}"
+
+
+class ResetPlanner():
+    """Group due boundaries into one reset action per reset type.
+
+    A due boundary is held back as long as the scheduler has a further boundary of the same reset type
+    within debounce_window after it. A chain of boundaries, each within the window of its predecessor,
+    results in one reset at the last boundary of the chain.
+    """
+
+    def __init__(self, scheduler, debounce_window):
+        self._scheduler = scheduler
+        # timedelta
+        self.debounce_window = debounce_window
+        self._held = {}
+
+    def held_boundaries(self):
+        return [boundary for boundaries in self._held.values() for boundary in boundaries]
+
+    def drop_events(self, obsolete_events):
+        """Remove held boundaries of removed or changed events, their new boundaries are scheduled again."""
+        obsolete_ids = {id(event) for event in obsolete_events}
+        held = {}
+        for reset_type, boundaries in self._held.items():
+            boundaries = [boundary for boundary in boundaries if id(boundary.event) not in obsolete_ids]
+            if boundaries:
+                held[reset_type] = boundaries
+        self._held = held
+
+    def pop_actions(self, now):
+        grouped = self._held
+        self._held = {}
+        for boundary in self._scheduler.pop_due(now):
+            boundaries = grouped.setdefault(boundary.reset_type, [])
+            # held boundaries could be scheduled again by an event update
+            if not any(boundary.is_same(grouped_boundary) for grouped_boundary in boundaries):
+                boundaries.append(boundary)
+        actions = []
+        for reset_type, boundaries in grouped.items():
+            next_time = self._scheduler.next_time(reset_type)
+            if next_time is not None and next_time <= boundaries[-1].time + self.debounce_window:
+                self._held[reset_type] = boundaries
+            else:
+                actions.append(ResetAction(reset_type, boundaries))
+        return actions
+
+    def next_time(self):
+        """Time to release held boundaries, if their following boundary was removed from the schedule."""
+        times = [boundaries[-1].time + self.debounce_window for boundaries in self._held.values()]
+        return min(times) if times else None
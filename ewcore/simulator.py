@@ -0,0 +1,259 @@
+import bisect
+import json
+import math
+from datetime import datetime, timedelta
+
+from .events import EventIndex
+from .feedsources import FEED_PARSERS
+from .policy import ResetPolicy, get_spawn_pool_change
+from .polling import MIN_POLL_INTERVAL_IN_S, AdaptivePollPolicy, get_boundary_times
+from .scheduler import BoundaryScheduler, ResetPlanner
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+# number of SQL statements of a table swap (drop leftovers, create, rename, drop old table)
+SWAP_STATEMENTS = 5
+
+
+def _parse_time(time_str):
+    for time_format in (TIME_FORMAT, "%Y-%m-%d %H:%M"):
+        try:
+            return datetime.strptime(time_str, time_format)
+        except ValueError:
+            pass
+    raise ValueError(f"invalid time '{time_str}'")
+
+
+class FeedHistory():
+    """Event feed payloads over time. The payload at a time is the latest payload recorded before."""
+
+    def __init__(self, snapshots):
+        # list of (datetime, decoded json payload)
+        snapshots = sorted(snapshots, key=lambda snapshot: snapshot[0])
+        self._times = [snapshot_time for snapshot_time, payload in snapshots]
+        self._payloads = [payload for snapshot_time, payload in snapshots]
+
+    def __len__(self):
+        return len(self._times)
+
+    @property
+    def first_time(self):
+        return self._times[0] if self._times else None
+
+    @classmethod
+    def static(cls, payload):
+        """Same feed at any time, e.g. the current pogoinfo feed."""
+        return cls([(datetime.min, payload)])
+
+    @classmethod
+    def from_jsonl(cls, path):
+        """One recorded feed per line: {"time": "YYYY-MM-DD HH:MM[:SS]", "events": [...]}"""
+        snapshots = []
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    snapshots.append((_parse_time(record["time"]), record["events"]))
+        return cls(snapshots)
+
+    def payload_at(self, time):
+        pos = bisect.bisect_right(self._times, time)
+        return self._payloads[pos - 1] if pos > 0 else None
+
+
+class LoadModel():
+    """Estimated size of the MAD database, used to convert resets into deleted rows and rescans."""
+
+    def __init__(self, pokemon_rows=50000, pokestops=5000, species_in_pool=150):
+        # pokemon in table pokemon at a reset (spawned and not yet despawned)
+        self.pokemon_rows = pokemon_rows
+        # pokestops with quests, a quest reset deletes and rescans quests of all of them
+        self.pokestops = pokestops
+        # number of species in the regular spawn pool, pokemon are assumed to be evenly distributed over them
+        self.species_in_pool = species_in_pool
+
+
+class SimulationResult():
+    def __init__(self, start, end, timeline, summary):
+        self.start = start
+        self.end = end
+        # list of dicts, sorted by time
+        self.timeline = timeline
+        self.summary = summary
+
+    def to_dict(self):
+        return {
+            "start": self.start.strftime(TIME_FORMAT),
+            "end": self.end.strftime(TIME_FORMAT),
+            "summary": self.summary,
+            "timeline": self.timeline
+        }
+
+
+class TimelineSimulator():
+    """Replay an event feed history against a virtual clock.
+
+    Uses the event parser, ResetPolicy, EventIndex, BoundaryScheduler, ResetPlanner and AdaptivePollPolicy of the
+    plugin in the same order as the watcher loop, but jumps from one wakeup to the next instead of sleeping. Database work
+    and notifications aren't executed, they are estimated by a LoadModel.
+    """
+
+    def __init__(self, policy, feed_history, load_model=None, sleep_in_s=3600, debounce_window_in_s=300,
+                 pokemon_strategy="all", quests_strategy="truncate", chunk_size=5000, notification_targets=0,
+                 quest_timewindow=None, feed_format="pogoinfo", feed_poll_min_in_s=300, feed_poll_window_in_s=3600):
+        self.policy = policy
+        self.feed_history = feed_history
+        self.load_model = load_model if load_model is not None else LoadModel()
+        # feed checks: adaptive between feed_poll_min and sleep
+        sleep_in_s = max(sleep_in_s, MIN_POLL_INTERVAL_IN_S)
+        self.sleep = timedelta(seconds=sleep_in_s)
+        self.feed_poll_min = timedelta(seconds=min(max(feed_poll_min_in_s, MIN_POLL_INTERVAL_IN_S), sleep_in_s))
+        self.feed_poll_window = timedelta(seconds=feed_poll_window_in_s)
+        self.debounce_window = timedelta(seconds=debounce_window_in_s)
+        self.pokemon_strategy = pokemon_strategy
+        self.quests_strategy = quests_strategy
+        self.chunk_size = chunk_size
+        # Telegram chats + Discord webhooks, which get a message per quest reset
+        self.notification_targets = notification_targets
+        # (start hour, end hour) of the quest scan or None
+        self.quest_timewindow = quest_timewindow
+        self._parser = FEED_PARSERS[feed_format]
+
+    @classmethod
+    def from_config(cls, config, feed_history, load_model=None, section="plugin"):
+        """Simulator with the reset settings of a plugin.ini."""
+        notification_targets = 0
+        quest_timewindow = None
+        if config.getboolean(section, "tg_info_enable", fallback=False):
+            notification_targets += len([chat_id for chat_id in config.get(section, "tg_chat_id", fallback="").split(",") if chat_id.strip()])
+            timewindow_str = config.get(section, "quest_rescan_timewindow", fallback="")
+            if timewindow_str.count("-") == 1:
+                quest_timewindow = tuple(int(hour) for hour in timewindow_str.split("-"))
+        if config.getboolean(section, "dc_info_enable", fallback=False):
+            notification_targets += len([url for url in config.get(section, "dc_webhook_url", fallback="").split(",") if url.strip()])
+        return cls(ResetPolicy.from_config(config, section), feed_history, load_model,
+                   sleep_in_s=config.getint(section, "sleep", fallback=3600),
+                   debounce_window_in_s=config.getint(section, "reset_debounce_window", fallback=300),
+                   pokemon_strategy=config.get(section, "reset_pokemon_strategy", fallback="all").strip(),
+                   quests_strategy=config.get(section, "reset_quests_strategy", fallback="truncate").strip(),
+                   chunk_size=config.getint(section, "reset_pokemon_chunk_size", fallback=5000),
+                   notification_targets=notification_targets,
+                   quest_timewindow=quest_timewindow,
+                   feed_poll_min_in_s=config.getint(section, "feed_poll_min", fallback=300),
+                   feed_poll_window_in_s=config.getint(section, "feed_poll_window", fallback=3600))
+
+    def _estimate_pokemon_reset(self, action, pokemon_events):
+        strategy = self.policy.get_pokemon_strategy(action.events, self.pokemon_strategy)
+        rows = self.load_model.pokemon_rows
+        if strategy == "species":
+            spawn_pool_change = get_spawn_pool_change(pokemon_events, sorted({boundary.time for boundary in action.boundaries}), action.events)
+            if spawn_pool_change is None:
+                strategy = "filtered"
+            else:
+                rows = round(rows * min(1.0, len(spawn_pool_change) / max(1, self.load_model.species_in_pool)))
+                return strategy, rows, 1 + math.ceil(rows / self.chunk_size)
+        if strategy == "filtered":
+            # select of the upper key and delete per chunk
+            return strategy, rows, 1 + 2 * math.ceil(rows / self.chunk_size)
+        if strategy == "swap":
+            return strategy, rows, SWAP_STATEMENTS
+        return "all", rows, 1
+
+    def _estimate_quest_reset(self):
+        rows = self.load_model.pokestops
+        if self.quests_strategy == "swap":
+            return self.quests_strategy, rows, SWAP_STATEMENTS
+        return self.quests_strategy, rows, 1
+
+    def _get_rescan(self, time):
+        if self.quest_timewindow is None:
+            return None
+        if time.hour < self.quest_timewindow[0]:
+            return "before"
+        if time.hour < self.quest_timewindow[1]:
+            return "during"
+        return "after"
+
+    def _reset_entry(self, action, pokemon_events):
+        entry = {
+            "time": action.time.strftime(TIME_FORMAT),
+            "action": "reset",
+            "reset_type": action.reset_type,
+            "events": [f"{boundary.event.name} ({boundary.event.etype} {boundary.event_change_str})" for boundary in action.boundaries]
+        }
+        if action.reset_type == "pokemon":
+            strategy, rows, statements = self._estimate_pokemon_reset(action, pokemon_events)
+            notifications = 0
+        else:
+            strategy, rows, statements = self._estimate_quest_reset()
+            notifications = self.notification_targets if self.policy.get_notify_targets(action.events) else 0
+            entry["rescan"] = self._get_rescan(action.time)
+        entry.update(strategy=strategy, rows_deleted=rows, sql_statements=statements, notifications=notifications)
+        return entry
+
+    def _check_feed(self, index, now, last_payload):
+        payload = self.feed_history.payload_at(now)
+        if payload is None:
+            return None, last_payload
+        if payload is last_payload or payload == last_payload:
+            # feed unchanged -> just remove outdated events
+            return index.remove_ended(now), last_payload
+        events, ended_events, too_long_events = self.policy.filter_events(self._parser(payload), now)
+        return index.update(events, now), payload
+
+    def run(self, start, end):
+        index = EventIndex(changeset_history=1)
+        scheduler = BoundaryScheduler()
+        planner = ResetPlanner(scheduler, self.debounce_window)
+        poll_policy = AdaptivePollPolicy(self.feed_poll_min, self.sleep, self.feed_poll_window)
+        poll_times = []
+        pokemon_events = []
+        last_reset_checks = {"pokemon": start, "quest": start}
+        last_payload = None
+        last_checked_events = None
+        scheduled = False
+        timeline = []
+        summary = {"wakeups": 0, "feed_checks": 0, "feed_changes": 0, "resets": {"pokemon": 0, "quest": 0}, "boundaries": {"pokemon": 0, "quest": 0},
+                   "rows_deleted": {"pokemon": 0, "quest": 0}, "sql_statements": 0, "notifications": 0}
+        now = start
+        while now <= end:
+            summary["wakeups"] += 1
+            for action in planner.pop_actions(now):
+                entry = self._reset_entry(action, pokemon_events)
+                timeline.append(entry)
+                summary["resets"][action.reset_type] += 1
+                summary["boundaries"][action.reset_type] += len(action.boundaries)
+                summary["rows_deleted"][action.reset_type] += entry["rows_deleted"]
+                summary["sql_statements"] += entry["sql_statements"]
+                summary["notifications"] += entry["notifications"]
+            last_reset_checks = {"pokemon": now, "quest": now}
+            for held_boundary in planner.held_boundaries():
+                last_reset_checks[held_boundary.reset_type] = min(last_reset_checks[held_boundary.reset_type], held_boundary.time - timedelta(seconds=1))
+
+            if last_checked_events is None or now - last_checked_events >= poll_policy.interval:
+                summary["feed_checks"] += 1
+                changeset, last_payload = self._check_feed(index, now, last_payload)
+                last_checked_events = now
+                changed = changeset is not None and not changeset.is_empty()
+                if changed:
+                    summary["feed_changes"] += 1
+                    poll_times = get_boundary_times([event for event in index.events()
+                                                     if self.policy.decide(event).spawn_sync or self.policy.is_pokemon_event(event)
+                                                     or self.policy.is_quest_event(event)])
+                    timeline.append({"time": now.strftime(TIME_FORMAT), "action": "event_changes", "changes": changeset.describe()})
+                    pokemon_events = [event for event in index.events() if self.policy.is_pokemon_event(event)]
+                    if not scheduled:
+                        scheduler.replace(self.policy.get_reset_boundaries(index.events(), last_reset_checks))
+                        scheduled = True
+                    elif changeset.affects(lambda event: self.policy.is_pokemon_event(event) or self.policy.is_quest_event(event)):
+                        obsolete_events = changeset.removed + [old_event for old_event, new_event in changeset.changed]
+                        new_events = changeset.added + [new_event for old_event, new_event in changeset.changed]
+                        planner.drop_events(obsolete_events)
+                        scheduler.update(obsolete_events, self.policy.get_reset_boundaries(new_events, last_reset_checks))
+                poll_policy.next_interval(poll_times, now, changed)
+
+            # next wakeup: next event boundary, held boundaries or next event check, whatever comes first
+            next_times = [last_checked_events + poll_policy.interval, scheduler.next_time(), planner.next_time()]
+            now = min(next_time for next_time in next_times if next_time is not None)
+        summary["quests_to_rescan"] = summary["rows_deleted"]["quest"]
+        summary["pokemon_to_rescan"] = summary["rows_deleted"]["pokemon"]
+        return SimulationResult(start, end, timeline, summary)
@@ -0,0 +1,67 @@
+import json
+import os
+import threading
+from datetime import datetime
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def datetime_to_str(value):
+    return value.strftime(TIME_FORMAT) if value is not None else None
+
+
+def str_to_datetime(value):
+    return datetime.strptime(value, TIME_FORMAT) if value is not None else None
+
+
+class StateStore():
+    """Small json document, which survives a MAD restart (e.g. reset watermarks and reset journal).
+
+    Every change is written immediately to a temporary file, which replaces the store file atomically.
+    """
+
+    def __init__(self, path, logger=None):
+        self._path = path
+        self._logger = logger
+        self._lock = threading.Lock()
+        self._state = {}
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def _log(self, level, msg):
+        if self._logger is not None:
+            getattr(self._logger, level)(f"EventWatcher: {msg}")
+
+    def load(self):
+        try:
+            with open(self._path) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            state = {}
+        except Exception as e:
+            self._log("warning", f"unable to load state from {self._path}, start with empty state: {e}")
+            state = {}
+        with self._lock:
+            self._state = state if isinstance(state, dict) else {}
+
+    def _write(self):
+        tmp_path = self._path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._state, f, indent=1)
+        os.replace(tmp_path, self._path)
+
+    def get(self, key, default=None):
+        with self._lock:
+            return self._state.get(key, default)
+
+    def update(self, values):
+        with self._lock:
+            self._state.update(values)
+            self._write()
+
+    def append(self, key, entry, max_entries):
+        """Append entry to list key, only the last max_entries are kept."""
+        with self._lock:
+            entries = self._state.get(key, [])
+            entries.append(entry)
+            self._state[key] = entries[-max_entries:]
+            self._write()
@@ -0,0 +1,113 @@
+import hashlib
+import time
+from datetime import datetime
+
+STATE_KEY = "tg_status_messages"
+
+
+def _is_not_modified(result):
+    return result.get("error_code") == 400 and "message is not modified" in result.get("description", "")
+
+
+def _is_message_lost(result):
+    # message deleted by a chat admin or unknown message id
+    description = result.get("description", "").lower()
+    return result.get("error_code") == 400 and ("message to edit not found" in description or "message_id_invalid" in description)
+
+
+class TelegramStatusMessage():
+    """One pinned message per Telegram chat, which is edited in place instead of sending new messages.
+
+    - the message is only edited, if the rendered text changed (hash of last sent text)
+    - edits of a chat are throttled to min_interval_in_s, a 429 response delays the chat by its retry_after
+    - message ids and text hashes are kept in the StateStore, so the same message is edited after a MAD restart
+    """
+
+    def __init__(self, get_telegram_api, state_store, logger=None, min_interval_in_s=60):
+        # get_telegram_api: callable returning a SimpleTelegramApi, e.g. of the NotificationDispatcher
+        self._get_telegram_api = get_telegram_api
+        self._state_store = state_store
+        self._logger = logger
+        self.min_interval_in_s = min_interval_in_s
+        # chat id -> {"message_id": int, "hash": str, "updated": epoch}
+        self._messages = {}
+        # chat id -> (text, hash), not yet sent
+        self._pending = {}
+        self._ready_at = {}
+
+    def _log(self, level, msg):
+        if self._logger is not None:
+            getattr(self._logger, level)(f"EventWatcher: {msg}")
+
+    def load(self):
+        messages = self._state_store.get(STATE_KEY, {})
+        self._messages = {str(chat_id): dict(message) for chat_id, message in messages.items()} if isinstance(messages, dict) else {}
+        for chat_id, message in self._messages.items():
+            self._ready_at[chat_id] = message.get("updated", 0) + self.min_interval_in_s
+
+    def _save(self):
+        try:
+            self._state_store.update({STATE_KEY: self._messages})
+        except Exception as e:
+            self._log("error", f"Error while saving Telegram status messages: {e}")
+
+    def update(self, chat_ids, text, now=None):
+        """Set text of the status message of all chat_ids and send it, if it's changed and not throttled."""
+        text_hash = hashlib.sha1(text.encode("utf8")).hexdigest()
+        self._pending = {str(chat_id): (text, text_hash) for chat_id in chat_ids
+                         if self._messages.get(str(chat_id), {}).get("hash") != text_hash}
+        self.flush(now)
+
+    def flush(self, now=None):
+        now = time.time() if now is None else now
+        changed = False
+        for chat_id, (text, text_hash) in list(self._pending.items()):
+            if self._ready_at.get(chat_id, 0) > now:
+                continue
+            try:
+                sent = self._send(chat_id, text, text_hash, now)
+            except Exception as e:
+                self._log("warning", f"unable to update Telegram status message of chat {chat_id}, retry later: {e}")
+                sent = False
+            if sent:
+                del self._pending[chat_id]
+                changed = True
+            self._ready_at[chat_id] = max(self._ready_at.get(chat_id, 0), now + self.min_interval_in_s)
+        if changed:
+            self._save()
+
+    def _send(self, chat_id, text, text_hash, now):
+        api = self._get_telegram_api()
+        message = self._messages.get(chat_id)
+        if message is not None:
+            result = api.edit_message(chat_id, message["message_id"], text)
+            if result.get("ok") or _is_not_modified(result):
+                message.update(hash=text_hash, updated=now)
+                return True
+            if not _is_message_lost(result):
+                return self._handle_error(chat_id, result, now)
+            self._log("info", f"Telegram status message of chat {chat_id} not found -> send new status message")
+            del self._messages[chat_id]
+        result = api.send_message(chat_id, text)
+        if not result.get("ok"):
+            return self._handle_error(chat_id, result, now)
+        message_id = result["result"]["message_id"]
+        self._messages[chat_id] = {"message_id": message_id, "hash": text_hash, "updated": now}
+        pin_result = api.pin_message(chat_id, message_id)
+        if not pin_result.get("ok"):
+            self._log("warning", f"unable to pin Telegram status message in chat {chat_id} (bot needs pin permission): {pin_result}")
+        self._log("info", f"new Telegram status message {message_id} in chat {chat_id}")
+        return True
+
+    def _handle_error(self, chat_id, result, now):
+        if result.get("error_code") == 429:
+            retry_after = result.get("parameters", {}).get("retry_after", self.min_interval_in_s)
+            self._ready_at[chat_id] = now + float(retry_after)
+        self._log("warning", f"unable to update Telegram status message of chat {chat_id}, retry later. result:{result}")
+        return False
+
+    def next_time(self):
+        """Time of the next throttled update or None."""
+        if not self._pending:
+            return None
+        return datetime.fromtimestamp(min(self._ready_at.get(chat_id, 0) for chat_id in self._pending))
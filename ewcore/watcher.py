@@ -0,0 +1,1071 @@
+import os
+import configparser
+import hashlib
+import html
+import socket
+from contextlib import contextmanager
+from threading import Thread
+from datetime import datetime, timedelta
+
+from .apprestart import AppRestarter
+from .dbtools import BatchDeleter, TableSwapper, execute_transaction, sql_literal
+from .events import EventIndex
+from .eventview import EventSnapshotCache, event_to_row
+from .feedsources import MultiSourceFeed, parse_source_config
+from .filewatch import FileWatcher
+from .leader import LeaderElection
+from .locales import Locales
+from .metrics import MetricsRegistry
+from .notify import NotificationDispatcher, TELEGRAM_API_URL
+from .policy import ResetPolicy, get_spawn_pool_change
+from .polling import MIN_POLL_INTERVAL_IN_S, AdaptivePollPolicy, get_boundary_times
+from .questareas import QuestAreaScope, parse_area_names, parse_area_rules
+from .rescan import RescanTracker
+from .rules import RuleError
+from .scheduler import BoundaryScheduler, ResetAction, ResetPlanner
+from .statestore import StateStore, datetime_to_str, str_to_datetime
+from .statusmessage import TelegramStatusMessage
+
+DEFAULT_LURE_DURATION = 30
+DEFAULT_TIME = datetime(2030, 1, 1, 0, 0, 0)
+QUEST_DELETE_CHUNK_SIZE = 1000
+RESET_JOURNAL_SIZE = 100
+# entries per list of the Telegram status message, a Telegram message is limited to 4096 characters
+STATUS_MESSAGE_LIST_SIZE = 10
+STATUS_MESSAGE_UPCOMING_DAYS = 7
+EVENT_FEED_URL = "https://raw.githubusercontent.com/ccev/pogoinfo/v2/active/events.json"
+
+
+class EventWatcherCore():
+    """Event feed check, MAD event update, resets and notifications of EventWatcher, without MAD imports.
+
+    Runs inside of MAD as plugin thread or as standalone daemon (see eventwatcherd.py).
+    mad: dict of MAD components used by the watcher: logger, db_wrapper, mapping_manager, ws_server and args.
+    The standalone daemon passes stand-ins of ewcore.madadapter and its own quest_area_scope.
+    """
+
+    def __init__(self, mad, rootdir, pluginconfig, config_path=None):
+        self._mad = mad
+        self._rootdir = rootdir
+        self._pluginconfig = pluginconfig
+        # plugin.ini, reloaded on changes
+        self._config_path = config_path if config_path is not None else rootdir + "/plugin.ini"
+        self.tz_offset = round((datetime.now() - datetime.utcnow()).total_seconds() / 3600)
+        # loaded with plugin.ini parameter, depends on language
+        self._locales = None
+        self._config_watcher = None
+        self._reset_policy = None
+        self._last_pokemon_reset_check = datetime.now()
+        self._last_quest_reset_check = datetime.now()
+        self._all_events = []
+        # events already ended, but still needed for replay of missed resets after a restart (event key -> event)
+        self._recently_ended_events = {}
+        self._spawn_events = []
+        self._quest_events = []
+        self._pokemon_events = []
+        # sorted starts/ends of spawn, quest and pokemon events, the feed is checked more often around them
+        self._feed_poll_times = []
+        self._feed_poll_policy = None
+        self._feed_cache = None
+        self._mad_events_fingerprint = None
+        self._app_restarter = None
+        self._restart_thread = None
+        self._event_index = EventIndex()
+        self._state_store = None
+        self._status_message = None
+        self._rescan_tracker = None
+        # None: no leader election, this instance does all resets
+        self._leader = None
+        self._reset_scheduler = BoundaryScheduler()
+        self._reset_planner = None
+        # area configuration and time of the last recalculation of the pokestops of quest reset areas
+        self._quest_area_config = None
+        self._quest_areas_refreshed = None
+        self._event_snapshots = EventSnapshotCache(self._get_event_rows)
+        self._metrics = MetricsRegistry("eventwatcher")
+        self._create_metrics()
+
+    @property
+    def metrics(self):
+        return self._metrics
+
+    def load_config(self):
+        """Read plugin parameter of plugin.ini. Returns False on errors."""
+        self._mad['logger'].debug(f"EventWatcher: timezone utc offset: {self.tz_offset}")
+        return self._load_config_parameter()
+
+    def start(self):
+        """Run watcher loop in a daemon thread."""
+        self._mad['logger'].info("Starting Event Watcher")
+
+        ae_worker = Thread(name="EventWatcher", target=self.run)
+        ae_worker.daemon = True
+        ae_worker.start()
+
+    def stop(self):
+        """Release leadership, so another instance takes over immediately. The watcher thread is a daemon thread."""
+        if self._leader is not None:
+            self._leader.stop()
+
+    def get_event_snapshot(self):
+        return self._event_snapshots.get()
+
+    def get_event_changes(self):
+        changesets = []
+        for changeset in reversed(self._event_index.changesets):
+            changesets.append({
+                "timestamp": changeset.timestamp.strftime("%Y-%m-%d %H:%M:%S"),
+                "changes": changeset.describe()
+            })
+        return {"version": self._event_index.version, "changesets": changesets}
+
+    def get_changesets(self):
+        return list(reversed(self._event_index.changesets))
+
+    def get_restart_report(self):
+        return self._app_restarter.last_report if self._app_restarter is not None else None
+
+    def get_rescan_progress(self):
+        return [progress.to_dict() for progress in self._rescan_tracker.get_all()] if self._rescan_tracker is not None else []
+
+    def get_reset_journal(self, count=10):
+        return list(reversed(self._state_store.get("reset_journal", [])))[:count] if self._state_store is not None else []
+
+
+    def _create_metrics(self):
+        self._metrics.histogram("phase_duration_seconds", "Duration of watcher loop phases", ("phase",))
+        self._metrics.counter("phase_runs_total", "Runs of watcher loop phases by result (ok, error)", ("phase", "result"))
+        self._metrics.counter("loop_iterations_total", "Iterations of the watcher loop")
+        self._metrics.counter("feed_fetch_total", "Event source requests by status (modified, not_modified, stale, unavailable)", ("source", "status"))
+        self._metrics.gauge("feed_size_bytes", "Size of the last downloaded event source", ("source",))
+        self._metrics.gauge("feed_age_seconds", "Age of the event source used by the last feed check", ("source",))
+        self._metrics.gauge("feed_poll_interval_seconds", "Interval until the next event feed check")
+        self._metrics.gauge("events", "Number of known events by list (all, spawn, quest, pokemon)", ("list",))
+        self._metrics.histogram("reset_lag_seconds", "Delay between event boundary and reset check", ("reset_type",),
+                                buckets=(1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600))
+        self._metrics.counter("resets_total", "Executed resets", ("reset_type",))
+        self._metrics.counter("config_reloads_total", "Reloads of plugin.ini and locales by result (ok, error)", ("result",))
+        self._metrics.counter("rows_deleted_total", "Rows deleted by chunked resets (TRUNCATE and table swap are not counted)", ("table",))
+        self._metrics.gauge("leader", "1 if this instance does resets and MAD event updates (leader election), otherwise 0")
+        self._metrics.counter("rule_hits_total", "Events decided by a rule (at least one action), counted once per event and rule configuration", ("rule",))
+        self._metrics.gauge("rescan_progress_percent", "Refilled rows of the last reset in percent", ("reset_type",))
+        self._metrics.gauge("rescan_throughput_per_minute", "Rows refilled by MAD per minute after the last reset", ("reset_type",))
+        self._metrics.gauge("rescan_eta_seconds", "Estimated time until the refill after the last reset is complete, -1 if unknown", ("reset_type",))
+
+    @contextmanager
+    def _timed_phase(self, phase):
+        result = "ok"
+        try:
+            with self._metrics["phase_duration_seconds"].time(phase=phase):
+                yield
+        except Exception:
+            result = "error"
+            raise
+        finally:
+            self._metrics["phase_runs_total"].inc(phase=phase, result=result)
+
+    def _load_config_parameter(self):
+        # General configuration parameter
+        self.__sleep = self._pluginconfig.getint("plugin", "sleep", fallback=3600)
+        # adaptive feed check: every feed_poll_min seconds around event starts/ends, otherwise backoff up to sleep
+        self.__feed_poll_min = self._pluginconfig.getint("plugin", "feed_poll_min", fallback=300)
+        self.__feed_poll_window = self._pluginconfig.getint("plugin", "feed_poll_window", fallback=3600)
+        if self.__sleep < MIN_POLL_INTERVAL_IN_S:
+            self._mad['logger'].warning(f"EventWatcher: 'sleep' less than {MIN_POLL_INTERVAL_IN_S} seconds -> use {MIN_POLL_INTERVAL_IN_S} seconds")
+            self.__sleep = MIN_POLL_INTERVAL_IN_S
+        if self.__feed_poll_min < MIN_POLL_INTERVAL_IN_S:
+            self._mad['logger'].warning(f"EventWatcher: 'feed_poll_min' less than {MIN_POLL_INTERVAL_IN_S} seconds -> use {MIN_POLL_INTERVAL_IN_S} seconds")
+            self.__feed_poll_min = MIN_POLL_INTERVAL_IN_S
+        if self.__feed_poll_min > self.__sleep:
+            self._mad['logger'].warning(f"EventWatcher: 'feed_poll_min' greater than 'sleep' -> check event feed every {self.__sleep} seconds")
+            self.__feed_poll_min = self.__sleep
+        self.__delete_events = self._pluginconfig.getboolean("plugin", "delete_events", fallback=False)
+        self.__language = self._pluginconfig.get("plugin", "language", fallback="en").strip()
+        self.__config_reload_interval = self._pluginconfig.getint("plugin", "config_reload_interval", fallback=60)
+        self.__feed_timeout = self._pluginconfig.getint("plugin", "feed_timeout", fallback=10)
+        self.__feed_grace = self._pluginconfig.getfloat("plugin", "feed_grace", fallback=2)
+        try:
+            self.__feed_sources = parse_source_config(self._pluginconfig, EVENT_FEED_URL, self.__feed_timeout)
+        except Exception as e:
+            self._mad['logger'].error(f"EventWatcher: Error while read event sources from plugin.ini: {e}. Use pogoinfo feed only")
+            self.__feed_sources = parse_source_config(configparser.ConfigParser(), EVENT_FEED_URL, self.__feed_timeout)
+        self._mad['logger'].info(f"EventWatcher: event sources: {self.__feed_sources}")
+        # reset decisions: reset_pokemon_enable, reset_quests_enable, reset_quests_event_type, reset_quests_exclude_events, max_event_duration
+        # and rules of sections [rule:<name>]
+        try:
+            self._reset_policy = ResetPolicy.from_config(self._pluginconfig)
+        except RuleError as e:
+            if self._reset_policy is None:
+                self._mad['logger'].error(f"EventWatcher: Error while read rules from plugin.ini: {e}. Use reset_quests_event_type and reset_quests_exclude_events only")
+                self._reset_policy = ResetPolicy.from_config(self._pluginconfig, with_rules=False)
+            else:
+                self._mad['logger'].error(f"EventWatcher: Error while read rules from plugin.ini: {e}. Keep previous rules")
+        self._mad['logger'].info(f"EventWatcher: event rules: {self._reset_policy.rules.rules}")
+        self.__reset_catchup_max_age = self._pluginconfig.getint("plugin", "reset_catchup_max_age", fallback=24)
+        self.__reset_debounce_window = self._pluginconfig.getint("plugin", "reset_debounce_window", fallback=300)
+        # several MAD instances with one database: only the leader does resets, MAD event updates and notifications
+        self.__leader_election = self._pluginconfig.getboolean("plugin", "leader_election", fallback=False)
+        self.__leader_lease_duration = self._pluginconfig.getint("plugin", "leader_lease_duration", fallback=60)
+        self.__instance_name = self._pluginconfig.get("plugin", "instance_name",
+                                                      fallback=getattr(self._mad['args'], "status_name", None) or socket.gethostname()).strip()
+        # progress of the rescan after resets: one COUNT query per sample
+        self.__rescan_sample_interval = self._pluginconfig.getint("plugin", "rescan_sample_interval", fallback=60)
+        self.__rescan_max_duration = self._pluginconfig.getfloat("plugin", "rescan_max_duration", fallback=6)
+        # pokemon reset configuration parameter
+        self.__reset_pokemon_strategy = self._pluginconfig.get("plugin", "reset_pokemon_strategy", fallback="all").strip()
+        self.__reset_pokemon_restart_app = self._pluginconfig.getboolean("plugin", "reset_pokemon_restart_app", fallback=False)
+        self.__reset_pokemon_restart_concurrency = self._pluginconfig.getint("plugin", "reset_pokemon_restart_concurrency", fallback=10)
+        self.__reset_pokemon_restart_stagger = self._pluginconfig.getfloat("plugin", "reset_pokemon_restart_stagger", fallback=0.5)
+        self.__reset_pokemon_restart_deadline = self._pluginconfig.getint("plugin", "reset_pokemon_restart_deadline", fallback=300)
+        self.__reset_pokemon_chunk_size = self._pluginconfig.getint("plugin", "reset_pokemon_chunk_size", fallback=5000)
+        self.__reset_pokemon_chunk_pause = self._pluginconfig.getfloat("plugin", "reset_pokemon_chunk_pause", fallback=0.2)
+        self.__reset_pokemon_lock_wait = self._pluginconfig.getint("plugin", "reset_pokemon_lock_wait", fallback=0)
+        # quest reset configuration parameter
+        self.__reset_quests_strategy = self._pluginconfig.get("plugin", "reset_quests_strategy", fallback="truncate").strip()
+        self.__reset_quests_areas = parse_area_names(self._pluginconfig.get("plugin", "reset_quests_areas", fallback=""))
+        self.__reset_quests_area_map = self._pluginconfig.get("plugin", "reset_quests_area_map", fallback="").strip()
+        # pokestops of quest reset areas are recalculated after this hours, e.g. for new pokestops or changed geofences
+        self.__reset_quests_area_refresh = self._pluginconfig.getfloat("plugin", "reset_quests_area_refresh", fallback=24)
+        area_map_valid = True
+        try:
+            self.__reset_quests_area_rules = parse_area_rules(self.__reset_quests_area_map)
+        except Exception as e:
+            # never widen the scope of quest resets because of a typo: invalid configuration, on reload the previous one is kept
+            self._mad['logger'].error(f"EventWatcher: Error while read parameter 'reset_quests_area_map' from plugin.ini: {e} -> quest resets disabled")
+            self.__reset_quests_area_rules = []
+            self._reset_policy.reset_quests_enable = False
+            area_map_valid = False
+        self._mad['logger'].debug(f"EventWatcher: quests_reset_excludes_list: {self._reset_policy.quests_reset_excludes}")
+        # notification configuration parameter
+        self.__notify_workers = self._pluginconfig.getint("plugin", "notify_workers", fallback=4)
+        self.__notify_max_attempts = self._pluginconfig.getint("plugin", "notify_max_attempts", fallback=5)
+        self.__notify_timeout = self._pluginconfig.getint("plugin", "notify_timeout", fallback=10)
+        # Telegram info configuration parameter
+        self.__token = None
+        self.__tg_api_url = self._pluginconfig.get("plugin", "tg_api_url", fallback=TELEGRAM_API_URL).strip()
+        self.__tg_info_enable = self._pluginconfig.getboolean("plugin", "tg_info_enable", fallback=False)
+        if self.__tg_info_enable:
+            #Just read and check all the other TG related parameter, if function is enabled
+            self._mad['logger'].info(f"EventWatcher: TG info feature activated")
+            self.__token = self._pluginconfig.get("plugin", "tg_bot_token", fallback=None)
+            if self.__token is None:
+                self._mad['logger'].error(f"EventWatcher: 'tg_bot_token' not set in plugin.ini")
+                return False
+            tg_chat_id_str = self._pluginconfig.get("plugin", "tg_chat_id", fallback=None)
+            if tg_chat_id_str is None:
+                self._mad['logger'].error(f"EventWatcher: 'tg_chat_id' not set in plugin.ini")
+                return False
+            #convert parameter into list and remove whitespaces
+            self.__tg_chat_id_list = [chat_id.strip() for chat_id in tg_chat_id_str.split(',')]
+            quest_timewindow_str = self._pluginconfig.get("plugin", "quest_rescan_timewindow")
+            status, timewindow_list = self._get_timewindow_from_string(quest_timewindow_str)
+            if status is False:
+                self._mad['logger'].error(f"EventWatcher: Error while read parameter 'quest_rescan_timewindow' from plugin.ini. Please check value and pattern: quest_rescan_timewindow = ##-##")
+                return False
+            self.__quest_timewindow_start_h = timewindow_list[0]
+            self.__quest_timewindow_end_h = timewindow_list[1]
+        # pinned Telegram status message, uses bot and chats of Telegram info
+        self.__tg_status_enable = self._pluginconfig.getboolean("plugin", "tg_status_enable", fallback=False)
+        self.__tg_status_interval = self._pluginconfig.getint("plugin", "tg_status_interval", fallback=60)
+        if self.__tg_status_enable and not self.__tg_info_enable:
+            self._mad['logger'].warning(f"EventWatcher: 'tg_status_enable' needs 'tg_info_enable' -> Telegram status message disabled")
+            self.__tg_status_enable = False
+        # Discord info configuration parameter
+        self.__dc_info_enable = self._pluginconfig.getboolean("plugin", "dc_info_enable", fallback=False)
+        if self.__dc_info_enable:
+            self._mad['logger'].info(f"EventWatcher: Discord info feature activated")
+            dc_webhook_url_str = self._pluginconfig.get("plugin", "dc_webhook_url", fallback=None)
+            if dc_webhook_url_str is None:
+                self._mad['logger'].error(f"EventWatcher: 'dc_webhook_url' not set in plugin.ini")
+                return False
+            #convert parameter into list and remove whitespaces
+            self.__dc_webhook_url_list = [webhook_url.strip() for webhook_url in dc_webhook_url_str.split(',')]
+            self.__dc_webook_username = self._pluginconfig.get("plugin", "dc_webhook_username", fallback="PoGo Event Bot")
+            self.__dc_webhook_embedTitle = self._pluginconfig.get("plugin", "dc_webhook_embedTitle", fallback="Event Quest notification")
+        # locales: strings missing in local_custom.json are taken from local_default.json, message templates are checked on load
+        try:
+            self._locales = Locales.load(self._rootdir + "/local_default.json", self._rootdir + "/local_custom.json", self.__language)
+        except Exception as e:
+            self._mad['logger'].error(f"EventWatcher: Error while loading local_custom.json/local_default.json: {e}")
+            if self._locales is None:
+                self._mad['logger'].info("EventWatcher: Fallback to english strings of local_default.json")
+                self._locales = Locales.load(self._rootdir + "/local_default.json", None, "en")
+            return False
+        if not area_map_valid:
+            return False
+        self._mad['logger'].success(f"EventWatcher: Loading plugin.ini parameter successful")
+
+    def _get_timewindow_from_string(self, timewindow_str):
+        try:
+            timewindow_list = []
+            timewindow_str_list = timewindow_str.split('-')
+            if len(timewindow_str_list) == 2:
+                timewindow_list.append(int(timewindow_str_list[0]))
+                timewindow_list.append(int(timewindow_str_list[1]))
+                return True, timewindow_list
+            else:
+                return False, timewindow_list
+        except Exception as e:
+            self._mad['logger'].error(f"EventWatcher: Error in _get_timewindow_from_string()")
+            self._mad['logger'].exception(e)
+            return False, timewindow_list
+
+    def _convert_time(self, time_string, local=True):
+        if time_string is None:
+            return None
+        time = datetime.strptime(time_string, "%Y-%m-%d %H:%M")
+        if not local:
+            time = time + timedelta(hours=self.tz_offset)
+        return time
+
+    def _get_local_tg_rescan_msg(self):
+        now = datetime.now()
+        first_rescan_time = now.replace(hour=self.__quest_timewindow_start_h, minute=0)
+        latest_rescan_time = now.replace(hour=self.__quest_timewindow_end_h, minute=0)
+        if now < first_rescan_time:     # quest changed before quest rescan timewindow
+            rescan_str = self._locales.text('tg_questrescan_before')
+        elif now < latest_rescan_time:  # quest changed during quest rescan timewindow
+            rescan_str = self._locales.text('tg_questrescan_during')
+        else:                           # quest changed after quest rescan timewindow
+            rescan_str = self._locales.text('tg_questrescan_after')
+        return rescan_str
+
+    def _get_local_event_list(self, boundaries):
+        return ", ".join(f"{boundary.event.name} ({self._locales.text(boundary.event_change_str)})" for boundary in boundaries)
+
+    def _send_dc_info_questreset(self, boundaries):
+        if self.__dc_info_enable:
+            embedUsername = self.__dc_webook_username
+            data = {
+                "content" : "",
+                "username" : embedUsername
+            }
+            if len(boundaries) == 1:
+                event_trigger = self._locales.text(boundaries[0].event_change_str)
+                embedDescription = self._locales.render('dc_questreset_tmpl', event_trigger=event_trigger, event_name=boundaries[0].event.name)
+            else:
+                embedDescription = self._locales.render('dc_questreset_multi_tmpl', event_list=self._get_local_event_list(boundaries))
+            embedTitle = self._locales.text("dc_webhook_embedTitle")
+            data["embeds"] = [
+            {
+                "description" : embedDescription,
+                "title" : embedTitle
+            }
+            ]
+            for url in self.__dc_webhook_url_list:
+                self._notifier.enqueue("discord", url, data)
+                self._mad['logger'].info(f"EventWatcher: queued Discord info message:{embedDescription} for url:{url}")
+
+    def _send_tg_info_questreset(self, boundaries):
+        if self.__tg_info_enable:
+            rescan_str = self._get_local_tg_rescan_msg()
+            if len(boundaries) == 1:
+                event_trigger = self._locales.text(boundaries[0].event_change_str)
+                info_msg = self._locales.render('tg_questreset_tmpl', event_trigger=event_trigger, event_name=boundaries[0].event.name, rescan_str=rescan_str)
+            else:
+                info_msg = self._locales.render('tg_questreset_multi_tmpl', event_list=self._get_local_event_list(boundaries), rescan_str=rescan_str)
+            for chat_id in self.__tg_chat_id_list:
+                self._notifier.enqueue("telegram", chat_id, {"text": info_msg})
+                self._mad['logger'].info(f"EventWatcher: queued Telegram info message:{info_msg} for chat:{chat_id}")
+
+    def _get_tg_status_text(self):
+        now = datetime.now()
+        time_format = "%Y-%m-%d %H:%M"
+
+        def format_events(events):
+            lines = []
+            for event in events[:STATUS_MESSAGE_LIST_SIZE]:
+                lines.append("- " + self._locales.render("tg_status_event_tmpl", event_name=html.escape(event.name), event_type=html.escape(str(event.etype)),
+                                                         event_start=event.start.strftime(time_format) if event.start is not None else "?",
+                                                         event_end=event.end.strftime(time_format)))
+            return "\n".join(lines) if lines else self._locales.text("tg_status_none")
+
+        current_events = [event for event in self._all_events if (event.start is None or event.start <= now) and event.end > now]
+        upcoming_limit = now + timedelta(days=STATUS_MESSAGE_UPCOMING_DAYS)
+        upcoming_events = [event for event in self._all_events if event.start is not None and now < event.start <= upcoming_limit]
+        resets = []
+        for entry in list(reversed(self._state_store.get("reset_journal", [])))[:STATUS_MESSAGE_LIST_SIZE]:
+            resets.append("- " + self._locales.render("tg_status_reset_tmpl", reset_time=entry["time"][:16], reset_type=self._locales.text(entry["reset_type"]),
+                                                      event_list=html.escape(entry["events"])))
+        rescans = []
+        for progress in self._rescan_tracker.active():
+            throughput = progress.throughput_per_min()
+            eta = progress.eta()
+            rescans.append("- " + self._locales.render("tg_status_rescan_tmpl", reset_type=self._locales.text(progress.reset_type),
+                                                       percent=f"{progress.percent:.0f}", throughput=f"{throughput:.0f}" if throughput is not None else "?",
+                                                       eta=eta.strftime("%H:%M") if eta is not None else "?"))
+        return self._locales.render("tg_status_tmpl", current_events=format_events(current_events), upcoming_events=format_events(upcoming_events),
+                                    last_resets="\n".join(resets) if resets else self._locales.text("tg_status_none"),
+                                    rescan_progress="\n".join(rescans) if rescans else self._locales.text("tg_status_none"))
+
+    def _update_tg_status_message(self):
+        # status message is only edited, if its content changed
+        if not self.__tg_status_enable or not self._is_leader():
+            return
+        try:
+            self._status_message.update(self.__tg_chat_id_list, self._get_tg_status_text())
+        except Exception as e:
+            self._mad['logger'].error(f"EventWatcher: Error while updating Telegram status message")
+            self._mad['logger'].exception(e)
+
+    def _reset_all_quests(self):
+        if self.__reset_quests_strategy == "swap":
+            result = self._table_swapper.swap("trs_quest")
+            self._mad['logger'].info(f'EventWatcher: quests deleted by table swap: {result}')
+        else:
+            sql_query = "TRUNCATE trs_quest"
+            dbreturn = self._mad['db_wrapper'].execute(sql_query, commit=True)
+            self._mad['logger'].info(f'EventWatcher: quests deleted by SQL query: {sql_query} return: {dbreturn}')
+
+    def _get_quest_reset_areas(self, event):
+        # first matching rule of reset_quests_area_map wins, otherwise use reset_quests_areas. None: all pokestops
+        for rule in self.__reset_quests_area_rules:
+            if rule.matches(event):
+                return rule.area_names
+        return self.__reset_quests_areas
+
+    def _get_combined_quest_reset_areas(self, events):
+        # areas of all events: None (all pokestops), if any event resets quests of all pokestops
+        combined_area_names = []
+        for event in events:
+            area_names = self._get_quest_reset_areas(event)
+            if area_names is None:
+                return None
+            combined_area_names += [area_name for area_name in area_names if area_name not in combined_area_names]
+        return tuple(combined_area_names)
+
+    def _update_quest_reset_areas(self):
+        # pokestops of areas are cached: recalculate them after changed area configuration or reset_quests_area_refresh hours
+        # (new pokestops, changed geofences), otherwise just calculate areas not cached yet
+        now = datetime.now()
+        area_config = (self.__reset_quests_areas, self.__reset_quests_area_map)
+        if (area_config != self._quest_area_config or self._quest_areas_refreshed is None
+                or now - self._quest_areas_refreshed >= timedelta(hours=self.__reset_quests_area_refresh)):
+            self._quest_area_scope.invalidate()
+            self._quest_area_config = area_config
+            self._quest_areas_refreshed = now
+        area_name_sets = {self._get_quest_reset_areas(event) for event in self._quest_events} - {None}
+        if self._reset_policy.reset_quests_enable and area_name_sets:
+            self._quest_area_scope.precompute(area_name_sets)
+
+    def _reset_area_quests(self, area_names):
+        stop_ids = self._quest_area_scope.get_stop_ids(area_names)
+        result = self._quest_deleter.delete_keys("trs_quest", "GUID", stop_ids)
+        self._mad['logger'].info(f'EventWatcher: quests of {len(stop_ids)} pokestops in areas {", ".join(area_names)} deleted: {result}')
+        self._metrics["rows_deleted_total"].inc(result.rows_deleted, table="trs_quest")
+
+    def _restart_pogo_app(self, origin_name):
+        self._mad['logger'].info(f"EventWatcher: restart PoGo app on device '{origin_name}' ...")
+        temp_comm = self._mad['ws_server'].get_origin_communicator(origin_name)
+        result = temp_comm.restart_app("com.nianticlabs.pokemongo")
+        if result is True:
+            self._mad['logger'].success(f"EventWatcher: restart PoGo app on device '{origin_name}' successful")
+        else:
+            self._mad['logger'].error(f"EventWatcher: restart PoGo app on device '{origin_name}' failed with result:{result}")
+        return result
+
+    def _run_app_restarts(self, origin_list):
+        with self._timed_phase("restart_pogo_apps"):
+            self._app_restarter.restart_all(origin_list)
+
+    def _restart_pogo_apps(self):
+        # restart in background, so following reset checks aren't delayed by slow devices
+        if self._restart_thread is not None and self._restart_thread.is_alive():
+            self._mad['logger'].warning("EventWatcher: previous restart of PoGo apps still in progress -> skip restart")
+            return
+        origin_list = list(self._mad['ws_server'].get_reg_origins())
+        self._restart_thread = Thread(name="EventWatcher restart", target=self._run_app_restarts, args=(origin_list,))
+        self._restart_thread.daemon = True
+        self._restart_thread.start()
+
+    def _log_pokemon_reset_progress(self, result):
+        if result.chunks % 10 == 0:
+            self._mad['logger'].info(f"EventWatcher: pokemon reset in progress: {result.rows_deleted} pokemon deleted in {result.chunks} chunks")
+
+    def _reset_pokemon_species(self, eventchange_datetime_UTC, pokemon_ids):
+        # Only delete mon of changed species. Uses index on disappear_time/pokemon_id, deleted by primary key in chunks
+        eventchange_timestamp = eventchange_datetime_UTC.strftime("%Y-%m-%d %H:%M:%S")
+        pokemon_ids = sorted(pokemon_ids)
+        sql_where = f"disappear_time > %s AND pokemon_id IN ({', '.join(['%s'] * len(pokemon_ids))}) AND last_modified < %s"
+        sql_args = (eventchange_timestamp, *pokemon_ids, eventchange_timestamp)
+        result = self._pokemon_deleter.delete_selected("pokemon", "encounter_id", sql_where, sql_args)
+        self._mad['logger'].info(f'EventWatcher: pokemon of species {pokemon_ids} deleted by chunked SQL DELETE result: {result}')
+        self._metrics["rows_deleted_total"].inc(result.rows_deleted, table="pokemon")
+
+    def _reset_pokemon(self, eventchange_datetime_UTC, boundary_times=None, reset_strategy=None, boundary_events=()):
+        # reset_strategy of the rules of the events, None: reset_pokemon_strategy
+        reset_strategy = reset_strategy if reset_strategy is not None else self.__reset_pokemon_strategy
+        if reset_strategy == "species":
+            spawn_pool_change = get_spawn_pool_change(self._pokemon_events, boundary_times, boundary_events) if boundary_times is not None else None
+            if spawn_pool_change is None:
+                self._mad['logger'].info("EventWatcher: spawn pool of event unknown -> use 'filtered' pokemon reset")
+                reset_strategy = "filtered"
+            elif not spawn_pool_change:
+                self._mad['logger'].info("EventWatcher: spawn pool not changed -> no pokemon reset needed")
+                return False
+            else:
+                self._reset_pokemon_species(eventchange_datetime_UTC, spawn_pool_change)
+
+        if reset_strategy == "filtered":
+            # Use chunked SQL DELETE queries to delete mon, so MAD isn't blocked by long database locks
+            eventchange_timestamp = eventchange_datetime_UTC.strftime("%Y-%m-%d %H:%M:%S")
+            sql_where = "last_modified < %s AND disappear_time > %s"
+            sql_args = (
+                eventchange_timestamp,
+                eventchange_timestamp
+            )
+            result = self._pokemon_deleter.delete("pokemon", "encounter_id", sql_where, sql_args, progress_callback=self._log_pokemon_reset_progress)
+            self._mad['logger'].info(f'EventWatcher: pokemon deleted by chunked SQL DELETE where: {sql_where} arguments: {sql_args} result: {result}')
+            self._metrics["rows_deleted_total"].inc(result.rows_deleted, table="pokemon")
+        elif reset_strategy == "swap":
+            result = self._table_swapper.swap("pokemon")
+            self._mad['logger'].info(f'EventWatcher: pokemon deleted by table swap: {result}')
+        elif reset_strategy != "species":
+            sql_query = "TRUNCATE pokemon"
+            dbreturn = self._mad['db_wrapper'].execute(sql_query, commit=True)
+            self._mad['logger'].info(f'EventWatcher: pokemon deleted by SQL query: {sql_query} return: {dbreturn}')
+
+        #restart pokemon go apps on all devices
+        if self.__reset_pokemon_restart_app:
+            self._restart_pogo_apps()
+
+    def _get_reset_boundaries(self, events):
+        last_reset_checks = {"pokemon": self._last_pokemon_reset_check, "quest": self._last_quest_reset_check}
+        return self._reset_policy.get_reset_boundaries(events, last_reset_checks)
+
+    def _schedule_resets(self, changeset=None):
+        if changeset is None:
+            boundaries = self._get_reset_boundaries(self._all_events)
+            self._reset_scheduler.replace(boundaries)
+            self._mad['logger'].debug(f"EventWatcher: scheduled {len(boundaries)} event boundaries for reset checks")
+            return
+        # only reschedule boundaries of changed events
+        obsolete_events = changeset.removed + [old_event for old_event, new_event in changeset.changed]
+        new_events = changeset.added + [new_event for old_event, new_event in changeset.changed]
+        boundaries = self._get_reset_boundaries(new_events)
+        self._reset_planner.drop_events(obsolete_events)
+        self._reset_scheduler.update(obsolete_events, boundaries)
+        self._mad['logger'].debug(f"EventWatcher: rescheduled {len(boundaries)} event boundaries for reset checks")
+
+    def _check_pokemon_resets(self, action, replay=False):
+        self._mad['logger'].info("EventWatcher: check pokemon changing events")
+        try:
+            # one reset for all grouped boundaries: reset at the last boundary covers all earlier ones
+            boundary = action.boundaries[-1]
+            self._mad['logger'].success(f'EventWatcher: event change detected for events {self._describe_boundaries(action.boundaries)} -> reset pokemon')
+            # remove pokemon from MAD DB, which are scanned before event start/end and needs to be rescanned, adapt time from local to UTC time
+            self._metrics["reset_lag_seconds"].observe(max(0.0, (datetime.now() - boundary.time).total_seconds()), reset_type="pokemon")
+            with self._timed_phase("reset_pokemon"):
+                # spawn pool of ended events of a replay is unknown -> 'species' strategy falls back to 'filtered'
+                boundary_times = None if replay else sorted({grouped_boundary.time for grouped_boundary in action.boundaries})
+                reset_utc = datetime.utcnow()
+                count_before = self._rescan_tracker.count_target("pokemon", reset_utc)
+                reset_strategy = self._reset_policy.get_pokemon_strategy(action.events, self.__reset_pokemon_strategy)
+                if self._reset_pokemon(boundary.time - timedelta(hours=self.tz_offset), boundary_times, reset_strategy, action.events) is not False:
+                    self._rescan_tracker.start("pokemon", count_before, reset_utc)
+                    self._update_rescan_metrics()
+            self._metrics["resets_total"].inc(reset_type="pokemon")
+            self._record_reset(action, replay)
+        except Exception as e:
+            self._mad['logger'].error(f"EventWatcher: Error while checking Pokemon Resets")
+            self._mad['logger'].exception(e)
+
+    def _check_quest_resets(self, action, replay=False):
+        self._mad['logger'].info("EventWatcher: check quest changing events")
+        try:
+            # one reset for all grouped boundaries: reset at the last boundary covers all earlier ones
+            boundary = action.boundaries[-1]
+            self._mad['logger'].success(f'EventWatcher: event change detected for events {self._describe_boundaries(action.boundaries)} -> reset quests')
+            # remove quests of all pokestops or just pokestops in configurated areas from MAD DB
+            self._metrics["reset_lag_seconds"].observe(max(0.0, (datetime.now() - boundary.time).total_seconds()), reset_type="quest")
+            reset_areas = self._get_combined_quest_reset_areas(action.events)
+            with self._timed_phase("reset_quests"):
+                reset_utc = datetime.utcnow()
+                stop_ids = self._quest_area_scope.get_stop_ids(reset_areas) if reset_areas is not None else None
+                count_before = self._rescan_tracker.count_target("quest", reset_utc, stop_ids)
+                if reset_areas is None:
+                    self._reset_all_quests()
+                else:
+                    self._reset_area_quests(reset_areas)
+                self._rescan_tracker.start("quest", count_before, reset_utc, stop_ids=stop_ids)
+                self._update_rescan_metrics()
+            self._metrics["resets_total"].inc(reset_type="quest")
+            self._record_reset(action, replay)
+            self._mad["mapping_manager"].update()
+            notify_targets = self._reset_policy.get_notify_targets(action.events)
+            if "telegram" in notify_targets:
+                self._send_tg_info_questreset(action.boundaries)
+            if "discord" in notify_targets:
+                self._send_dc_info_questreset(action.boundaries)
+        except Exception as e:
+            self._mad['logger'].error(f"EventWatcher: Error while checking Quest Resets")
+            self._mad['logger'].exception(e)
+
+    def _run_reset_actions(self, actions, replay=False):
+        for action in actions:
+            if not self._is_leader():
+                self._mad['logger'].warning(f"EventWatcher: leader lease lost -> skip reset {action}")
+                continue
+            if action.reset_type == "pokemon":
+                self._check_pokemon_resets(action, replay)
+            else:
+                self._check_quest_resets(action, replay)
+
+    def _describe_boundaries(self, boundaries):
+        return ", ".join(f"{boundary.event.name} ({boundary.event.etype} {boundary.event_change_str})" for boundary in boundaries)
+
+    def _load_reset_watermarks(self):
+        # boundaries after the watermarks are not handled yet, e.g. passed while MAD was stopped
+        self._state_store.load()
+        self._apply_reset_watermarks(self._state_store.get("watermarks", {}))
+
+    def _apply_reset_watermarks(self, watermarks):
+        now = datetime.now()
+        catchup_limit = now - timedelta(hours=self.__reset_catchup_max_age)
+        for reset_type in ("pokemon", "quest"):
+            try:
+                watermark = str_to_datetime(watermarks.get(reset_type))
+            except ValueError:
+                watermark = None
+            # no watermark (first start): handle only upcoming boundaries
+            if watermark is None or watermark > now:
+                watermark = now
+            elif watermark < catchup_limit:
+                self._mad['logger'].warning(f"EventWatcher: last {reset_type} reset check {watermark} older than {self.__reset_catchup_max_age} hours -> ignore boundaries before {catchup_limit}")
+                watermark = catchup_limit
+            if reset_type == "pokemon":
+                self._last_pokemon_reset_check = watermark
+            else:
+                self._last_quest_reset_check = watermark
+        self._mad['logger'].info(f"EventWatcher: last reset checks: pokemon {self._last_pokemon_reset_check}, quest {self._last_quest_reset_check}")
+
+    def _save_reset_watermarks(self):
+        try:
+            watermarks = {
+                "pokemon": datetime_to_str(self._last_pokemon_reset_check),
+                "quest": datetime_to_str(self._last_quest_reset_check)
+            }
+            self._state_store.update({"watermarks": watermarks})
+            if self._leader is not None:
+                # next leader continues with these watermarks after a failover
+                self._leader.publish({"watermarks": watermarks})
+        except Exception as e:
+            self._mad['logger'].error(f"EventWatcher: Error while saving reset watermarks: {e}")
+
+    def _record_reset(self, action, replay):
+        try:
+            self._state_store.append("reset_journal", {
+                "time": datetime_to_str(datetime.now()),
+                "reset_type": action.reset_type,
+                "events": self._describe_boundaries(action.boundaries),
+                "boundary": datetime_to_str(action.time),
+                "boundaries": len(action.boundaries),
+                "replay": replay
+            }, RESET_JOURNAL_SIZE)
+        except Exception as e:
+            self._mad['logger'].error(f"EventWatcher: Error while saving reset journal: {e}")
+
+    def _replay_missed_resets(self):
+        # boundaries passed since last run (e.g. during MAD restart) are replayed once: one reset per reset type
+        now = datetime.now()
+        if self.__reset_catchup_max_age > 0:
+            events = self._all_events + list(self._recently_ended_events.values())
+            missed_boundaries = sorted((boundary for boundary in self._get_reset_boundaries(events) if boundary.time <= now),
+                                       key=lambda boundary: boundary.time)
+            actions = []
+            for reset_type in ("pokemon", "quest"):
+                boundaries = [boundary for boundary in missed_boundaries if boundary.reset_type == reset_type]
+                if boundaries:
+                    self._mad['logger'].warning(f"EventWatcher: {len(boundaries)} {reset_type} reset boundaries missed since last run: {boundaries} -> replay as one reset")
+                    actions.append(ResetAction(reset_type, boundaries))
+            self._run_reset_actions(actions, replay=True)
+        self._last_pokemon_reset_check = now
+        self._last_quest_reset_check = now
+        self._save_reset_watermarks()
+
+    def _get_mad_events(self):
+        # get existing events from the db and bring them in a format that's easier to work with
+        query = "select event_name, event_start, event_end, event_lure_duration from trs_event;"
+        db_events = self._mad['db_wrapper'].autofetch_all(query)
+        events_in_db = {}
+        for db_event in db_events:
+            events_in_db[db_event["event_name"]] = {
+                "event_start": db_event["event_start"],
+                "event_end": db_event["event_end"],
+                "event_lure_duration": db_event["event_lure_duration"]
+            }
+        return events_in_db
+
+    def _get_mad_events_target(self):
+        # first event with known start of each event type defines the MAD event, other events from same type are ignored
+        # assumption: outdated events are removed before in EventWatcher event list and events are sorted by start
+        target = {}
+        for event in self._spawn_events:
+            #handle unknown eventstart
+            if event.start is None:
+                continue
+            type_name = self._reset_policy.decide(event).mad_event
+            if type_name not in target:
+                target[type_name] = {
+                    "event_start": event.start,
+                    "event_end": event.end,
+                    "event_lure_duration": event.bonus_lure_duration if event.bonus_lure_duration is not None else DEFAULT_LURE_DURATION
+                }
+        return target
+
+    def _get_mad_event_statements(self, events_in_db, target):
+        statements = []
+        changes = []
+        for type_name in self._reset_policy.rules.mad_event_names:
+            vals = target.get(type_name, {
+                "event_start": DEFAULT_TIME,
+                "event_end": DEFAULT_TIME,
+                "event_lure_duration": DEFAULT_LURE_DURATION
+            })
+            db_entry = events_in_db.get(type_name)
+            # create missing event entries
+            if db_entry is None:
+                statements.append("INSERT INTO trs_event (event_name, event_start, event_end, event_lure_duration) VALUES ({}, {}, {}, {})".format(
+                    sql_literal(type_name), sql_literal(vals["event_start"]), sql_literal(vals["event_end"]), sql_literal(vals["event_lure_duration"])))
+                changes.append(f"Created event type {type_name}")
+            # check for different event times (means event time changed or DEFAULT time was used before) or changed lure duration of existing event
+            elif type_name in target and db_entry != vals:
+                statements.append("UPDATE trs_event SET event_start = {}, event_end = {}, event_lure_duration = {} WHERE event_name = {}".format(
+                    sql_literal(vals["event_start"]), sql_literal(vals["event_end"]), sql_literal(vals["event_lure_duration"]), sql_literal(type_name)))
+                changes.append(f'Updated MAD event {type_name} with start:{vals["event_start"]}, end:{vals["event_end"]}, lure_duration:{vals["event_lure_duration"]}')
+        # just deletes all events that aren't part of Event Watcher
+        if self.__delete_events:
+            for db_event_name in events_in_db:
+                if not db_event_name in self._reset_policy.rules.mad_event_names:
+                    statements.append("DELETE FROM trs_event WHERE event_name = {}".format(sql_literal(db_event_name)))
+                    changes.append(f"Deleted event {db_event_name}")
+        return statements, changes
+
+    def _update_spawn_events_in_mad_db(self):
+        # abort, if there is no spawn event in list -> nothing to do
+        if len(self._spawn_events) == 0:
+            self._mad['logger'].info("EventWatcher: no spawnpoint changing events -> no event update in MAD-DB needed")
+            return
+
+        self._mad['logger'].info("EventWatcher: Check spawnpoint changing events")
+        try:
+            target = self._get_mad_events_target()
+            # skip database, if MAD events are already updated to the same state
+            fingerprint = hashlib.sha1(repr((sorted(target.items()), sorted(self._reset_policy.rules.mad_event_names), self.__delete_events)).encode("utf8")).hexdigest()
+            if fingerprint == self._mad_events_fingerprint:
+                self._mad['logger'].info("EventWatcher: MAD events already up to date -> no event update in MAD-DB needed")
+                return
+
+            statements, changes = self._get_mad_event_statements(self._get_mad_events(), target)
+            if statements:
+                # apply all changes in one transaction, so MAD never sees partly updated events
+                execute_transaction(self._mad['db_wrapper'], statements)
+                # MAD's db wrapper doesn't return a result for transactions: check MAD events again
+                remaining_statements, _ = self._get_mad_event_statements(self._get_mad_events(), target)
+                if remaining_statements:
+                    self._mad['logger'].error(f"EventWatcher: Error while updating MAD events, retry with next event check")
+                    return
+                for change in changes:
+                    self._mad['logger'].success(f"EventWatcher: {change}")
+            self._mad_events_fingerprint = fingerprint
+        except Exception as e:
+            self._mad['logger'].error(f"EventWatcher: Error while checking Spawn Events: {e}")
+
+    def _get_events(self):
+        self._mad['logger'].info("EventWatcher: Update event list from external")
+        result = self._feed_cache.fetch()
+        self._mad['logger'].info(f"EventWatcher: event feed result: {result}")
+        for source_name, source_result in result.source_results.items():
+            self._metrics["feed_fetch_total"].inc(source=source_name, status=source_result.status)
+            if source_result.size_in_bytes is not None:
+                self._metrics["feed_size_bytes"].set(source_result.size_in_bytes, source=source_name)
+            if source_result.age_in_s is not None:
+                self._metrics["feed_age_seconds"].set(source_result.age_in_s, source=source_name)
+        if result.events is None:
+            # keep current event lists, if there is neither a feed nor a snapshot
+            return None
+        if result.changed:
+            changeset = self._update_event_index(result.events)
+        else:
+            # feed unchanged -> no need to parse again, just remove outdated events
+            changeset = self._event_index.remove_ended(datetime.now())
+        return self._apply_event_changeset(changeset)
+
+    def _load_events_snapshot(self):
+        result = self._feed_cache.load_snapshot()
+        if result.events is None:
+            self._mad['logger'].info("EventWatcher: no event feed snapshot available")
+            return None
+        self._mad['logger'].info(f"EventWatcher: loaded event feed snapshots: {result}")
+        return self._apply_event_changeset(self._update_event_index(result.events))
+
+    def _update_event_index(self, new_events):
+        now = datetime.now()
+        events, ended_events, too_long_events = self._reset_policy.filter_events(new_events, now)
+        # season workaround: ignore events with long duration
+        for event in too_long_events:
+            if event.end >= now:
+                self._mad['logger'].info(f'EventWatcher: Ignore following event because duration exceed configurated limit of {self._reset_policy.max_event_duration_in_days} days: {event.name}')
+        # keep ended events for replay of missed resets
+        for event in ended_events:
+            self._recently_ended_events[event.key] = event
+        catchup_limit = now - timedelta(hours=self.__reset_catchup_max_age)
+        self._recently_ended_events = {key: event for key, event in self._recently_ended_events.items() if event.end > catchup_limit}
+        return self._event_index.update(events, now)
+
+    def _apply_event_changeset(self, changeset):
+        if changeset is None or changeset.is_empty():
+            return changeset
+        self._mad['logger'].info(f"EventWatcher: event list changed: {changeset}")
+        for change in changeset.describe():
+            self._mad['logger'].info(f"EventWatcher: {change}")
+        self._partition_events()
+        return changeset
+
+    def _partition_events(self):
+        # put events into seperate lists depending if they boost spawns, reset quests or change pokemon pool
+        # event index is already sorted by start time
+        spawn_events = []
+        quest_events = []
+        pokemon_events = []
+        for event in self._event_index.events():
+            # actions of the event are decided by the first matching rule setting them (see ewcore.rules)
+            decision = self._reset_policy.decide(event)
+            # get events with changed spawnpoints
+            # TBD: check how to handle events with just bonus_lure_duration. Hint: MAD ignores lure_duration setting for event 'DEFAULT' (see function _extract_args_single_stop)
+            if decision.spawn_sync:
+                spawn_events.append(event)
+            # get events with changed quests
+            if decision.quest_reset:
+                quest_events.append(event)
+            elif event.has_quests:
+                self._mad['logger'].debug(f"EventWatcher: no quest reset for event {event.name} by rule '{decision.rule_names['quest_reset']}'")
+            # get events which has changed pokemon pool
+            if decision.pokemon_reset is not None:
+                pokemon_events.append(event)
+        self._spawn_events = spawn_events
+        self._quest_events = quest_events
+        self._pokemon_events = pokemon_events
+        self._feed_poll_times = get_boundary_times(spawn_events + quest_events + pokemon_events)
+        self._all_events = self._event_index.events()
+        self._event_snapshots.invalidate()
+        for list_name, event_list in (("all", self._all_events), ("spawn", spawn_events), ("quest", quest_events), ("pokemon", pokemon_events)):
+            self._metrics["events"].set(len(event_list), list=list_name)
+        for rule_name, hits in self._reset_policy.rules.pop_new_hits().items():
+            self._metrics["rule_hits_total"].inc(hits, rule=rule_name)
+
+    def _get_event_rows(self):
+        quest_event_ids = {id(event) for event in self._quest_events}
+        return [event_to_row(event, id(event) in quest_event_ids) for event in self._all_events]
+
+    def _create_components(self):
+        # notifications are sent in background, so a hanging Telegram or Discord server doesn't block reset checks
+        self._notifier = NotificationDispatcher(self._rootdir + "/data/notification_outbox.json", self._mad['logger'],
+                                                telegram_token=self.__token, workers=self.__notify_workers,
+                                                max_attempts=self.__notify_max_attempts, timeout=self.__notify_timeout,
+                                                metrics=self._metrics, telegram_api_url=self.__tg_api_url)
+        self._state_store = StateStore(self._rootdir + "/data/state.json", self._mad['logger'])
+        self._feed_cache = MultiSourceFeed(self.__feed_sources, self._rootdir + "/cache", self._rootdir, logger=self._mad['logger'], grace_in_s=self.__feed_grace)
+        self._pokemon_deleter = BatchDeleter(self._mad['db_wrapper'], self._mad['logger'], chunk_size=self.__reset_pokemon_chunk_size,
+                                             chunk_pause_in_s=self.__reset_pokemon_chunk_pause, lock_wait_in_s=self.__reset_pokemon_lock_wait)
+        self._app_restarter = AppRestarter(self._restart_pogo_app, self._mad['logger'], concurrency=self.__reset_pokemon_restart_concurrency,
+                                           stagger_in_s=self.__reset_pokemon_restart_stagger, deadline_in_s=self.__reset_pokemon_restart_deadline)
+        self._table_swapper = TableSwapper(self._mad['db_wrapper'], self._mad['logger'])
+        self._quest_deleter = BatchDeleter(self._mad['db_wrapper'], self._mad['logger'], chunk_size=QUEST_DELETE_CHUNK_SIZE)
+        # standalone daemon: pokestops of areas are computed by the plugin inside of MAD (see ewcore.madadapter)
+        self._quest_area_scope = self._mad.get("quest_area_scope") or QuestAreaScope(self._mad['db_wrapper'], self._mad['mapping_manager'],
+                                                                                      self._mad['logger'])
+        self._reset_planner = ResetPlanner(self._reset_scheduler, timedelta(seconds=self.__reset_debounce_window))
+        self._feed_poll_policy = AdaptivePollPolicy(timedelta(seconds=self.__feed_poll_min), timedelta(seconds=self.__sleep),
+                                                    timedelta(seconds=self.__feed_poll_window))
+        self._status_message = TelegramStatusMessage(self._notifier.get_telegram_api, self._state_store, self._mad['logger'],
+                                                     min_interval_in_s=self.__tg_status_interval)
+        self._rescan_tracker = RescanTracker(self._mad['db_wrapper'], self._mad['logger'], sample_interval_in_s=self.__rescan_sample_interval,
+                                             max_duration_in_s=self.__rescan_max_duration * 3600)
+        if self.__leader_election:
+            self._leader = LeaderElection(self._mad['db_wrapper'], self.__instance_name, self._mad['logger'],
+                                          lease_duration_in_s=self.__leader_lease_duration, on_change=self._on_leader_change)
+
+    def _update_rescan_metrics(self):
+        for progress in self._rescan_tracker.get_all():
+            throughput = progress.throughput_per_min()
+            eta = progress.eta()
+            self._metrics["rescan_progress_percent"].set(round(progress.percent, 1), reset_type=progress.reset_type)
+            self._metrics["rescan_throughput_per_minute"].set(round(throughput, 1) if throughput is not None else 0, reset_type=progress.reset_type)
+            self._metrics["rescan_eta_seconds"].set(max(0, round((eta - datetime.now()).total_seconds())) if eta is not None else -1,
+                                                    reset_type=progress.reset_type)
+
+    def _update_feed_poll_interval(self, changeset):
+        changed = changeset is not None and not changeset.is_empty()
+        interval = self._feed_poll_policy.next_interval(self._feed_poll_times, datetime.now(), changed)
+        self._metrics["feed_poll_interval_seconds"].set(interval.total_seconds())
+        self._mad['logger'].info(f"EventWatcher: next event feed check in {interval}")
+        return interval
+
+    def _is_leader(self):
+        return self._leader is None or self._leader.is_leader()
+
+    def _on_leader_change(self, leader):
+        # called by lease heartbeat: wake up watcher loop to take over immediately
+        self._metrics["leader"].set(1 if leader else 0)
+        self._reset_scheduler.wakeup()
+
+    def _start_leading(self):
+        # on start or after failover: continue with the watermarks of the previous leader and replay resets missed since then
+        if self._leader is not None:
+            self._mad['logger'].info(f"EventWatcher: instance {self.__instance_name} is leader -> takes over resets and MAD event updates")
+            leader_data = self._leader.get_data()
+            if leader_data is not None and "watermarks" in leader_data:
+                self._apply_reset_watermarks(leader_data["watermarks"])
+            # MAD events could be changed by the previous leader
+            self._mad_events_fingerprint = None
+        with self._timed_phase("update_mad_events"):
+            self._update_spawn_events_in_mad_db()
+        self._replay_missed_resets()
+        self._schedule_resets()
+
+    def _reload_config(self):
+        changed_paths = self._config_watcher.changed()
+        if not changed_paths:
+            return
+        self._mad['logger'].info(f"EventWatcher: {', '.join(os.path.basename(path) for path in changed_paths)} changed -> reload configuration")
+        # configuration is applied completely or not at all: keep all parameter to restore them on errors
+        saved_state = dict(self.__dict__)
+        feed_config = (repr(self.__feed_sources), self.__feed_grace)
+        notify_workers = self.__notify_workers
+        try:
+            pluginconfig = configparser.ConfigParser()
+            pluginconfig.read(self._config_path)
+            self._pluginconfig = pluginconfig
+            valid = self._load_config_parameter() is not False
+        except Exception as e:
+            self._mad['logger'].error(f"EventWatcher: Error while reloading configuration: {e}")
+            valid = False
+        if not valid:
+            self.__dict__.update(saved_state)
+            self._mad['logger'].error("EventWatcher: invalid configuration -> keep previous configuration")
+            self._metrics["config_reloads_total"].inc(result="error")
+            return
+
+        # components keep their state (e.g. queued notifications, last restart report), just update their settings
+        self._notifier.configure(telegram_token=self.__token, max_attempts=self.__notify_max_attempts, timeout=self.__notify_timeout,
+                                 telegram_api_url=self.__tg_api_url)
+        if self.__notify_workers != notify_workers:
+            self._mad['logger'].warning("EventWatcher: changed 'notify_workers' is used after MAD restart")
+        self._pokemon_deleter.chunk_size = self.__reset_pokemon_chunk_size
+        self._pokemon_deleter.chunk_pause_in_s = self.__reset_pokemon_chunk_pause
+        self._pokemon_deleter.lock_wait_in_s = self.__reset_pokemon_lock_wait
+        self._app_restarter.concurrency = self.__reset_pokemon_restart_concurrency
+        self._app_restarter.stagger_in_s = self.__reset_pokemon_restart_stagger
+        self._app_restarter.deadline_in_s = self.__reset_pokemon_restart_deadline
+        self._reset_planner.debounce_window = timedelta(seconds=self.__reset_debounce_window)
+        self._feed_poll_policy.min_interval = timedelta(seconds=self.__feed_poll_min)
+        self._feed_poll_policy.max_interval = timedelta(seconds=self.__sleep)
+        self._feed_poll_policy.window = timedelta(seconds=self.__feed_poll_window)
+        self._feed_poll_policy.interval = max(self._feed_poll_policy.min_interval, min(self._feed_poll_policy.interval, self._feed_poll_policy.max_interval))
+        self._status_message.min_interval_in_s = self.__tg_status_interval
+        self._rescan_tracker.sample_interval_in_s = self.__rescan_sample_interval
+        self._rescan_tracker.max_duration_in_s = self.__rescan_max_duration * 3600
+        if self._leader is not None:
+            self._leader.lease_duration_in_s = self.__leader_lease_duration
+        if self.__leader_election != (self._leader is not None) or (self._leader is not None and self.__instance_name != self._leader.instance_id):
+            self._mad['logger'].warning("EventWatcher: changed 'leader_election' or 'instance_name' is used after MAD restart")
+        if (repr(self.__feed_sources), self.__feed_grace) != feed_config:
+            self._feed_cache.close()
+            self._feed_cache = MultiSourceFeed(self.__feed_sources, self._rootdir + "/cache", self._rootdir, logger=self._mad['logger'], grace_in_s=self.__feed_grace)
+        # exclude strings, reset event types, areas or delete_events could be changed
+        self._partition_events()
+        if self._is_leader():
+            with self._timed_phase("update_mad_events"):
+                self._update_spawn_events_in_mad_db()
+        self._schedule_resets()
+        self._update_quest_reset_areas()
+        self._update_tg_status_message()
+        self._metrics["config_reloads_total"].inc(result="ok")
+        self._mad['logger'].success("EventWatcher: configuration reloaded")
+
+    def run(self):
+        last_checked_events = datetime(2000, 1, 1, 0, 0, 0)
+        last_checked_config = datetime.now()
+        self._config_watcher = FileWatcher([self._config_path, self._rootdir + "/local_custom.json", self._rootdir + "/local_default.json"])
+        self._create_components()
+        self._notifier.start()
+        if self._leader is not None:
+            self._leader.start()
+        self._load_reset_watermarks()
+        self._status_message.load()
+
+        # load events initally: use snapshot of last run immediately, afterwards revalidate with event feed
+        self._load_events_snapshot()
+        if len(self._event_index) == 0:
+            # no usable snapshot -> wait for event feed
+            with self._timed_phase("get_events"):
+                changeset = self._get_events()
+            last_checked_events = datetime.now()
+            self._update_feed_poll_interval(changeset)
+        self._update_quest_reset_areas()
+        leader = self._is_leader()
+        self._metrics["leader"].set(1 if leader else 0)
+        if leader:
+            self._start_leading()
+        else:
+            self._mad['logger'].info(f"EventWatcher: instance {self.__instance_name} is follower, leader: {self._leader.holder}")
+            self._schedule_resets()
+
+        while True:
+            # clear before the schedule is read: changes during this cycle end the following sleep
+            self._reset_scheduler.clear_wakeup()
+            now = datetime.now()
+            self._metrics["loop_iterations_total"].inc()
+            # apply changes of plugin.ini and locales without MAD restart
+            if self.__config_reload_interval > 0 and (now - last_checked_config) >= timedelta(seconds=self.__config_reload_interval):
+                self._reload_config()
+                last_checked_config = now
+            was_leader = leader
+            leader = self._is_leader()
+            if leader and not was_leader:
+                self._start_leading()
+            if leader:
+                # run reset actions for all event boundaries passed since last cycle. Boundaries followed by a further boundary
+                # within the debounce window are held back and reset together with the following boundaries
+                self._run_reset_actions(self._reset_planner.pop_actions(now))
+                self._last_pokemon_reset_check = now
+                self._last_quest_reset_check = now
+                # held boundaries are not handled yet: replay them after a restart
+                for held_boundary in self._reset_planner.held_boundaries():
+                    if held_boundary.reset_type == "pokemon":
+                        self._last_pokemon_reset_check = min(self._last_pokemon_reset_check, held_boundary.time - timedelta(seconds=1))
+                    else:
+                        self._last_quest_reset_check = min(self._last_quest_reset_check, held_boundary.time - timedelta(seconds=1))
+                self._save_reset_watermarks()
+            else:
+                # follower: boundaries are reset by the leader, after a failover the new leader replays boundaries missed by the old one
+                self._reset_planner.pop_actions(now)
+
+            # check for new events on event website: often around event starts/ends, otherwise up to configurated event check time
+            # check after reset actions to avoid removing events before event end is detected.
+            if (datetime.now() - last_checked_events) >= self._feed_poll_policy.interval:
+                with self._timed_phase("get_events"):
+                    changeset = self._get_events()
+                last_checked_events = datetime.now()
+                self._update_feed_poll_interval(changeset)
+                self._update_quest_reset_areas()
+                if changeset is not None and not changeset.is_empty():
+                    # only update MAD events and reset schedule, if relevant events are changed
+                    if changeset.affects(lambda event: self._reset_policy.decide(event).spawn_sync) and leader:
+                        with self._timed_phase("update_mad_events"):
+                            self._update_spawn_events_in_mad_db()
+                    if changeset.affects(lambda event: self._reset_policy.is_pokemon_event(event) or self._reset_policy.is_quest_event(event)):
+                        self._schedule_resets(changeset)
+            # progress of the rescan after the last resets
+            if self._rescan_tracker.sample():
+                self._update_rescan_metrics()
+            self._update_tg_status_message()
+
+            # sleep until next event boundary, next event check, next configuration check, throttled status message or rescan sample,
+            # whatever comes first
+            next_times = [last_checked_events + self._feed_poll_policy.interval, self._reset_scheduler.next_time(), self._reset_planner.next_time(),
+                          self._status_message.next_time() if self.__tg_status_enable else None, self._rescan_tracker.next_time()]
+            if self.__config_reload_interval > 0:
+                next_times.append(last_checked_config + timedelta(seconds=self.__config_reload_interval))
+            self._reset_scheduler.wait_until(min(next_time for next_time in next_times if next_time is not None))